@@ -0,0 +1,190 @@
+# ab_testing.py
+# Variantes A/B des textes publicitaires (produit cartésien dédupliqué, noté en lot)
+# et tests séquentiels bayésiens bêta-binomiaux pour mettre en pause les variantes perdantes
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ad_templates import AD_COPY_FIELDS, DEFAULT_LANGUAGE, TemplateRegistry
+from ads_agent import DEFAULT_MULTIPLIER, INDUSTRY_MULTIPLIERS
+
+# Longueurs au-delà desquelles Facebook tronque le texte (titre, texte principal, description)
+MAX_LENGTHS = {"headline": 40, "primary": 125, "description": 30}
+# Perte de CTR par caractère au-delà de la limite, plancher du coefficient
+LENGTH_PENALTY = 0.01
+MIN_LENGTH_FACTOR = 0.7
+EMOJI_BONUS = 1.05
+CTA_BONUS = 1.06
+CTA_WORDS = ("réservez", "demandez", "découvrez", "contactez", "commandez", "profitez", "parlons")
+
+# Affinité ton / secteur observée sur les campagnes passées
+TONE_MULTIPLIERS = {
+    "Santé/Médical": {"Émotionnel": 1.08, "Professionnel": 1.04, "Urgence": 0.92},
+    "Tourisme": {"Émotionnel": 1.05, "Urgence": 1.10},
+    "E-commerce": {"Urgence": 1.12, "Professionnel": 0.97},
+    "Services": {"Professionnel": 1.08, "Urgence": 0.90}
+}
+
+# A priori Beta(1, 99) : CTR attendu de 1 % avant toute impression
+PRIOR_ALPHA = 1.0
+PRIOR_BETA = 99.0
+# Aucune décision avant ce volume ; seuils stricts car les statistiques sont consultées chaque jour
+# (à 5 %, une simulation sur 30 consultations met en pause 10 % des meilleures variantes, 2,7 % à 1 %)
+MIN_IMPRESSIONS = 1000
+PAUSE_BELOW = 0.01
+WIN_ABOVE = 0.99
+
+DECISION_LABELS = {"pause": "⏸️ Pause", "winner": "🏆 Gagnante", "continue": "▶️ En cours", "alone": "— Seule"}
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _length_factor(texts: List[str], max_length: int) -> np.ndarray:
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    return np.clip(1.0 - LENGTH_PENALTY * np.maximum(lengths - max_length, 0), MIN_LENGTH_FACTOR, 1.0)
+
+
+def score_parts(field: str, texts: List[str]) -> np.ndarray:
+    """Coefficient multiplicatif de CTR de chaque texte d'un champ (longueur, emoji, appel à l'action)"""
+    factor = _length_factor(texts, MAX_LENGTHS[field])
+    if field == "headline":
+        # Un emoji en tête de titre attire l'œil dans le fil
+        factor *= np.where([bool(text) and not text[0].isalnum() for text in texts], EMOJI_BONUS, 1.0)
+    elif field == "description":
+        factor *= np.where([any(word in text.casefold() for word in CTA_WORDS) for text in texts], CTA_BONUS, 1.0)
+    return factor
+
+
+def generate_variants(registry: TemplateRegistry, product: str, industry: str, tones: Iterable[str],
+                      offer_end: str = "", language: str = DEFAULT_LANGUAGE,
+                      limit: Optional[int] = None) -> pd.DataFrame:
+    """Titres × textes × descriptions de chaque ton, dédupliqués puis classés par CTR prédit
+
+    Chaque texte n'est rendu et noté qu'une fois : les combinaisons ne manipulent que des indices.
+    """
+    variables = {"product": product, "offer_end": offer_end}
+    texts: Dict[str, List[str]] = {field: [] for field in AD_COPY_FIELDS}
+    ids: Dict[str, Dict[str, int]] = {field: {} for field in AD_COPY_FIELDS}
+    tones = list(dict.fromkeys(tones))
+    blocks = []
+    for tone_code, tone in enumerate(tones):
+        parts = registry.ad_copy_parts(industry, tone, language)
+        indices = []
+        for field in AD_COPY_FIELDS:
+            field_ids = []
+            for render in parts[field]:
+                text = render(variables)
+                # Textes identiques (à la casse et aux espaces près) partagés entre tons
+                part_id = ids[field].setdefault(_normalize(text), len(texts[field]))
+                if part_id == len(texts[field]):
+                    texts[field].append(text)
+                field_ids.append(part_id)
+            indices.append(np.unique(field_ids))
+        grid = np.stack(np.meshgrid(*indices, indexing="ij"), axis=-1).reshape(-1, len(AD_COPY_FIELDS))
+        blocks.append(np.column_stack([grid, np.full(len(grid), tone_code)]))
+
+    if not blocks:
+        return pd.DataFrame(columns=["variant", "tone", *AD_COPY_FIELDS, "predicted_ctr"])
+    combos = np.concatenate(blocks)
+    n_headlines, n_primaries, n_descriptions = (len(texts[field]) for field in AD_COPY_FIELDS)
+    keys = (combos[:, 0] * n_primaries + combos[:, 1]) * n_descriptions + combos[:, 2]
+    # Première occurrence de chaque combinaison, dans l'ordre des tons demandés
+    _, first = np.unique(keys, return_index=True)
+    combos = combos[np.sort(first)]
+
+    multiplier = INDUSTRY_MULTIPLIERS.get(industry, DEFAULT_MULTIPLIER)
+    tone_factor = np.array([TONE_MULTIPLIERS.get(industry, {}).get(tone, 1.0) for tone in tones])
+    predicted_ctr = multiplier["ctr"] * tone_factor[combos[:, 3]]
+    for column, field in enumerate(AD_COPY_FIELDS):
+        predicted_ctr = predicted_ctr * score_parts(field, texts[field])[combos[:, column]]
+
+    order = np.argsort(-predicted_ctr, kind="stable")[:limit]
+    combos = combos[order]
+    return pd.DataFrame({
+        "variant": [f"V{i + 1:03d}" for i in range(len(order))],
+        "tone": np.array(tones, dtype=object)[combos[:, 3]],
+        **{field: np.array(texts[field], dtype=object)[combos[:, column]]
+           for column, field in enumerate(AD_COPY_FIELDS)},
+        "predicted_ctr": np.round(predicted_ctr[order], 3)
+    })
+
+
+def _normal_cdf(z: np.ndarray) -> np.ndarray:
+    """Φ(z) vectorisée (approximation d'Abramowitz et Stegun 7.1.26, erreur < 1.5e-7)"""
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = ((((1.061405429 * t - 1.453152027) * t + 1.421413741) * t - 0.284496736) * t + 0.254829592) * t
+    return 0.5 * (1.0 + np.sign(z) * (1.0 - poly * np.exp(-x * x)))
+
+
+def sequential_test(groups: np.ndarray, impressions: np.ndarray, clicks: np.ndarray,
+                    prior: tuple = (PRIOR_ALPHA, PRIOR_BETA), min_impressions: int = MIN_IMPRESSIONS,
+                    pause_below: float = PAUSE_BELOW, win_above: float = WIN_ABOVE) -> Dict[str, np.ndarray]:
+    """Test bêta-binomial de toutes les variantes de tous les groupes en une passe
+
+    Chaque variante est comparée à la meilleure de son groupe (la meilleure à la deuxième) :
+    P(CTR variante > CTR référence), par approximation normale des lois bêta a posteriori.
+    """
+    impressions = np.asarray(impressions, dtype=float)
+    clicks = np.minimum(np.asarray(clicks, dtype=float), impressions)
+    if impressions.size == 0:
+        empty = np.zeros(0)
+        return {"posterior_ctr": empty, "ctr_low": empty, "ctr_high": empty, "prob_beats_reference": empty,
+                "is_leader": np.zeros(0, dtype=bool), "decision": np.zeros(0, dtype=object)}
+    _, codes = np.unique(np.asarray(groups), return_inverse=True)
+    alpha = prior[0] + clicks
+    beta = prior[1] + impressions - clicks
+    total = alpha + beta
+    mean = alpha / total
+    var = alpha * beta / (total * total * (total + 1.0))
+
+    # Variantes triées par groupe puis par CTR a posteriori décroissant
+    order = np.lexsort((-mean, codes))
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sizes = np.diff(np.r_[starts, len(order)])
+    leader = order[starts]
+    runner_up = order[np.minimum(starts + 1, len(order) - 1)]
+
+    is_leader = np.zeros(len(mean), dtype=bool)
+    is_leader[leader] = True
+    reference = np.where(is_leader, runner_up[codes], leader[codes])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (mean - mean[reference]) / np.sqrt(var + var[reference])
+    probability = _normal_cdf(np.nan_to_num(z))
+
+    alone = sizes[codes] == 1
+    enough = (impressions >= min_impressions) & (impressions[reference] >= min_impressions)
+    decision = np.full(len(mean), "continue", dtype=object)
+    decision[~is_leader & enough & (probability < pause_below)] = "pause"
+    decision[is_leader & enough & (probability >= win_above)] = "winner"
+    decision[alone] = "alone"
+    probability[alone] = np.nan
+
+    half_width = 1.96 * np.sqrt(var)
+    return {
+        "posterior_ctr": mean * 100,
+        "ctr_low": np.clip(mean - half_width, 0.0, 1.0) * 100,
+        "ctr_high": np.clip(mean + half_width, 0.0, 1.0) * 100,
+        "prob_beats_reference": probability,
+        "is_leader": is_leader,
+        "decision": decision
+    }
+
+
+def evaluate_variants(insights: pd.DataFrame, group: str = "adset_id", variant: str = "ad_id",
+                      **kwargs) -> pd.DataFrame:
+    """Décision par variante à partir des totaux impressions / clics (une ligne par variante)"""
+    totals = insights.groupby([group, variant], observed=True, sort=False)[["impressions", "clicks"]].sum()
+    totals = totals.reset_index()
+    result = sequential_test(totals[group].to_numpy(), totals["impressions"].to_numpy(),
+                             totals["clicks"].to_numpy(), **kwargs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        totals["ctr"] = np.where(totals["impressions"] > 0, totals["clicks"] / totals["impressions"] * 100, 0.0)
+    for column, values in result.items():
+        totals[column] = values
+    return totals.sort_values([group, "posterior_ctr"], ascending=[True, False], ignore_index=True)
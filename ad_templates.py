@@ -0,0 +1,147 @@
+# ad_templates.py
+# Registre de templates (mots-clés et textes publicitaires) chargé une seule fois au démarrage
+
+import functools
+import json
+import os
+import string
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ad_templates.json")
+
+# Clé de repli : s'applique à tous les secteurs
+ANY_INDUSTRY = "*"
+DEFAULT_TONE = "Professionnel"
+DEFAULT_LANGUAGE = "fr"
+
+AD_COPY_FIELDS = ("headline", "primary", "description")
+
+# Variables disponibles dans les templates
+TEMPLATE_VARIABLES = {"product", "offer_end"}
+
+
+def _compile(template: str):
+    """Valide le template et renvoie son formateur (str.format_map lié, implémenté en C)"""
+    for _, field, _, _ in string.Formatter().parse(template):
+        if field is not None and field not in TEMPLATE_VARIABLES:
+            raise ValueError(f"Variable inconnue '{{{field}}}' dans le template: {template}")
+    return template.format_map
+
+
+class CompiledAdCopy:
+    """Triple titre / texte / description précompilé"""
+
+    __slots__ = ("headline", "primary", "description")
+
+    def __init__(self, headline: str, primary: str, description: str):
+        self.headline = _compile(headline)
+        self.primary = _compile(primary)
+        self.description = _compile(description)
+
+    def render(self, variables: Dict[str, str]) -> Dict[str, str]:
+        return {
+            "headline": self.headline(variables),
+            "primary": self.primary(variables),
+            "description": self.description(variables)
+        }
+
+
+class TemplateRegistry:
+    """Templates indexés par (secteur, ton, langue) pour une recherche en O(1)"""
+
+    def __init__(self):
+        self._keywords: Dict[Tuple[str, str], List[Any]] = {}
+        self._ad_copy: Dict[Tuple[str, str, str], CompiledAdCopy] = {}
+        # Titres / textes / descriptions alternatifs, combinés par le générateur de variantes A/B
+        self._variants: Dict[Tuple[str, str, str], Dict[str, List[Any]]] = {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TemplateRegistry":
+        registry = cls()
+        for industry, templates in data.get("keywords", {}).items():
+            registry.add_keywords(industry, templates)
+        for entry in data.get("ad_copy", []):
+            registry.add_ad_copy(entry.get("industry", ANY_INDUSTRY), entry["tone"],
+                                 entry.get("language", DEFAULT_LANGUAGE),
+                                 *(entry[field] for field in AD_COPY_FIELDS))
+        for entry in data.get("ad_copy_variants", []):
+            registry.add_ad_copy_variants(entry.get("industry", ANY_INDUSTRY), entry["tone"],
+                                          entry.get("language", DEFAULT_LANGUAGE),
+                                          {field: entry.get(field, []) for field in AD_COPY_FIELDS})
+        return registry
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_TEMPLATES_PATH) -> "TemplateRegistry":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def add_keywords(self, industry: str, templates: Iterable[str],
+                     language: str = DEFAULT_LANGUAGE) -> None:
+        self._keywords[(industry, language)] = [_compile(template) for template in templates]
+
+    def add_ad_copy(self, industry: str, tone: str, language: str,
+                    headline: str, primary: str, description: str) -> None:
+        self._ad_copy[(industry, tone, language)] = CompiledAdCopy(headline, primary, description)
+
+    def add_ad_copy_variants(self, industry: str, tone: str, language: str,
+                             parts: Dict[str, Iterable[str]]) -> None:
+        variants = self._variants.setdefault((industry, tone, language), {field: [] for field in AD_COPY_FIELDS})
+        for field in AD_COPY_FIELDS:
+            variants[field].extend(_compile(template) for template in parts.get(field, []))
+
+    def __len__(self) -> int:
+        return len(self._keywords) + len(self._ad_copy)
+
+    def tones(self, language: str = DEFAULT_LANGUAGE) -> List[str]:
+        return list(dict.fromkeys(tone for _, tone, lang in self._ad_copy if lang == language))
+
+    def keyword_templates(self, industry: str, language: str = DEFAULT_LANGUAGE) -> List[Any]:
+        templates = self._keywords.get((industry, language))
+        if templates is None:
+            templates = self._keywords[(ANY_INDUSTRY, language)]
+        return templates
+
+    def ad_copy_template(self, industry: str, tone: str,
+                         language: str = DEFAULT_LANGUAGE) -> CompiledAdCopy:
+        # Du plus spécifique au plus général : secteur + ton, tous secteurs + ton, ton par défaut
+        index = self._ad_copy
+        template = (index.get((industry, tone, language))
+                    or index.get((ANY_INDUSTRY, tone, language))
+                    or index.get((industry, DEFAULT_TONE, language))
+                    or index.get((ANY_INDUSTRY, DEFAULT_TONE, language)))
+        if template is None:
+            raise KeyError(f"Aucun template pour ({industry}, {tone}, {language})")
+        return template
+
+    def ad_copy_parts(self, industry: str, tone: str,
+                      language: str = DEFAULT_LANGUAGE) -> Dict[str, List[Any]]:
+        """Formateurs disponibles par champ : template principal, puis variantes du secteur et générales"""
+        template = self.ad_copy_template(industry, tone, language)
+        parts = {field: [getattr(template, field)] for field in AD_COPY_FIELDS}
+        for key in dict.fromkeys([(industry, tone, language), (ANY_INDUSTRY, tone, language)]):
+            for field, formatters in self._variants.get(key, {}).items():
+                parts[field].extend(formatters)
+        return parts
+
+    def render_keywords(self, product: str, industry: str,
+                        language: str = DEFAULT_LANGUAGE) -> List[str]:
+        variables = {"product": product}
+        return [render(variables) for render in self.keyword_templates(industry, language)]
+
+    def render_ad_copy(self, product: str, industry: str, tone: str,
+                       language: str = DEFAULT_LANGUAGE, offer_end: str = "") -> Dict[str, str]:
+        return self.ad_copy_template(industry, tone, language).render(
+            {"product": product, "offer_end": offer_end})
+
+    def render_ad_copy_many(self, products: Iterable[str], industry: str, tone: str,
+                            language: str = DEFAULT_LANGUAGE,
+                            offer_end: str = "") -> List[Dict[str, str]]:
+        """Rend un même template pour de nombreux produits (une seule recherche d'index)"""
+        template = self.ad_copy_template(industry, tone, language)
+        return [template.render({"product": product, "offer_end": offer_end}) for product in products]
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry(path: Optional[str] = None) -> TemplateRegistry:
+    """Registre partagé, chargé au premier appel puis réutilisé"""
+    return TemplateRegistry.load(path or DEFAULT_TEMPLATES_PATH)
@@ -0,0 +1,156 @@
+# ads_agent.py
+# Logique métier de l'agent IA Facebook Ads (indépendante de Streamlit)
+
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
+
+from ad_templates import get_registry
+from agent_cache import build_cache, memoize
+from instrumentation import timed
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Coefficients basés sur l'industrie
+INDUSTRY_MULTIPLIERS = {
+    "Santé/Médical": {"cpc": 2.5, "ctr": 1.8, "conversion": 0.12},
+    "Tourisme": {"cpc": 1.2, "ctr": 2.1, "conversion": 0.08},
+    "E-commerce": {"cpc": 0.8, "ctr": 1.5, "conversion": 0.15},
+    "Services": {"cpc": 1.5, "ctr": 1.3, "conversion": 0.10}
+}
+
+DEFAULT_MULTIPLIER = {"cpc": 1.0, "ctr": 1.0, "conversion": 0.10}
+
+# Centres d'intérêt et comportements proposés au ciblage (partagés avec le moteur d'audience)
+INDUSTRY_INTERESTS = {
+    "Santé/Médical": ["Santé et fitness", "Soins médicaux", "Bien-être"],
+    "Tourisme": ["Voyages", "Vacances", "Découverte"],
+    "E-commerce": ["Shopping en ligne", "Mode", "Technologie"],
+    "Services": ["Développement personnel", "Formation professionnelle"]
+}
+
+DEFAULT_INTERESTS = ["Intérêts généraux"]
+
+BEHAVIORS = ["Voyageurs fréquents", "Acheteurs en ligne", "Utilisateurs mobiles"]
+
+# Caches partagés par toutes les instances de l'agent
+KEYWORDS_CACHE = build_cache("keywords", maxsize=4096)
+AD_COPY_CACHE = build_cache("ad_copy", maxsize=4096, ttl=3600)
+TARGETING_CACHE = build_cache("targeting", maxsize=4096)
+
+
+def _ad_copy_ttl() -> float:
+    """Les textes contiennent une date : ils expirent au plus tard à minuit"""
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return min(3600.0, (midnight - now).total_seconds())
+
+
+class FacebookAdsAgent:
+    def __init__(self):
+        self.industries = {
+            "Santé/Médical": ["FIV", "Chirurgie esthétique", "Dentaire", "Ophtalmologie"],
+            "Tourisme": ["Voyage organisé", "Hôtellerie", "Restauration"],
+            "E-commerce": ["Mode", "Électronique", "Maison"],
+            "Services": ["Consulting", "Formation", "Coaching"]
+        }
+        
+        self.countries = {
+            "Afrique francophone": ["Maroc", "Algérie", "Tunisie", "Sénégal", "Côte d'Ivoire"],
+            "Europe": ["France", "Belgique", "Suisse", "Canada"],
+            "Moyen-Orient": ["Liban", "Émirats", "Qatar"]
+        }
+        
+        # Templates chargés une fois par processus depuis data/ad_templates.json
+        self.templates = get_registry()
+    
+    @timed("agent.generate_keywords")
+    @memoize(KEYWORDS_CACHE)
+    def generate_keywords(self, product: str, industry: str, target_region: str) -> List[str]:
+        """Génère des mots-clés intelligents basés sur l'industrie"""
+        return self.templates.render_keywords(product, industry)
+    
+    @timed("agent.expand_keywords")
+    def expand_keywords(self, product: str, industry: str, target_region: str,
+                        limit: int = 1000) -> Tuple[List[Tuple[str, float]], Dict[str, int]]:
+        """Élargit les mots-clés de base en combinaisons dédupliquées et notées (meilleures d'abord)"""
+        from keyword_expansion import expand_keywords
+        
+        seeds = self.generate_keywords(product, industry, target_region)
+        return expand_keywords(product, industry, self.countries.get(target_region, ["France"]), seeds, limit=limit)
+    
+    @timed("agent.generate_ad_copy")
+    @memoize(AD_COPY_CACHE, ttl=_ad_copy_ttl)
+    def generate_ad_copy(self, product: str, target: str, industry: str, tone: str) -> Dict[str, str]:
+        """Génère différentes versions de textes publicitaires"""
+        offer_end = (datetime.now() + timedelta(days=7)).strftime('%d/%m/%Y')
+        return self.templates.render_ad_copy(product, industry, tone, offer_end=offer_end)
+    
+    @timed("agent.generate_ad_variants")
+    def generate_ad_variants(self, product: str, industry: str, tones: Optional[List[str]] = None,
+                             limit: Optional[int] = None) -> "pd.DataFrame":
+        """Variantes A/B (titre × texte × description × ton) dédupliquées, classées par CTR prédit"""
+        from ab_testing import generate_variants
+        
+        offer_end = (datetime.now() + timedelta(days=7)).strftime('%d/%m/%Y')
+        return generate_variants(self.templates, product, industry, tones or self.templates.tones(),
+                                 offer_end=offer_end, limit=limit)
+    
+    @timed("agent.generate_audience_targeting")
+    @memoize(TARGETING_CACHE)
+    def generate_audience_targeting(self, industry: str, target_region: str, age_range: str) -> Dict[str, Any]:
+        """Génère des recommandations de ciblage précises"""
+        targeting = {
+            "demographics": {
+                "age_range": age_range,
+                "countries": self.countries.get(target_region, ["France"]),
+                "languages": ["Français", "Arabe"] if "Afrique" in target_region else ["Français"]
+            },
+            "interests": list(INDUSTRY_INTERESTS.get(industry, DEFAULT_INTERESTS)),
+            "behaviors": list(BEHAVIORS),
+            "exclusions": ["Concurrents", "Employés du secteur"]
+        }
+        
+        return targeting
+    
+    @timed("agent.estimate_audience_size")
+    def estimate_audience_size(self, targeting: Dict[str, Any]) -> int:
+        """Nombre de personnes estimé pour un ciblage (population synthétique locale, aucun appel API)"""
+        from audience_engine import get_audience_index, segment_from_targeting
+        
+        return int(get_audience_index().reach([segment_from_targeting(targeting)])[0])
+    
+    @timed("agent.estimate_performance")
+    def estimate_performance(self, budget: int, industry: str) -> Dict[str, Any]:
+        """Estime les performances de la campagne"""
+        multiplier = INDUSTRY_MULTIPLIERS.get(industry, DEFAULT_MULTIPLIER)
+        
+        estimated_cpc = round(0.50 * multiplier["cpc"], 2)
+        estimated_clicks = int(budget / estimated_cpc)
+        estimated_ctr = round(multiplier["ctr"], 2)
+        estimated_impressions = int(estimated_clicks / (estimated_ctr / 100))
+        estimated_conversions = int(estimated_clicks * multiplier["conversion"])
+        
+        return {
+            "impressions": estimated_impressions,
+            "clicks": estimated_clicks,
+            "ctr": estimated_ctr,
+            "cpc": estimated_cpc,
+            "conversions": estimated_conversions,
+            "cost_per_conversion": round(budget / max(estimated_conversions, 1), 2)
+        }
+    
+    @timed("agent.estimate_performance_batch")
+    def estimate_performance_batch(self, scenarios: "pd.DataFrame") -> "pd.DataFrame":
+        """Estime les performances de nombreux scénarios en une seule passe vectorisée"""
+        from campaign_estimator import estimate_frame
+        
+        return estimate_frame(scenarios)
+    
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Compteurs de succès/échecs des caches de génération"""
+        return {
+            "keywords": KEYWORDS_CACHE.stats(),
+            "ad_copy": AD_COPY_CACHE.stats(),
+            "targeting": TARGETING_CACHE.stats()
+        }
@@ -0,0 +1,292 @@
+# agent_cache.py
+# Cache de mémoïsation (LRU + TTL) pour les résultats déterministes de l'agent
+
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+# Chemin du cache disque partagé entre les workers Streamlit (désactivé si absent)
+CACHE_PATH_ENV = "ADS_AGENT_CACHE_PATH"
+# Stockage partagé (voir shared_store.py), prioritaire sur le cache disque s'il est défini
+SHARED_STORE_ENV = "ADS_SHARED_STORE"
+
+# Cache disque : entrées expirées purgées toutes les N écritures, entrées les plus anciennes au-delà du plafond
+PURGE_EVERY = 500
+DISK_MAX_ENTRIES = 100_000
+
+_MISSING = object()
+
+Ttl = Union[None, float, Callable[[], float]]
+
+
+class TTLLRUCache:
+    """Cache mémoire borné : éviction LRU et expiration des entrées après `ttl` secondes"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class SQLiteCache:
+    """Cache disque partagé entre processus (une table par fichier, un espace de noms par cache)"""
+
+    def __init__(self, path: str, namespace: str, ttl: Optional[float] = None,
+                 max_entries: int = DISK_MAX_ENTRIES):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Une connexion par thread : sqlite3 interdit le partage entre threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, key: Hashable) -> Tuple[Any, Optional[float]]:
+        """Valeur et expiration absolue (horloge murale), ou (_MISSING, None)"""
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, repr(key))
+        ).fetchone()
+        # Horloge murale : les expirations doivent être comparables entre processus
+        if row is not None and (row[1] is None or row[1] > time.time()):
+            self.hits += 1
+            return json.loads(row[0]), row[1]
+        self.misses += 1
+        return _MISSING, None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value, _ = self.lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, repr(key), json.dumps(value, ensure_ascii=False), expires_at)
+            )
+            with self._writes_lock:
+                self._writes += 1
+                due = self._writes % PURGE_EVERY == 0
+            if due:
+                self._purge(conn)
+
+    def _purge(self, conn: sqlite3.Connection) -> None:
+        """Supprime les entrées expirées puis, au-delà de max_entries, les plus anciennement écrites"""
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        # INSERT OR REPLACE attribue un nouveau rowid : l'ordre des rowid est celui des écritures
+        conn.execute(
+            "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache WHERE namespace = ? "
+            "ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.max_entries)
+        )
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class SharedStoreCache:
+    """Cache partagé entre workers et machines, dans le stockage partagé (SQLite ou Redis)"""
+
+    def __init__(self, store, namespace: str, ttl: Optional[float] = None):
+        self.store = store
+        # Entrées [valeur, expiration absolue] (format v2, les anciennes valeurs nues sont ignorées)
+        self.namespace = f"cache:v2:{namespace}"
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Hashable) -> Tuple[Any, Optional[float]]:
+        """Valeur et expiration absolue (horloge murale), ou (_MISSING, None)"""
+        entry = self.store.get(self.namespace, repr(key))
+        if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+            self.misses += 1
+            return _MISSING, None
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value, _ = self.lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        self.store.set(self.namespace, repr(key), [value, expires_at], ttl)
+
+    def clear(self) -> None:
+        self.store.clear(self.namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class TieredCache:
+    """Cache mémoire devant un cache disque partagé"""
+
+    def __init__(self, memory: TTLLRUCache, disk: Union[SQLiteCache, SharedStoreCache]):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.memory.get(key, _MISSING)
+        if value is _MISSING:
+            value, expires_at = self.disk.lookup(key)
+            if value is _MISSING:
+                return default
+            # Durée restante de l'entrée disque (ex. textes expirant à minuit), pas le TTL par défaut
+            remaining = None if expires_at is None else expires_at - time.time()
+            if remaining is not None and remaining <= 0:
+                return default
+            self.memory.set(key, value, remaining)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.memory.set(key, value, ttl)
+        self.disk.set(key, value, ttl)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.memory.stats(), "disk": self.disk.stats()}
+
+
+def build_cache(name: str, maxsize: int = 1024, ttl: Optional[float] = None):
+    """Cache mémoire seul, ou mémoire + stockage partagé (ADS_SHARED_STORE) ou disque (ADS_AGENT_CACHE_PATH)"""
+    memory = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+    if os.environ.get(SHARED_STORE_ENV):
+        from shared_store import get_shared_store
+
+        return TieredCache(memory, SharedStoreCache(get_shared_store(), namespace=name, ttl=ttl))
+    path = os.environ.get(CACHE_PATH_ENV)
+    if not path:
+        return memory
+    return TieredCache(memory, SQLiteCache(path, namespace=name, ttl=ttl))
+
+
+def normalize(value: Any) -> Any:
+    """Normalise une entrée pour la clé de cache (espaces superflus, forme Unicode)"""
+    if isinstance(value, str):
+        return unicodedata.normalize("NFC", " ".join(value.split()))
+    return value
+
+
+def memoize(cache, ttl: Ttl = None) -> Callable:
+    """Mémoïse une méthode de l'agent sur ses arguments normalisés (self est ignoré)
+
+    `ttl` peut être une fonction pour calculer l'expiration au moment de l'écriture.
+    Les valeurs mises en cache sont partagées : elles ne doivent pas être modifiées.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        n_args = len(signature.parameters) - 1
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if kwargs or len(args) != n_args:
+                # Chemin lent : arguments nommés ou valeurs par défaut
+                bound = signature.bind(self, *args, **kwargs)
+                bound.apply_defaults()
+                args = tuple(bound.arguments.values())[1:]
+            key = tuple(normalize(value) for value in args)
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                # Calcul sur les entrées normalisées : le résultat ne dépend que de la clé
+                value = func(self, *key)
+                cache.set(key, value, ttl() if callable(ttl) else ttl)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,220 @@
+# anomaly_detection.py
+# Détection d'anomalies sur les séries quotidiennes des campagnes (pic de CPC, chute du CTR,
+# dérive du rythme de dépense) : z-score robuste glissant, limites EWMA et référence par jour de semaine
+
+import threading
+import warnings
+from datetime import timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from kpi_rollups import METRICS, KpiRollup
+
+# Sens surveillé par série : +1 hausse, -1 baisse, 0 les deux
+DIRECTIONS = {"cpc": 1, "ctr": -1, "spend": 0}
+
+ALERT_LABELS = {
+    ("cpc", 1): "📈 Pic de CPC",
+    ("ctr", -1): "📉 Chute du CTR",
+    ("spend", 1): "💸 Dépense au-dessus du rythme",
+    ("spend", -1): "🐢 Dépense en dessous du rythme"
+}
+
+# En dessous de ces volumes, CPC et CTR du jour sont trop bruités pour être jugés
+MIN_CLICKS = 20
+MIN_IMPRESSIONS = 1000
+
+WINDOW_DAYS = 28
+SEASONAL_WEEKS = 6
+LOOKBACK_DAYS = 7
+ROBUST_THRESHOLD = 3.5
+SEASONAL_THRESHOLD = 3.0
+EWMA_THRESHOLD = 3.0
+EWMA_LAMBDA = 0.2
+# Dispersion minimale relative (séries presque constantes : un MAD nul rendrait tout anormal)
+MIN_RELATIVE_SPREAD = 0.05
+
+_MAD_SCALE = 1.4826
+
+
+def derived_series(daily: np.ndarray) -> Dict[str, np.ndarray]:
+    """Séries [campagne, jour] de CPC, CTR (%) et dépense ; NaN quand le volume est insuffisant"""
+    impressions, clicks, spend = (daily[..., METRICS.index(metric)] for metric in ("impressions", "clicks", "spend"))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "cpc": np.where(clicks >= MIN_CLICKS, spend / clicks, np.nan),
+            "ctr": np.where(impressions >= MIN_IMPRESSIONS, clicks / impressions * 100, np.nan),
+            "spend": spend.astype(float)
+        }
+
+
+def _robust_z(values: np.ndarray, reference: np.ndarray):
+    """z-score de `values` [C, T] par rapport à `reference` [C, T, n] (médiane et MAD)"""
+    with warnings.catch_warnings():
+        # Fenêtre sans aucune valeur : NaN voulu (pas d'historique), sans avertissement
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(reference, axis=-1)
+        mad = np.nanmedian(np.abs(reference - median[..., None]), axis=-1)
+    spread = np.maximum(_MAD_SCALE * mad, MIN_RELATIVE_SPREAD * np.abs(median))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (values - median) / spread, median
+
+
+def rolling_robust_z(series: np.ndarray, days: np.ndarray, window: int = WINDOW_DAYS):
+    """z robuste des jours `days` par rapport aux `window` jours précédents (NaN sans historique)"""
+    padded = np.concatenate([np.full((series.shape[0], window), np.nan), series], axis=1)
+    windows = sliding_window_view(padded, window, axis=1)[:, days]
+    return _robust_z(series[:, days], windows)
+
+
+def seasonal_robust_z(series: np.ndarray, days: np.ndarray, weeks: int = SEASONAL_WEEKS):
+    """z robuste par rapport aux mêmes jours de semaine des `weeks` semaines précédentes"""
+    lags = days[:, None] - 7 * np.arange(1, weeks + 1)
+    reference = np.where(lags >= 0, series[:, np.maximum(lags, 0)], np.nan)
+    return _robust_z(series[:, days], reference)
+
+
+def _pad_state(state: Optional[tuple], n_series: int) -> Optional[tuple]:
+    # Campagnes apparues depuis le dernier repli : état vide
+    if state is None or len(state[0]) >= n_series:
+        return state
+    return tuple(np.r_[array, np.full(n_series - len(array), np.nan)] for array in state)
+
+
+def ewma_state(series: np.ndarray, lam: float = EWMA_LAMBDA,
+               state: Optional[tuple] = None):
+    """Moyenne et variance exponentielles après les jours de `series` (les NaN sont ignorés)
+
+    Renvoie aussi l'écart de chaque jour à la prévision de la veille, en nombre d'écarts-types.
+    """
+    n_series, n_days = series.shape
+    if state is None:
+        mean = np.full(n_series, np.nan)
+        var = np.full(n_series, np.nan)
+    else:
+        mean, var = (array.copy() for array in state)
+    z = np.full(series.shape, np.nan)
+    for day in range(n_days):
+        x = series[:, day]
+        observed = ~np.isnan(x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spread = np.maximum(np.sqrt(var), MIN_RELATIVE_SPREAD * np.abs(mean))
+            z[:, day] = (x - mean) / spread
+        first = observed & np.isnan(mean)
+        mean[first], var[first] = x[first], 0.0
+        update = observed & ~first
+        diff = x[update] - mean[update]
+        mean[update] += lam * diff
+        var[update] = (1 - lam) * (var[update] + lam * diff * diff)
+    return (mean, var), z
+
+
+class AnomalyDetector:
+    """Alertes des derniers jours pour toutes les campagnes d'un KpiRollup
+
+    L'état EWMA est replié jour après jour : une mise à jour ne traite que les jours reçus
+    depuis l'appel précédent, sauf si des jours déjà repliés ont été modifiés (tout est rejoué).
+    """
+
+    def __init__(self, window: int = WINDOW_DAYS, seasonal_weeks: int = SEASONAL_WEEKS,
+                 lookback: int = LOOKBACK_DAYS):
+        self.window = window
+        self.seasonal_weeks = seasonal_weeks
+        self.lookback = lookback
+        self._lock = threading.Lock()
+        self._origin = None
+        self._folded_days = 0
+        self._folded_version = 0
+        self._state: Dict[str, tuple] = {}
+        # Dernier résultat : réutilisé tant que les agrégats n'ont pas changé
+        self._last_key = None
+        self._last_alerts = None
+        self.full_rebuilds = 0
+        self.folded_updates = 0
+
+    def _fold(self, rollup: KpiRollup, until: int) -> None:
+        """Replie dans l'état EWMA les jours [déjà repliés, until)"""
+        origin = rollup.date_range[0]
+        stale = (self._origin != origin or (self._folded_days and rollup.period_version(
+            origin, origin + timedelta(days=self._folded_days - 1)) > self._folded_version))
+        if stale:
+            self._state, self._folded_days, self._origin = {}, 0, origin
+            self.full_rebuilds += 1
+        if until > self._folded_days:
+            daily = rollup.daily_matrix(origin + timedelta(days=self._folded_days),
+                                        origin + timedelta(days=until - 1))
+            for name, series in derived_series(daily).items():
+                self._state[name], _ = ewma_state(series, state=_pad_state(self._state.get(name), len(series)))
+            self._folded_days = until
+            self.folded_updates += 1
+        self._folded_version = rollup.version
+
+    def update(self, rollup: KpiRollup, exclude_last_day: bool = False) -> pd.DataFrame:
+        """Alertes des `lookback` derniers jours (sans le dernier s'il est encore incomplet)"""
+        with self._lock:
+            if rollup.date_range is None:
+                return _empty_alerts()
+            key = (id(rollup), rollup.version, exclude_last_day)
+            if key == self._last_key:
+                return self._last_alerts
+            self._last_key, self._last_alerts = key, self._detect(rollup, exclude_last_day)
+            return self._last_alerts
+
+    def _detect(self, rollup: KpiRollup, exclude_last_day: bool) -> pd.DataFrame:
+        origin, last = rollup.date_range
+        n_days = (last - origin).days + 1 - int(exclude_last_day)
+        first = max(n_days - self.lookback, 0)
+        self._fold(rollup, first)
+        history = max(self.window, 7 * self.seasonal_weeks)
+        start = max(first - history, 0)
+        daily = rollup.daily_matrix(origin + timedelta(days=start), origin + timedelta(days=n_days - 1))
+        days = np.arange(first - start, n_days - start)
+        campaigns = np.array(rollup.campaigns[:daily.shape[0]], dtype=object)
+
+        alerts = []
+        for name, series in derived_series(daily).items():
+            robust_z, median = rolling_robust_z(series, days, self.window)
+            seasonal_z, baseline = seasonal_robust_z(series, days, self.seasonal_weeks)
+            _, ewma_z = ewma_state(series[:, days], state=_pad_state(self._state.get(name), len(series)))
+            alerts.append(self._alerts(name, campaigns, origin + timedelta(days=first), series[:, days],
+                                       np.where(np.isnan(baseline), median, baseline),
+                                       robust_z, seasonal_z, ewma_z))
+        alerts = [frame for frame in alerts if not frame.empty]
+        if not alerts:
+            return _empty_alerts()
+        return pd.concat(alerts, ignore_index=True).sort_values("severity", ascending=False,
+                                                                 ignore_index=True)
+
+    @staticmethod
+    def _alerts(name, campaigns, first_date, values, expected, robust_z, seasonal_z, ewma_z) -> pd.DataFrame:
+        # Deux détecteurs doivent concorder : le z robuste glissant, et la référence saisonnière ou l'EWMA
+        direction = DIRECTIONS[name]
+        signs = [direction] if direction else [1, -1]
+        frames = []
+        for sign in signs:
+            with np.errstate(invalid="ignore"):
+                flagged = (sign * robust_z > ROBUST_THRESHOLD) & (
+                    (sign * seasonal_z > SEASONAL_THRESHOLD) | (sign * ewma_z > EWMA_THRESHOLD))
+            rows, days = np.nonzero(flagged)
+            if len(rows):
+                frames.append(pd.DataFrame({
+                    "campaign_id": campaigns[rows],
+                    "date": pd.to_datetime(first_date) + pd.to_timedelta(days, unit="D"),
+                    "metric": name,
+                    "alert": ALERT_LABELS[(name, sign)],
+                    "value": values[rows, days],
+                    "expected": expected[rows, days],
+                    "robust_z": robust_z[rows, days],
+                    "seasonal_z": seasonal_z[rows, days],
+                    "ewma_z": ewma_z[rows, days],
+                    "severity": np.abs(robust_z[rows, days])
+                }))
+        return pd.concat(frames, ignore_index=True) if frames else _empty_alerts()
+
+
+def _empty_alerts() -> pd.DataFrame:
+    return pd.DataFrame(columns=["campaign_id", "date", "metric", "alert", "value", "expected",
+                                 "robust_z", "seasonal_z", "ewma_z", "severity"])
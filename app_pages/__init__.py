@@ -0,0 +1,82 @@
+# app_pages/__init__.py
+# Pages de l'application : chaque module est importé seulement lorsque sa page est affichée
+
+import threading
+from typing import Any, Dict
+
+import streamlit as st
+
+import instrumentation
+
+# Libellé de navigation → module de la page (doit exposer render(agent))
+PAGES = {
+    "Créer une campagne": "app_pages.campaign_builder",
+    "Génération en masse": "app_pages.bulk_campaigns",
+    "Analyser les performances": "app_pages.analytics",
+    "Bibliothèque de templates": "app_pages.template_library"
+}
+
+# Pages absentes de la navigation par défaut (affichées avec ?diagnostics=1 ou l'instrumentation active)
+HIDDEN_PAGES = {
+    "Diagnostics": "app_pages.diagnostics"
+}
+
+# Paramètre d'URL portant l'identifiant de la campagne en cours (reprise après reconnexion)
+CAMPAIGN_PARAM = "campaign"
+
+_lock = threading.Lock()
+_import_ms: Dict[str, float] = {}
+
+
+def navigation(show_hidden: bool = False) -> Dict[str, str]:
+    return {**PAGES, **HIDDEN_PAGES} if show_hidden else PAGES
+
+
+def record_import(page: str, duration_ms: float) -> None:
+    """Durée du premier import d'une page dans ce processus"""
+    with _lock:
+        _import_ms.setdefault(page, duration_ms)
+
+
+def record_rerun(page: str, duration_ms: float) -> None:
+    # Toujours enregistré (une mesure par exécution), même instrumentation désactivée
+    instrumentation.observe(f"rerun/{page}", duration_ms / 1e3)
+
+
+def timings(page: str) -> Dict[str, float]:
+    """Import initial, dernière exécution et médiane des exécutions récentes (ms)"""
+    reruns = instrumentation.histogram(f"rerun/{page}")
+    return {
+        "import_ms": _import_ms.get(page, 0.0),
+        "last_rerun_ms": reruns.last() * 1e3,
+        "median_rerun_ms": reruns.percentiles(0.5)[0] * 1e3,
+        "reruns": reruns.count
+    }
+
+
+def import_timings() -> Dict[str, float]:
+    with _lock:
+        return dict(_import_ms)
+
+
+def remember_campaign(campaign_data: Dict[str, Any]) -> None:
+    """Campagne en cours : gardée dans la session et enregistrée dans le stockage partagé"""
+    from shared_store import get_shared_store, save_campaign
+
+    st.session_state.campaign_data = campaign_data
+    st.query_params[CAMPAIGN_PARAM] = save_campaign(get_shared_store(), campaign_data)
+
+
+def restore_campaign() -> None:
+    """Nouvelle session (reconnexion, autre worker) : reprend la campagne désignée par l'URL"""
+    campaign_id = st.query_params.get(CAMPAIGN_PARAM)
+    if not campaign_id or "campaign_data" in st.session_state:
+        return
+    from shared_store import get_shared_store, load_campaign
+
+    # Les champs ne sont lus qu'à l'affichage
+    campaign_data = load_campaign(get_shared_store(), campaign_id)
+    if campaign_data is None:
+        del st.query_params[CAMPAIGN_PARAM]
+    else:
+        st.session_state.campaign_data = campaign_data
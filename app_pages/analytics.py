@@ -0,0 +1,191 @@
+# app_pages/analytics.py
+# Page « Analyser les performances »
+
+import streamlit as st
+
+from app_pages.metrics_resources import get_demo_feed, get_ingestion, get_kpi_rollup, get_metrics_store
+from chart_pipeline import cached_line_figure
+from instrumentation import section
+from kpi_rollups import FREQUENCIES
+
+# Rafraîchissement du tableau de bord en mode direct (secondes)
+LIVE_REFRESH_SECONDS = 2
+
+# Noms des colonnes du store → libellés du tableau de bord
+METRIC_LABELS = {'date': 'Date', 'impressions': 'Impressions', 'clicks': 'Clics',
+                 'conversions': 'Conversions', 'spend': 'Coût'}
+
+
+@st.cache_resource
+def get_anomaly_detector():
+    from anomaly_detection import AnomalyDetector
+    
+    return AnomalyDetector()
+
+
+@st.cache_data(max_entries=16)
+def load_ad_totals(version, start_date, end_date):
+    # Recalculé quand les données changent (version des agrégats) ou que la période change
+    return get_metrics_store().ad_totals(start_date, end_date, ['impressions', 'clicks'])
+
+
+def render_ab_tests(ad_totals):
+    """Décision par variante : les ad sets à plusieurs publicités sont des tests A/B"""
+    import pandas as pd
+    from ab_testing import DECISION_LABELS, MIN_IMPRESSIONS, PAUSE_BELOW, WIN_ABOVE, evaluate_variants
+    
+    uploaded = st.file_uploader("Statistiques de variantes (CSV : adset_id, ad_id, impressions, clicks)",
+                                type="csv", key="ab_insights")
+    if uploaded is not None:
+        ad_totals = pd.read_csv(uploaded, dtype={'adset_id': str, 'ad_id': str})
+    
+    with section("analytics.ab_tests"):
+        results = evaluate_variants(ad_totals)
+    results = results[results['decision'] != 'alone']
+    if results.empty:
+        st.info("Aucun ad set ne compte plusieurs variantes sur la période.")
+        return
+    
+    counts = results['decision'].value_counts()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Variantes testées", f"{len(results):,}")
+    col2.metric("À mettre en pause", f"{counts.get('pause', 0):,}")
+    col3.metric("Gagnantes", f"{counts.get('winner', 0):,}")
+    st.caption(f"Test bayésien bêta-binomial : pause si P(meilleure que la variante de tête) < {PAUSE_BELOW:.0%}, "
+               f"gagnante si P(meilleure que la deuxième) ≥ {WIN_ABOVE:.0%}, après {MIN_IMPRESSIONS:,} impressions.")
+    st.dataframe(pd.DataFrame({
+        'Ad set': results['adset_id'], 'Publicité': results['ad_id'], 'Impressions': results['impressions'],
+        'CTR (%)': results['ctr'].round(2),
+        'CTR a posteriori (%)': results['posterior_ctr'].round(2),
+        'Intervalle 95 %': [f"{low:.2f} – {high:.2f}" for low, high in zip(results['ctr_low'], results['ctr_high'])],
+        'P(meilleure)': results['prob_beats_reference'].round(3),
+        'Décision': results['decision'].map(DECISION_LABELS)
+    }).head(1000), use_container_width=True, hide_index=True, height=350)
+    paused = results.loc[results['decision'] == 'pause', ['adset_id', 'ad_id']]
+    st.download_button("⬇️ Publicités à mettre en pause (CSV)", data=paused.to_csv(index=False),
+                       file_name="variantes_a_mettre_en_pause.csv", mime="text/csv", disabled=paused.empty)
+
+
+def render_alerts(kpi_rollup, live):
+    """Anomalies des derniers jours, toutes campagnes confondues"""
+    from anomaly_detection import LOOKBACK_DAYS
+    
+    st.subheader("🚨 Alertes")
+    with section("analytics.anomalies"):
+        # En direct, la journée en cours est incomplète : elle n'est pas encore jugée
+        alerts = get_anomaly_detector().update(kpi_rollup, exclude_last_day=live)
+    
+    if alerts.empty:
+        st.success(f"✅ Aucune anomalie détectée sur les {LOOKBACK_DAYS} derniers jours")
+        return
+    
+    st.warning(f"{len(alerts)} anomalie(s) sur les {LOOKBACK_DAYS} derniers jours "
+               f"(CPC, CTR et rythme de dépense comparés à l'historique de chaque campagne)")
+    table = alerts[['alert', 'campaign_id', 'date', 'value', 'expected', 'severity']].rename(columns={
+        'alert': 'Alerte', 'campaign_id': 'Campagne', 'date': 'Date', 'value': 'Valeur',
+        'expected': 'Attendu', 'severity': 'Écart (z)'})
+    st.dataframe(table, hide_index=True, use_container_width=True,
+                 column_config={'Date': st.column_config.DateColumn(format="DD/MM/YYYY"),
+                                'Valeur': st.column_config.NumberColumn(format="%.2f"),
+                                'Attendu': st.column_config.NumberColumn(format="%.2f"),
+                                'Écart (z)': st.column_config.NumberColumn(format="%.1f")})
+
+
+def format_delta(delta):
+    return f"{delta:+.1f}%" if delta is not None else None
+
+
+def render_dashboard(kpi_rollup, pipeline, start_date, end_date, freq, follow_latest, live=False):
+    """Graphiques et KPIs ; en direct, seul ce fragment est réexécuté à chaque rafraîchissement"""
+    if follow_latest:
+        # La période se prolonge avec les journées reçues depuis l'affichage de la page
+        end_date = max(end_date, kpi_rollup.date_range[1])
+    
+    def load_performance_data():
+        return kpi_rollup.series(start_date, end_date, freq).rename(columns=METRIC_LABELS)
+    
+    # Graphiques de performance, reconstruits seulement si un jour de la période a changé
+    period_version = kpi_rollup.period_version(start_date, end_date)
+    col1, col2 = st.columns(2)
+    
+    for column, metric, title in [(col1, 'Impressions', 'Évolution des impressions'),
+                                  (col2, 'Conversions', 'Évolution des conversions')]:
+        with column:
+            with section("analytics.chart"):
+                figure, chart_stats = cached_line_figure(
+                    (id(kpi_rollup), period_version, start_date, end_date, freq, metric), load_performance_data,
+                    x='Date', y=metric, title=title)
+            st.plotly_chart(figure, use_container_width=True)
+            st.caption(f"{chart_stats['points']:,} / {chart_stats['input_points']:,} points affichés · "
+                       f"{chart_stats['payload_bytes'] / 1024:.0f} Ko · construit en {chart_stats['build_ms']:.0f} ms"
+                       + (" · WebGL" if chart_stats['webgl'] else ""))
+    
+    # Tableau de bord des KPIs
+    st.subheader("🎯 KPIs principaux")
+    
+    with section("analytics.kpis"):
+        totals = kpi_rollup.totals(start_date, end_date)
+        deltas = kpi_rollup.period_over_period(start_date, end_date)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Impressions totales", f"{totals['impressions']:,.0f}", delta=format_delta(deltas['impressions']))
+    with col2:
+        st.metric("Clics totaux", f"{totals['clicks']:,.0f}", delta=format_delta(deltas['clicks']))
+    with col3:
+        st.metric("Conversions", f"{totals['conversions']:,.0f}", delta=format_delta(deltas['conversions']))
+    with col4:
+        st.metric("Coût total", f"{totals['spend']:.0f}€", delta=format_delta(deltas['spend']),
+                  delta_color="inverse")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("CTR", f"{totals['ctr']:.2f}%", delta=format_delta(deltas['ctr']))
+    with col2:
+        st.metric("CPC", f"{totals['cpc']:.2f}€", delta=format_delta(deltas['cpc']), delta_color="inverse")
+    with col3:
+        st.metric("CPA", f"{totals['cpa']:.2f}€", delta=format_delta(deltas['cpa']), delta_color="inverse")
+    with col4:
+        st.caption("Variations calculées par rapport à la période précédente de même durée")
+    
+    render_alerts(kpi_rollup, live)
+    
+    stats = pipeline.stats()
+    st.caption(f"📥 Ingestion : {stats['applied_rows']:,} lignes reçues · {stats['pending']} lot(s) en attente · "
+               f"fraîcheur p95 {stats['freshness_p95_ms']:.0f} ms · {stats['rejected']} lot(s) refusés · "
+               f"données jusqu'au {end_date:%d/%m/%Y}")
+
+
+def render(agent):
+    st.markdown('<h2 class="section-header">📊 Analyse des performances</h2>', unsafe_allow_html=True)
+    
+    # Agrégats pré-calculés à partir du store colonnaire, tenus à jour par l'ingestion continue
+    kpi_rollup = get_kpi_rollup()
+    pipeline = get_ingestion()
+    feed = get_demo_feed()
+    live = st.toggle("🔴 Flux en direct (démonstration)", value=feed.running,
+                     help="Relevés horaires simulés injectés dans le journal d'ingestion")
+    if live and not feed.running:
+        feed.start()
+    elif not live and feed.running:
+        feed.stop()
+    
+    bounds = kpi_rollup.date_range
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        period = st.date_input("📅 Période analysée", value=bounds,
+                               min_value=bounds[0], max_value=bounds[1])
+    with col2:
+        freq = st.radio("Granularité", list(FREQUENCIES), format_func=FREQUENCIES.get, horizontal=True)
+    # Pendant la sélection, le widget ne renvoie qu'une seule date
+    start_date, end_date = period if len(period) == 2 else bounds
+    
+    dashboard = st.fragment(run_every=LIVE_REFRESH_SECONDS if live else None)(render_dashboard)
+    dashboard(kpi_rollup, pipeline, start_date, end_date, freq, follow_latest=end_date == bounds[1], live=live)
+    
+    # Tests A/B : variantes (publicités) d'un même ad set
+    st.subheader("🧪 Tests A/B")
+    with st.expander("Variantes à arrêter ou à conserver", expanded=False):
+        render_ab_tests(load_ad_totals(kpi_rollup.period_version(start_date, end_date), start_date, end_date))
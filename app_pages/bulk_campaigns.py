@@ -0,0 +1,92 @@
+# app_pages/bulk_campaigns.py
+# Page « Génération en masse »
+
+import os
+import tempfile
+
+import streamlit as st
+
+from bulk_generation import OPTIONAL_DEFAULTS, REQUIRED_COLUMNS, write_bulk_csv
+
+# Ad sets comparés deux à deux (premières lignes du fichier généré)
+MAX_OVERLAP_CAMPAIGNS = 500
+
+
+def render(agent):
+    st.markdown('<h2 class="section-header">📦 Génération de campagnes en masse</h2>', unsafe_allow_html=True)
+    
+    st.write("Importez un fichier CSV ou Parquet avec les colonnes "
+             f"**{', '.join(REQUIRED_COLUMNS)}** (facultatif : {', '.join(OPTIONAL_DEFAULTS)}).")
+    
+    uploaded_file = st.file_uploader("📁 Fichier de campagnes", type=["csv", "parquet"])
+    
+    if uploaded_file is not None and st.button("🚀 Générer toutes les campagnes", use_container_width=True):
+        output_path = os.path.join(tempfile.gettempdir(), f"campagnes_{uploaded_file.file_id}.csv")
+        status_text = st.empty()
+        stats = None
+        try:
+            for stats in write_bulk_csv(uploaded_file, output_path, agent=agent):
+                status_text.text(f"⚙️ {stats['rows']:,} lignes traitées — {stats['rows_per_second']:,.0f} lignes/s")
+        except ValueError as error:
+            st.error(f"⚠️ {error}")
+        else:
+            if stats is None:
+                st.warning("Le fichier importé est vide")
+            else:
+                status_text.success(f"✅ {stats['rows']:,} campagnes générées en {stats['elapsed']:.1f}s "
+                                    f"({stats['rows_per_second']:,.0f} lignes/s)")
+                if stats['invalid_rows']:
+                    st.warning(f"⚠️ {stats['invalid_rows']:,} ligne(s) rejetée(s) (budget invalide ou champ obligatoire "
+                               "vide) : motif indiqué dans la colonne « error » du fichier")
+                st.session_state.bulk_output_path = output_path
+    
+    if 'bulk_output_path' in st.session_state and os.path.exists(st.session_state.bulk_output_path):
+        with open(st.session_state.bulk_output_path, "rb") as output_file:
+            st.download_button("⬇️ Télécharger les campagnes (CSV)", data=output_file,
+                               file_name="campagnes_generees.csv", mime="text/csv",
+                               use_container_width=True)
+        
+        if st.button("🧩 Détecter les ad sets en concurrence", use_container_width=True):
+            render_overlaps(agent, st.session_state.bulk_output_path)
+
+
+def render_overlaps(agent, output_path):
+    """Chevauchement des audiences générées, estimé localement pour toutes les paires"""
+    import pandas as pd
+    from audience_engine import DEFAULT_OVERLAP_THRESHOLD, get_audience_index, parse_age_range, segment_from_targeting
+    
+    campaigns = pd.read_csv(output_path, usecols=['campaign_name', 'product', 'industry', 'target_region', 'age_range',
+                                                  'error'],
+                            nrows=MAX_OVERLAP_CAMPAIGNS, dtype=str).fillna('')
+    # Lignes rejetées à la génération : aucun ciblage à comparer
+    campaigns = campaigns[campaigns['error'] == '']
+
+    def is_valid_age_range(age_range):
+        try:
+            parse_age_range(age_range)
+        except ValueError:
+            return False
+        return True
+
+    # Une tranche d'âge mal saisie ne doit pas empêcher l'analyse des autres lignes
+    valid = campaigns['age_range'].map(is_valid_age_range)
+    if not valid.all():
+        invalid = [f"ligne {i + 1} ({age or 'vide'})" for i, age in campaigns.loc[~valid, 'age_range'].items()]
+        st.warning(f"⚠️ {len(invalid)} ligne(s) ignorée(s), tranche d'âge invalide : {', '.join(invalid[:20])}"
+                   + ("…" if len(invalid) > 20 else ""))
+        campaigns = campaigns[valid]
+    names = [name or f"{product} · {region} · {age} (ligne {i + 1})"
+             for i, name, product, region, age in
+             campaigns[['campaign_name', 'product', 'target_region', 'age_range']].itertuples()]
+    specs = [segment_from_targeting(agent.generate_audience_targeting(industry, region, age))
+             for industry, region, age in campaigns[['industry', 'target_region', 'age_range']].itertuples(index=False)]
+    with st.spinner("Calcul des chevauchements..."):
+        pairs = get_audience_index().competing_pairs(names, specs)
+    if not pairs:
+        st.success(f"✅ Aucun chevauchement significatif entre les {len(names)} ad sets analysés")
+        return
+    st.warning(f"⚠️ {len(pairs):,} paires d'ad sets partagent plus de "
+               f"{DEFAULT_OVERLAP_THRESHOLD:.0%} de leur audience")
+    st.dataframe([{'Ad set': pair['first'], 'En concurrence avec': pair['second'],
+                   'Audience commune': f"{pair['shared']:,.0f}", 'Part': f"{pair['share']:.0%}"} for pair in pairs[:500]],
+                 use_container_width=True, hide_index=True)
@@ -0,0 +1,398 @@
+# app_pages/campaign_builder.py
+# Page « Créer une campagne »
+
+import csv
+import io
+
+import numpy as np
+import streamlit as st
+
+import app_pages
+from campaign_pipeline import STAGE_LABELS, generate_campaign
+from instrumentation import section
+from shared_store import LazyRecord
+
+# Champs de la campagne affichés par cette page (les autres ne sont lus qu'à l'export ou la sauvegarde)
+DISPLAYED_FIELDS = ['campaign_name', 'industry', 'product', 'target_region', 'age_range', 'keywords', 'ad_copy', 'audience',
+                    'performance', 'budget', 'audience_size']
+
+
+@st.cache_resource
+def get_graph_client():
+    # Session HTTP poolée partagée par toutes les sessions Streamlit
+    from graph_api import GraphApiClient
+    
+    return GraphApiClient.from_env()
+
+
+@st.cache_data(show_spinner=False)
+def get_audience_size(_agent, targeting):
+    # Campagnes enregistrées sans estimation : calculée une fois par ciblage
+    return _agent.estimate_audience_size(targeting)
+
+
+@st.cache_resource
+def get_historical_curves(_rollup, version):
+    # Courbes de réponse ajustées sur l'historique, recalculées quand les agrégats changent
+    from budget_optimizer import fit_rollup_curves
+    
+    return fit_rollup_curves(_rollup)
+
+
+def render_budget_optimizer(data):
+    """Répartit un budget quotidien total entre les campagnes existantes et la nouvelle campagne"""
+    # Le contenu d'un expander est exécuté même replié : l'historique n'est chargé qu'à la demande
+    if not st.toggle("Inclure les campagnes existantes", key="budget_optimizer_enabled"):
+        return
+    from app_pages.metrics_resources import get_kpi_rollup
+    
+    rollup = get_kpi_rollup()
+    history = rollup.by_campaign(*rollup.date_range)
+    n_days = (rollup.date_range[1] - rollup.date_range[0]).days + 1
+    current = history['spend'].to_numpy() / n_days
+    
+    with st.form("budget_optimizer"):
+        total = st.number_input("Budget quotidien total à répartir (€)", min_value=5.0,
+                                value=float(round(current.sum() + data['budget'])), step=10.0)
+        submitted = st.form_submit_button("Calculer la répartition")
+    
+    if submitted:
+        from budget_optimizer import allocation_table, optimize, prior_curves
+        from campaign_estimator import SWEEP_MAX_DAILY_BUDGET, SWEEP_MIN_DAILY_BUDGET
+        
+        curves = get_historical_curves(rollup, rollup.version).concat(
+            prior_curves([data['campaign_name']], [data['industry']]))
+        # La nouvelle campagne reste dans les bornes du curseur de budget
+        lower = np.r_[np.zeros(len(history)), SWEEP_MIN_DAILY_BUDGET]
+        upper = np.r_[np.full(len(history), np.inf), SWEEP_MAX_DAILY_BUDGET]
+        try:
+            with section("builder.budget_optimizer"):
+                result = optimize(curves, total, current=np.r_[current, data['budget']],
+                                  min_budget=lower, max_budget=upper)
+            st.session_state.budget_allocation = {
+                'rows': allocation_table(curves, result),
+                'recommended': float(result['budget'][-1])
+            }
+        except ValueError as e:
+            st.error(f"❌ {e}")
+    
+    allocation = st.session_state.get('budget_allocation')
+    if not allocation:
+        return
+    rows = allocation['rows']
+    st.dataframe([{'Campagne': row['campaign'],
+                   'Budget actuel (€/jour)': round(row['current_budget'], 2),
+                   'Budget optimal (€/jour)': round(row['budget'], 2),
+                   'Conversions/jour': round(row['conversions'], 2),
+                   'Coût marginal par conversion (€)': round(row['marginal_cpa'], 2)} for row in rows],
+                 use_container_width=True, hide_index=True)
+    gain = sum(row['conversions'] for row in rows) - sum(row['current_conversions'] for row in rows)
+    st.caption(f"Conversions quotidiennes attendues : {gain:+.1f} par rapport à la répartition actuelle")
+    
+    recommended = allocation['recommended']
+    if st.button(f"Appliquer {recommended:.0f}€/jour à cette campagne"):
+        st.session_state.recommended_budget = int(round(recommended))
+        st.rerun()
+
+
+def render_keyword_expansion(agent, data):
+    """Milliers de variantes (intentions, modificateurs, villes) dédupliquées et classées par score"""
+    with st.form("keyword_expansion"):
+        limit = st.number_input("Nombre de mots-clés", min_value=50, max_value=20000, value=1000, step=50)
+        submitted = st.form_submit_button("Générer les variantes")
+    
+    if submitted:
+        with st.spinner("Expansion et déduplication des mots-clés..."):
+            keywords, stats = agent.expand_keywords(data['product'], data['industry'],
+                                                    data.get('target_region', ''), limit=int(limit))
+        st.session_state.expanded_keywords = {'keywords': keywords, 'stats': stats}
+    
+    expansion = st.session_state.get('expanded_keywords')
+    if not expansion:
+        return
+    stats = expansion['stats']
+    st.caption(f"{stats['candidates']:,} candidats · {stats['exact_duplicates']:,} doublons exacts · "
+               f"{stats['near_duplicates']:,} quasi-doublons écartés · {len(expansion['keywords']):,} retenus")
+    st.dataframe([{'Mot-clé': keyword, 'Score': round(score, 2)} for keyword, score in expansion['keywords'][:200]],
+                 use_container_width=True, hide_index=True, height=300)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['keyword', 'score'])
+    writer.writerows((keyword, f"{score:.2f}") for keyword, score in expansion['keywords'])
+    st.download_button("⬇️ Télécharger les mots-clés (CSV)", data=buffer.getvalue(),
+                       file_name="mots_cles.csv", mime="text/csv")
+
+
+def render_ad_variants(agent, data):
+    """Combinaisons titre × texte × description × ton, dédupliquées et classées par CTR prédit"""
+    tones = agent.templates.tones()
+    with st.form("ad_variant_generator"):
+        selected = st.multiselect("Tons", tones, default=tones)
+        limit = st.number_input("Nombre de variantes", min_value=10, max_value=5000, value=200, step=10)
+        submitted = st.form_submit_button("Générer les variantes A/B")
+    
+    if submitted:
+        st.session_state.ad_variants = agent.generate_ad_variants(data['product'], data['industry'],
+                                                                  selected or tones, limit=int(limit))
+    
+    variants = st.session_state.get('ad_variants')
+    if variants is None:
+        return
+    st.caption(f"{len(variants):,} variantes uniques · CTR prédit de {variants['predicted_ctr'].min():.2f}% "
+               f"à {variants['predicted_ctr'].max():.2f}%")
+    st.dataframe(variants.rename(columns={'variant': 'Variante', 'tone': 'Ton', 'headline': 'Titre',
+                                          'primary': 'Texte principal', 'description': 'Description',
+                                          'predicted_ctr': 'CTR prédit (%)'}),
+                 use_container_width=True, hide_index=True, height=300)
+    st.download_button("⬇️ Télécharger les variantes (CSV)", data=variants.to_csv(index=False),
+                       file_name="variantes_ab.csv", mime="text/csv")
+
+
+def render(agent):
+    # Section 1: Configuration de base
+    st.markdown('<h2 class="section-header">1. Configuration de votre campagne</h2>', unsafe_allow_html=True)
+    
+    with st.container():
+        st.markdown('<div class="campaign-card">', unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            campaign_name = st.text_input("🏷️ Nom de la campagne", 
+                                        placeholder="Ex: Campagne FIV Turquie 2025")
+            
+            industry = st.selectbox("🏢 Secteur d'activité", list(agent.industries.keys()))
+            
+            if industry:
+                product = st.selectbox("📦 Produit/Service spécifique", agent.industries[industry])
+            
+            target_region = st.selectbox("🌍 Région cible", list(agent.countries.keys()))
+        
+        with col2:
+            objective = st.selectbox("🎯 Objectif de campagne", 
+                                   ["Génération de leads", "Trafic vers le site", "Conversions", "Notoriété"])
+            
+            # Budget recommandé par l'optimiseur, appliqué avant la création du curseur
+            st.session_state.setdefault('daily_budget', 50)
+            if 'recommended_budget' in st.session_state:
+                st.session_state.daily_budget = st.session_state.pop('recommended_budget')
+            daily_budget = st.slider("💰 Budget quotidien (€)", 5, 500, key="daily_budget")
+            
+            age_range = st.select_slider("👥 Tranche d'âge", 
+                                       options=["18-25", "25-35", "35-45", "45-55", "55+"], 
+                                       value="25-35")
+            
+            tone = st.selectbox("🎨 Ton publicitaire", agent.templates.tones())
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Bouton de génération
+    if st.button("🚀 Générer ma campagne avec l'IA", use_container_width=True):
+        # Vérification des champs obligatoires
+        if not campaign_name or not industry or not product:
+            st.error("⚠️ Veuillez remplir tous les champs obligatoires")
+        else:
+            # Barre de progression alimentée par les étapes réellement terminées
+            progress_container = st.container()
+            with progress_container:
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+                
+                def report_progress(stage, done, total):
+                    status_text.text(STAGE_LABELS[stage])
+                    progress_bar.progress(int(done * 100 / total))
+                
+                params = {
+                    'product': product,
+                    'industry': industry,
+                    'target_region': target_region,
+                    'tone': tone,
+                    'age_range': age_range,
+                    'daily_budget': daily_budget
+                }
+                results = generate_campaign(agent, params, on_progress=report_progress)
+                
+                status_text.success("✅ Campagne générée avec succès!")
+            
+            # Stockage des données générées
+            keywords = results['keywords']
+            ad_copy = results['ad_copy']
+            audience = results['audience']
+            performance = results['performance']
+            # Estimée une seule fois, à la génération, plutôt qu'à chaque affichage des résultats
+            audience_size = get_audience_size(agent, audience)
+            
+            st.session_state.pop('budget_allocation', None)
+            st.session_state.pop('expanded_keywords', None)
+            st.session_state.pop('ad_variants', None)
+            app_pages.remember_campaign({
+                'campaign_name': campaign_name,
+                'product': product,
+                'industry': industry,
+                'target_region': target_region,
+                'tone': tone,
+                'age_range': age_range,
+                'keywords': keywords,
+                'ad_copy': ad_copy,
+                'audience': audience,
+                'performance': performance,
+                'audience_size': audience_size,
+                'budget': daily_budget,
+                'objective': objective
+            })
+            
+            progress_container.empty()
+    
+    # Affichage des résultats
+    if 'campaign_data' in st.session_state:
+        data = st.session_state.campaign_data
+        if isinstance(data, LazyRecord):
+            # Campagne reprise du stockage partagé : un seul aller-retour pour les champs affichés
+            data.prefetch(*DISPLAYED_FIELDS)
+        
+        st.markdown('<h2 class="section-header">2. Résultats générés par l\'IA</h2>', unsafe_allow_html=True)
+        
+        # Métriques de performance estimées
+        st.markdown('<div class="campaign-card">', unsafe_allow_html=True)
+        st.subheader("📊 Estimations de performance (30 jours)")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.markdown(f"""
+            <div class="metric-card">
+                <h3>{data['performance']['impressions']:,}</h3>
+                <p>Impressions</p>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown(f"""
+            <div class="metric-card">
+                <h3>{data['performance']['clicks']:,}</h3>
+                <p>Clics</p>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col3:
+            st.markdown(f"""
+            <div class="metric-card">
+                <h3>{data['performance']['ctr']}%</h3>
+                <p>Taux de clic</p>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col4:
+            st.markdown(f"""
+            <div class="metric-card">
+                <h3>{data['performance']['conversions']}</h3>
+                <p>Conversions</p>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        # Courbes budget → coût / conversions (plotly et pandas ne sont chargés qu'ici)
+        import plotly.graph_objects as go
+        from campaign_estimator import budget_sweep
+        
+        with st.expander("📈 Courbe budget / conversions"):
+            sweep = budget_sweep(data['industry'])
+            fig_sweep = go.Figure()
+            fig_sweep.add_trace(go.Scatter(x=sweep['daily_budget'], y=sweep['conversions'],
+                                           name='Conversions (30 jours)'))
+            fig_sweep.add_trace(go.Scatter(x=sweep['daily_budget'], y=sweep['cost_per_conversion'],
+                                           name='Coût par conversion (€)', yaxis='y2'))
+            fig_sweep.add_vline(x=data['budget'], line_dash="dash")
+            fig_sweep.update_layout(height=400, xaxis_title="Budget quotidien (€)",
+                                    yaxis=dict(title="Conversions"),
+                                    yaxis2=dict(title="Coût par conversion (€)", overlaying='y', side='right'))
+            st.plotly_chart(fig_sweep, use_container_width=True)
+
+        with st.expander("⚖️ Répartition optimale du budget"):
+            render_budget_optimizer(data)
+
+        # Contenu publicitaire
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown('<div class="campaign-card">', unsafe_allow_html=True)
+            st.subheader("📝 Textes publicitaires")
+            
+            st.text_area("Titre principal", value=data['ad_copy']['headline'], height=68)
+            st.text_area("Texte principal", value=data['ad_copy']['primary'], height=100)
+            st.text_area("Description", value=data['ad_copy']['description'], height=80)
+            with st.expander("🧪 Variantes A/B"):
+                render_ad_variants(agent, data)
+            
+            st.subheader("🔑 Mots-clés recommandés")
+            st.write(", ".join(data['keywords']))
+            with st.expander("🔎 Élargir la liste de mots-clés"):
+                render_keyword_expansion(agent, data)
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown('<div class="campaign-card">', unsafe_allow_html=True)
+            st.subheader("🎯 Configuration du ciblage")
+            
+            st.write("**Pays ciblés:**")
+            st.write(", ".join(data['audience']['demographics']['countries']))
+            
+            st.write("**Tranche d'âge:**")
+            st.write(data['audience']['demographics']['age_range'])
+            
+            st.write("**Centres d'intérêt:**")
+            st.write(", ".join(data['audience']['interests']))
+            
+            st.write("**Comportements:**")
+            st.write(", ".join(data['audience']['behaviors']))
+            
+            st.write("**Audience estimée:**")
+            audience_size = data.get('audience_size')
+            if audience_size is None:
+                audience_size = get_audience_size(agent, data['audience'])
+            st.write(f"~{audience_size:,} personnes".replace(",", " "))
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        # Actions finales
+        st.markdown('<h2 class="section-header">3. Lancement de la campagne</h2>', unsafe_allow_html=True)
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            if st.button("📤 Exporter vers Facebook Ads", use_container_width=True):
+                import requests
+                from graph_api import GraphApiError
+                
+                graph_client = get_graph_client()
+                if graph_client is None:
+                    st.markdown('<div class="warning-box">⚙️ Définissez FACEBOOK_ACCESS_TOKEN, FACEBOOK_AD_ACCOUNT_ID et FACEBOOK_PAGE_ID pour exporter vers votre compte publicitaire.</div>', unsafe_allow_html=True)
+                else:
+                    try:
+                        export = next(graph_client.export_campaigns([data]))
+                    except (GraphApiError, requests.RequestException) as error:
+                        st.error(f"⚠️ Export impossible: {error}")
+                    else:
+                        if export['errors']:
+                            st.error("⚠️ " + " / ".join(export['errors']))
+                        else:
+                            st.markdown(f'<div class="success-box">✅ Campagne créée en pause (ID {export["campaign_id"]}). Connectez-vous à Facebook Ads Manager pour finaliser.</div>', unsafe_allow_html=True)
+        
+        with col2:
+            if st.button("📋 Copier la configuration", use_container_width=True):
+                config_text = f"""
+Campagne: {data['campaign_name']}
+Produit: {data['product']}
+Budget: {data['budget']}€/jour
+Titre: {data['ad_copy']['headline']}
+Mots-clés: {', '.join(data['keywords'])}
+                """
+                st.text_area("Configuration à copier", value=config_text, height=200)
+        
+        with col3:
+            if st.button("💾 Sauvegarder comme template", use_container_width=True):
+                from app_pages.template_library import get_template_store
+                
+                get_template_store(agent).save(data)
+                st.markdown('<div class="success-box">💾 Template sauvegardé dans votre bibliothèque!</div>', unsafe_allow_html=True)
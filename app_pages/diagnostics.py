@@ -0,0 +1,66 @@
+# app_pages/diagnostics.py
+# Page cachée « Diagnostics » : latences instrumentées, caches, profil d'une exécution, export Prometheus
+
+import sys
+
+import streamlit as st
+
+import app_pages
+import instrumentation
+
+
+def render(agent):
+    st.markdown('<h2 class="section-header">🩺 Diagnostics</h2>', unsafe_allow_html=True)
+
+    enabled = st.toggle("Instrumentation active (tout le processus)", value=instrumentation.is_enabled())
+    if enabled != instrumentation.is_enabled():
+        instrumentation.set_enabled(enabled)
+        st.rerun()
+
+    # Latences par opération (les exécutions de page sont toujours mesurées)
+    st.subheader("⏱️ Latences")
+    summaries = instrumentation.summaries()
+    if summaries:
+        st.dataframe([{'Opération': name, 'Appels': s['count'], 'Moyenne (ms)': round(s['mean_ms'], 2),
+                       'p50 (ms)': round(s['p50_ms'], 2), 'p95 (ms)': round(s['p95_ms'], 2),
+                       'p99 (ms)': round(s['p99_ms'], 2), 'Max (ms)': round(s['max_ms'], 2)}
+                      for name, s in summaries.items()],
+                     use_container_width=True, hide_index=True)
+    else:
+        st.info("Aucune mesure pour l'instant.")
+    imports = app_pages.import_timings()
+    if imports:
+        st.caption("Import des pages : " + " · ".join(f"{page} {ms:.0f} ms" for page, ms in imports.items()))
+
+    # Caches
+    st.subheader("🗄️ Caches")
+    caches = {f"agent.{name}": stats for name, stats in agent.cache_stats().items()}
+    # Le cache des figures n'est consulté que si le module des graphiques est déjà chargé
+    if "chart_pipeline" in sys.modules:
+        caches["figures"] = sys.modules["chart_pipeline"].figure_cache_stats()
+    st.dataframe([{'Cache': name, 'Entrées': stats.get('size', '—'), 'Succès': stats['hits'],
+                   'Échecs': stats['misses'], 'Taux de succès': f"{stats['hit_rate']:.0%}"}
+                  for name, stats in caches.items()],
+                 use_container_width=True, hide_index=True)
+
+    # Profil d'une exécution
+    st.subheader("🔬 Profil")
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        engine = st.radio("Profileur", ["cprofile", "pyinstrument"], horizontal=True)
+    with col2:
+        if st.button("Profiler la prochaine exécution", use_container_width=True):
+            st.session_state.profile_next_rerun = engine
+            st.info("La prochaine exécution (changement de page compris) sera profilée.")
+    last_profile = st.session_state.get('last_profile')
+    if last_profile:
+        st.caption(f"Dernier profil : page « {last_profile['page']} » ({last_profile['engine']})")
+        st.code(last_profile['report'], language=None)
+
+    # Export Prometheus
+    st.subheader("📤 Export Prometheus")
+    metrics_text = instrumentation.prometheus_text()
+    st.download_button("⬇️ Télécharger les métriques", data=metrics_text, file_name="metrics.txt",
+                       mime="text/plain")
+    with st.expander("Aperçu"):
+        st.code(metrics_text, language=None)
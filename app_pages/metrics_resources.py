@@ -0,0 +1,41 @@
+# app_pages/metrics_resources.py
+# Store de métriques, agrégats et ingestion partagés par les pages (un exemplaire par processus)
+# Module distinct des pages : l'importer ne charge ni l'historique ni la page « Analyser les performances »
+
+from datetime import timedelta
+
+import streamlit as st
+
+import instrumentation
+from kpi_rollups import build_rollup
+from metrics_store import METRIC_COLUMNS, MetricsStore, ensure_demo_data
+
+
+@st.cache_resource
+def get_metrics_store():
+    store = MetricsStore()
+    ensure_demo_data(store)
+    return store
+
+
+@st.cache_resource
+def get_kpi_rollup():
+    return build_rollup(get_metrics_store().iter_batches(['date', 'campaign_id'] + METRIC_COLUMNS))
+
+
+@st.cache_resource
+def get_ingestion():
+    # Un consommateur par processus ; les lots du journal non encore écrits dans le store sont rejoués
+    from insights_stream import IngestionPipeline, InsightsLog
+    
+    pipeline = IngestionPipeline(InsightsLog(), get_kpi_rollup(), get_metrics_store())
+    pipeline.recover()
+    instrumentation.register_collector("ingestion", pipeline.stats)
+    return pipeline.start()
+
+
+@st.cache_resource
+def get_demo_feed():
+    from insights_stream import SyntheticFeed
+    
+    return SyntheticFeed(get_ingestion(), start=get_kpi_rollup().date_range[1] + timedelta(days=1))
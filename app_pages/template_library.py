@@ -0,0 +1,89 @@
+# app_pages/template_library.py
+# Page « Bibliothèque de templates »
+
+import math
+
+import streamlit as st
+
+import app_pages
+from instrumentation import section
+from template_store import DEFAULT_PAGE_SIZE, TemplateStore, ensure_demo_templates
+
+ALL = "Tous"
+
+
+@st.cache_resource
+def get_template_store(_agent):
+    store = TemplateStore()
+    ensure_demo_templates(store, _agent)
+    return store
+
+
+def render(agent):
+    st.markdown('<h2 class="section-header">📚 Bibliothèque de templates</h2>', unsafe_allow_html=True)
+
+    store = get_template_store(agent)
+
+    # Recherche plein texte et filtres indexés
+    query = st.text_input("🔎 Rechercher (titre, mots-clés, nom)", placeholder="Ex: FIV Istanbul")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        industry = st.selectbox("Secteur", [ALL] + store.distinct_values("industry"))
+    with col2:
+        region = st.selectbox("Région", [ALL] + store.distinct_values("region"))
+    with col3:
+        tone = st.selectbox("Ton", [ALL] + store.distinct_values("tone"))
+
+    filters = {
+        "query": query.strip(),
+        "industry": None if industry == ALL else industry,
+        "region": None if region == ALL else region,
+        "tone": None if tone == ALL else tone
+    }
+    # Retour à la première page quand la recherche change
+    if st.session_state.get("template_filters") != filters:
+        st.session_state.template_filters = filters
+        st.session_state.template_page = 1
+
+    page = st.session_state.get("template_page", 1)
+    with section("templates.search"):
+        templates, total = store.search(**filters, page=page, page_size=DEFAULT_PAGE_SIZE)
+    n_pages = max(math.ceil(total / DEFAULT_PAGE_SIZE), 1)
+
+    if not templates:
+        st.info("Aucun template ne correspond à votre recherche.")
+
+    for template in templates:
+        with st.container():
+            st.markdown('<div class="campaign-card">', unsafe_allow_html=True)
+            col1, col2, col3 = st.columns([3, 2, 1])
+
+            with col1:
+                st.subheader(template["name"])
+                st.write(template["description"] or template["headline"])
+                st.write(f"**Secteur:** {template['industry']}")
+
+            with col2:
+                performance = f"CTR: {template['ctr']:.1f}%" if template["ctr"] is not None else "CTR: —"
+                st.metric("Performance", performance)
+
+            with col3:
+                if st.button("Utiliser", key=f"template_{template['id']}"):
+                    # La configuration complète n'est lue qu'à l'utilisation
+                    app_pages.remember_campaign(store.get(template["id"]))
+                    st.success("Template chargé! Retrouvez-le dans « Créer une campagne ».")
+
+            st.markdown('</div>', unsafe_allow_html=True)
+
+    # Pagination
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Précédent", disabled=page <= 1, use_container_width=True):
+            st.session_state.template_page = page - 1
+            st.rerun()
+    with col2:
+        st.caption(f"Page {page} / {n_pages} · {total} template(s)")
+    with col3:
+        if st.button("Suivant ➡️", disabled=page >= n_pages, use_container_width=True):
+            st.session_state.template_page = page + 1
+            st.rerun()
@@ -0,0 +1,268 @@
+# audience_engine.py
+# Estimation de portée et de chevauchement des audiences à partir d'une population synthétique locale
+# Chaque segment (pays × âge × centres d'intérêt × comportements) est un bitset sur la population
+
+import functools
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ads_agent import BEHAVIORS, DEFAULT_INTERESTS, INDUSTRY_INTERESTS
+
+POPULATION_PATH_ENV = "ADS_POPULATION_PATH"
+DEFAULT_POPULATION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "population.npz")
+
+# Utilisateurs adultes joignables par pays (millions, ordres de grandeur)
+COUNTRY_AUDIENCES = {
+    "France": 40.0, "Belgique": 7.5, "Suisse": 4.5, "Canada": 27.0,
+    "Maroc": 22.0, "Algérie": 24.0, "Tunisie": 8.0, "Sénégal": 3.5, "Côte d'Ivoire": 7.0,
+    "Liban": 4.0, "Émirats": 9.0, "Qatar": 2.5
+}
+
+INTERESTS = list(dict.fromkeys(
+    [interest for interests in INDUSTRY_INTERESTS.values() for interest in interests] + DEFAULT_INTERESTS))
+
+DEFAULT_SAMPLES = 500_000
+MIN_SAMPLES_PER_COUNTRY = 10_000
+
+# Un segment est « en concurrence » avec un autre au-delà de cette part de l'audience la plus petite
+DEFAULT_OVERLAP_THRESHOLD = 0.3
+
+_WORD_BITS = 64
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Nombre de bits à 1 de chaque mot de 64 bits"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    # NumPy < 2.0 : table de 256 entrées appliquée octet par octet
+    bytes_view = words.view(np.uint8).reshape(*words.shape, 8)
+    return _POPCOUNT_TABLE[bytes_view].sum(axis=-1, dtype=np.uint8)
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def parse_age_range(age_range: str) -> Tuple[int, int]:
+    """« 25-35 » → [25, 35) ; « 55+ » → [55, 120)"""
+    text = age_range.strip()
+    if text.endswith("+"):
+        return int(text[:-1]), 120
+    low, _, high = text.partition("-")
+    if not high:
+        raise ValueError(f"Tranche d'âge invalide: {age_range}")
+    return int(low), int(high)
+
+
+def generate_population(n_samples: int = DEFAULT_SAMPLES, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Population synthétique triée par pays ; chaque bloc pays est complété jusqu'à un multiple de 64
+
+    Les centres d'intérêt sont corrélés par profil (santé, voyage, achats, carrière) pour que
+    les chevauchements ressemblent à ceux d'une vraie audience.
+    """
+    rng = np.random.default_rng(seed)
+    countries = list(COUNTRY_AUDIENCES)
+    audiences = np.array([COUNTRY_AUDIENCES[country] for country in countries])
+    per_country = np.maximum(np.round(audiences / audiences.sum() * n_samples), MIN_SAMPLES_PER_COUNTRY).astype(int)
+    padded = -(-per_country // _WORD_BITS) * _WORD_BITS
+    total = int(padded.sum())
+
+    # Valeurs de remplissage : aucun pays (255), âge 0, aucun intérêt ni comportement
+    country = np.full(total, 255, dtype=np.uint8)
+    age = np.zeros(total, dtype=np.uint8)
+    interests = np.zeros(total, dtype=np.uint32)
+    behaviors = np.zeros(total, dtype=np.uint8)
+
+    profiles = len(INDUSTRY_INTERESTS)
+    base = np.full(len(INTERESTS), 0.08)
+    base[INTERESTS.index(DEFAULT_INTERESTS[0])] = 0.6
+    boost = np.ones((profiles, len(INTERESTS)))
+    for profile, industry_interests in enumerate(INDUSTRY_INTERESTS.values()):
+        boost[profile, [INTERESTS.index(interest) for interest in industry_interests]] = 4.0
+    behavior_rates = np.array([0.15, 0.45, 0.85])
+
+    start = 0
+    for code, (n, width) in enumerate(zip(per_country, padded)):
+        rows = slice(start, start + n)
+        country[rows] = code
+        # Âges 18-75, plus fréquents entre 25 et 45 ans
+        age[rows] = np.clip(rng.gamma(4.0, 9.0, n) + 16, 18, 75).astype(np.uint8)
+        profile = rng.integers(0, profiles, n)
+        has_interest = rng.random((n, len(INTERESTS))) < np.minimum(base * boost[profile], 0.9)
+        interests[rows] = has_interest @ (1 << np.arange(len(INTERESTS), dtype=np.uint32))
+        has_behavior = rng.random((n, len(BEHAVIORS))) < behavior_rates
+        behaviors[rows] = has_behavior @ (1 << np.arange(len(BEHAVIORS), dtype=np.uint8))
+        start += width
+
+    return {
+        "country": country, "age": age, "interests": interests, "behaviors": behaviors,
+        "samples": per_country,
+        "vocabulary": np.array(json.dumps({"countries": countries, "interests": INTERESTS, "behaviors": BEHAVIORS}))
+    }
+
+
+def ensure_population(path: Optional[str] = None, n_samples: int = DEFAULT_SAMPLES) -> str:
+    """Crée le fichier de population synthétique s'il n'existe pas encore"""
+    path = path or os.environ.get(POPULATION_PATH_ENV, DEFAULT_POPULATION_PATH)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Écriture via un fichier ouvert (numpy ajouterait « .npz » à un chemin qui n'en a pas),
+        # puis renommage atomique : jamais de fichier partiel si deux processus démarrent ensemble
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            np.savez_compressed(file, **generate_population(n_samples))
+        os.replace(temporary, path)
+    return path
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    """Masque booléen (longueur multiple de 64) → bitset en mots de 64 bits"""
+    return np.packbits(mask, bitorder="little").view("<u8")
+
+
+class AudienceIndex:
+    """Bitsets précalculés par valeur d'attribut ; portée et chevauchements par opérations vectorisées"""
+
+    def __init__(self, population: Dict[str, np.ndarray]):
+        vocabulary = json.loads(str(population["vocabulary"]))
+        self.countries: List[str] = vocabulary["countries"]
+        self.interests: List[str] = vocabulary["interests"]
+        self.behaviors: List[str] = vocabulary["behaviors"]
+        self._age = population["age"]
+        country = population["country"]
+        self.n_words = len(country) // _WORD_BITS
+
+        # Les pays occupent des plages de mots contiguës : un pays est une tranche, pas un bitset
+        codes = country[::_WORD_BITS]
+        self._country_start = np.searchsorted(codes, np.arange(len(self.countries)))
+        self._country_end = np.searchsorted(codes, np.arange(len(self.countries)), side="right")
+        samples = np.asarray(population["samples"], dtype=float)
+        # Personnes réelles représentées par un individu synthétique, pays par pays
+        self.scale = np.array([COUNTRY_AUDIENCES.get(name, 0.0) * 1e6 for name in self.countries]) / samples
+
+        self._interest_bits = {name: _pack((population["interests"] >> np.uint32(i)) & 1 == 1)
+                               for i, name in enumerate(self.interests)}
+        self._behavior_bits = {name: _pack((population["behaviors"] >> np.uint8(i)) & 1 == 1)
+                               for i, name in enumerate(self.behaviors)}
+        self._age_bits: Dict[Tuple[int, int], np.ndarray] = {}
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "AudienceIndex":
+        with np.load(ensure_population(path)) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def _ages(self, age_range: str) -> np.ndarray:
+        bounds = parse_age_range(age_range)
+        bits = self._age_bits.get(bounds)
+        if bits is None:
+            bits = self._age_bits[bounds] = _pack((self._age >= bounds[0]) & (self._age < bounds[1]))
+        return bits
+
+    def _any_of(self, index: Dict[str, np.ndarray], names: Iterable[str]) -> Optional[np.ndarray]:
+        """Union des bitsets connus (None si la liste est vide : pas de restriction)"""
+        names = list(names)
+        if not names:
+            return None
+        result = np.zeros(self.n_words, dtype=np.uint64)
+        for name in names:
+            bits = index.get(name)
+            if bits is not None:
+                result |= bits
+        return result
+
+    def segment(self, spec: Dict[str, Any]) -> np.ndarray:
+        """Bitset d'un segment : pays OU, âges OU, puis ET entre intérêts et comportements (sémantique Meta)"""
+        bits = np.zeros(self.n_words, dtype=np.uint64)
+        for name in spec.get("countries", []):
+            if name in self.countries:
+                code = self.countries.index(name)
+                words = slice(self._country_start[code], self._country_end[code])
+                bits[words] = ~np.uint64(0)
+        age_ranges = spec.get("age_ranges") or ["18+"]
+        ages = np.zeros(self.n_words, dtype=np.uint64)
+        for age_range in age_ranges:
+            ages |= self._ages(age_range)
+        bits &= ages
+        for restriction in (self._any_of(self._interest_bits, spec.get("interests", [])),
+                            self._any_of(self._behavior_bits, spec.get("behaviors", []))):
+            if restriction is not None:
+                bits &= restriction
+        return bits
+
+    def segments(self, specs: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Matrice [segment, mot] ; les segments identiques ne sont construits qu'une fois"""
+        built: Dict[str, np.ndarray] = {}
+        rows = []
+        for spec in specs:
+            key = json.dumps(spec, sort_keys=True, ensure_ascii=False)
+            if key not in built:
+                built[key] = self.segment(spec)
+            rows.append(built[key])
+        return np.vstack(rows) if rows else np.zeros((0, self.n_words), dtype=np.uint64)
+
+    def _weighted_counts(self, bits: np.ndarray) -> np.ndarray:
+        """Personnes estimées : bits à 1 comptés par plage de pays puis pondérés"""
+        counts = _popcount(bits).astype(np.int64)
+        per_country = np.add.reduceat(counts, self._country_start, axis=-1)
+        # reduceat déborde sur le pays suivant si une plage est vide : on corrige avec les bornes
+        per_country[..., self._country_start == self._country_end] = 0
+        return per_country @ self.scale
+
+    def reach(self, specs: Sequence[Dict[str, Any]]) -> np.ndarray:
+        return self._weighted_counts(self.segments(specs))
+
+    def overlap_matrix(self, specs: Sequence[Dict[str, Any]], memory_mb: int = 64) -> np.ndarray:
+        """Audience commune estimée pour chaque paire (diagonale = portée)
+
+        Calcul pays par pays : seuls les segments présents dans un pays sont croisés, sur la
+        seule plage de mots de ce pays. Chaque bloc de lignes fait un ET et un popcount
+        contre les lignes suivantes en une opération, dans la limite de `memory_mb`.
+        """
+        bits = self.segments(specs)
+        overlap = np.zeros((len(bits), len(bits)))
+        for code, (start, end) in enumerate(zip(self._country_start, self._country_end)):
+            members = np.flatnonzero(bits[:, start:end].any(axis=1))
+            if not len(members):
+                continue
+            sub = bits[members, start:end]
+            block = max(1, memory_mb * 2 ** 20 // max(sub.size * 8, 1))
+            counts = np.zeros((len(members), len(members)))
+            # Triangle supérieur seulement, puis symétrie
+            for first in range(0, len(members), block):
+                shared = sub[first:first + block, None, :] & sub[None, first:, :]
+                counts[first:first + block, first:] = _popcount(shared).sum(axis=-1, dtype=np.int64)
+            counts = np.triu(counts)
+            overlap[np.ix_(members, members)] += (counts + np.triu(counts, 1).T) * self.scale[code]
+        return overlap
+
+    def competing_pairs(self, names: Sequence[str], specs: Sequence[Dict[str, Any]],
+                        threshold: float = DEFAULT_OVERLAP_THRESHOLD) -> List[Dict[str, Any]]:
+        """Paires dont l'audience commune dépasse `threshold` de la plus petite des deux, triées"""
+        overlap = self.overlap_matrix(specs)
+        reach = np.diag(overlap)
+        smaller = np.minimum(reach[:, None], reach[None, :])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(smaller > 0, overlap / smaller, 0.0)
+        first, second = np.nonzero(np.triu(share >= threshold, 1))
+        order = np.argsort(-share[first, second], kind="stable")
+        return [{"first": names[i], "second": names[j], "shared": float(overlap[i, j]),
+                 "share": float(share[i, j])} for i, j in zip(first[order], second[order])]
+
+
+def segment_from_targeting(targeting: Dict[str, Any]) -> Dict[str, Any]:
+    """Spécification de segment à partir du ciblage produit par generate_audience_targeting"""
+    demographics = targeting["demographics"]
+    return {
+        "countries": list(demographics["countries"]),
+        "age_ranges": [demographics["age_range"]],
+        "interests": list(targeting.get("interests", [])),
+        "behaviors": list(targeting.get("behaviors", []))
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def get_audience_index(path: Optional[str] = None) -> AudienceIndex:
+    """Index partagé, chargé (et la population créée si besoin) au premier appel"""
+    return AudienceIndex.load(path)
@@ -0,0 +1 @@
+# Benchmarks de l'agent IA Facebook Ads (lancer avec: python -m benchmarks.<module>)
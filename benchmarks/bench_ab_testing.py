@@ -0,0 +1,59 @@
+# Mesure la génération de variantes A/B et l'évaluation séquentielle de milliers de variantes actives
+# Usage : python -m benchmarks.bench_ab_testing [nombre_de_variantes]
+
+import sys
+import time
+
+import numpy as np
+
+from ab_testing import sequential_test
+from ads_agent import FacebookAdsAgent
+
+VARIANTS_PER_GROUP = 5
+
+
+def run(n_variants: int = 10_000, refreshes: int = 30, daily_impressions: int = 500, seed: int = 0) -> dict:
+    agent = FacebookAdsAgent()
+    start = time.perf_counter()
+    variants = agent.generate_ad_variants("FIV", "Santé/Médical")
+    generate_seconds = time.perf_counter() - start
+
+    # Simulation : CTR réels tirés au hasard, une consultation des statistiques par jour
+    rng = np.random.default_rng(seed)
+    groups = np.arange(n_variants) // VARIANTS_PER_GROUP
+    true_ctr = rng.uniform(0.008, 0.02, n_variants)
+    best = np.zeros(n_variants, dtype=bool)
+    best[np.lexsort((-true_ctr, groups))[::VARIANTS_PER_GROUP]] = True
+    impressions = np.zeros(n_variants)
+    clicks = np.zeros(n_variants)
+    active = np.ones(n_variants, dtype=bool)
+    evaluate_seconds = []
+    for _ in range(refreshes):
+        served = np.where(active, rng.poisson(daily_impressions, n_variants), 0)
+        impressions += served
+        clicks += rng.binomial(served, true_ctr)
+        start = time.perf_counter()
+        result = sequential_test(groups, impressions, clicks)
+        evaluate_seconds.append(time.perf_counter() - start)
+        active &= result["decision"] != "pause"
+
+    return {
+        "variants_generated": len(variants),
+        "generate_ms": generate_seconds * 1e3,
+        "variants": n_variants,
+        "refreshes": refreshes,
+        "evaluate_ms_p50": float(np.median(evaluate_seconds)) * 1e3,
+        "paused": int((~active).sum()),
+        "best_paused": int((~active & best).sum()),
+        "impressions_saved": float(1 - impressions.sum() / (n_variants * refreshes * daily_impressions))
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    result = run(n)
+    print(f"Variantes générées : {result['variants_generated']:,} en {result['generate_ms']:.1f} ms")
+    print(f"Évaluation         : {result['variants']:,} variantes, médiane {result['evaluate_ms_p50']:.1f} ms "
+          f"par consultation ({result['refreshes']} consultations)")
+    print(f"Mises en pause     : {result['paused']:,} (dont {result['best_paused']:,} meilleures de leur groupe)")
+    print(f"Impressions évitées : {result['impressions_saved']:.0%}")
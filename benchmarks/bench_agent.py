@@ -0,0 +1,85 @@
+# Mesure la latence de chaque méthode de FacebookAdsAgent et de la génération complète d'une campagne
+# Usage : python -m benchmarks.bench_agent [nombre_d_appels]
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ads_agent import AD_COPY_CACHE, KEYWORDS_CACHE, TARGETING_CACHE, FacebookAdsAgent
+from campaign_pipeline import generate_campaign
+from instrumentation import LatencyHistogram
+
+CACHES = (KEYWORDS_CACHE, AD_COPY_CACHE, TARGETING_CACHE)
+AGE_RANGES = ["18-25", "25-35", "35-45", "45-55", "55+"]
+
+
+def _clear_caches() -> None:
+    for cache in CACHES:
+        cache.clear()
+
+
+def _measure(func, calls, cold: bool = False) -> dict:
+    """Percentiles de latence ; à froid, les caches de l'agent sont vidés avant chaque appel"""
+    histogram = LatencyHistogram()
+    for args in calls:
+        if cold:
+            _clear_caches()
+        start = time.perf_counter()
+        func(*args)
+        histogram.observe(time.perf_counter() - start)
+    return histogram.summary()
+
+
+def run(n_calls: int = 200, seed: int = 0) -> dict:
+    agent = FacebookAdsAgent()
+    rng = np.random.default_rng(seed)
+    combos = [(product, industry, region, tone, age)
+              for industry, products in agent.industries.items() for product in products
+              for region in agent.countries for tone in agent.templates.tones() for age in AGE_RANGES]
+    picks = [combos[i] for i in rng.integers(0, len(combos), n_calls)]
+    budgets = (rng.integers(5, 501, n_calls) * 30).tolist()
+    targetings = [agent.generate_audience_targeting(industry, region, age)
+                  for _, industry, region, _, age in picks]
+    scenarios = pd.DataFrame({"budget": budgets, "industry": [industry for _, industry, *_ in picks]})
+
+    # Moins d'appels pour les méthodes coûteuses (expansion des mots-clés : plusieurs secondes par appel)
+    few = max(n_calls // 40, 3)
+    methods = {
+        "generate_keywords": (agent.generate_keywords, [(p, i, r) for p, i, r, _, _ in picks]),
+        "expand_keywords": (agent.expand_keywords, [(p, i, r) for p, i, r, _, _ in picks[:3]]),
+        "generate_ad_copy": (agent.generate_ad_copy, [(p, r, i, t) for p, i, r, t, _ in picks]),
+        "generate_ad_variants": (agent.generate_ad_variants, [(p, i) for p, i, *_ in picks[:few]]),
+        "generate_audience_targeting": (agent.generate_audience_targeting,
+                                        [(i, r, a) for _, i, r, _, a in picks]),
+        "estimate_audience_size": (agent.estimate_audience_size, [(t,) for t in targetings[:few]]),
+        "estimate_performance": (agent.estimate_performance, list(zip(budgets, scenarios["industry"]))),
+        "estimate_performance_batch": (agent.estimate_performance_batch, [(scenarios,)] * few)
+    }
+    # Premier appel hors mesure : index d'audience et modules importés à la demande
+    for func, calls in methods.values():
+        func(*calls[0])
+
+    results = {}
+    for name, (func, calls) in methods.items():
+        results[name] = {"cold": _measure(func, calls, cold=True), "warm": _measure(func, calls)}
+
+    params = [{"product": p, "industry": i, "target_region": r, "tone": t, "age_range": a,
+               "daily_budget": b // 30} for (p, i, r, t, a), b in zip(picks[:few], budgets)]
+    results["generate_campaign"] = {
+        "cold": _measure(lambda p: generate_campaign(agent, p), [(p,) for p in params], cold=True),
+        "warm": _measure(lambda p: generate_campaign(agent, p), [(p,) for p in params])
+    }
+    _clear_caches()
+    return {"calls": n_calls, "methods": results}
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    result = run(n)
+    print(f"{'Méthode':<30} {'à froid p50':>12} {'p95':>9} {'p99':>9} {'en cache p50':>13} {'p95':>9}")
+    for name, timings in result["methods"].items():
+        cold, warm = timings["cold"], timings["warm"]
+        print(f"{name:<30} {cold['p50_ms']:9.3f} ms {cold['p95_ms']:6.3f} ms {cold['p99_ms']:6.3f} ms "
+              f"{warm['p50_ms']:10.3f} ms {warm['p95_ms']:6.3f} ms")
@@ -0,0 +1,78 @@
+# Mesure la détection d'anomalies sur des dizaines de milliers de séries (anomalies injectées)
+# Usage : python -m benchmarks.bench_anomalies [nombre_de_campagnes] [nombre_de_jours]
+
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from anomaly_detection import LOOKBACK_DAYS, AnomalyDetector
+from kpi_rollups import KpiRollup
+
+START = date(2025, 1, 1)
+
+
+def _insights(n_campaigns: int, days: np.ndarray, rng: np.random.Generator, scale: np.ndarray,
+              weekday_effect: np.ndarray) -> pd.DataFrame:
+    """Séries bruitées avec effet jour de semaine (une ligne par campagne et par jour)"""
+    campaign = np.repeat(np.arange(n_campaigns), len(days))
+    day = np.tile(days, n_campaigns)
+    seasonal = weekday_effect[day % 7]
+    impressions = rng.poisson(scale[campaign] * 5000 * seasonal)
+    clicks = rng.binomial(impressions, 0.02)
+    spend = clicks * rng.normal(0.8, 0.05, len(day)).clip(0.5)
+    return pd.DataFrame({
+        "campaign_id": pd.Categorical([f"campaign_{i}" for i in range(n_campaigns)])[campaign],
+        "date": pd.to_datetime(START) + pd.to_timedelta(day, unit="D"),
+        "impressions": impressions, "clicks": clicks, "conversions": clicks // 10, "spend": spend
+    })
+
+
+def run(n_campaigns: int = 20_000, n_days: int = 120, n_anomalies: int = 500, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    scale = rng.uniform(0.5, 3.0, n_campaigns)
+    weekday_effect = np.array([1.0, 1.05, 1.1, 1.05, 1.0, 0.7, 0.6])
+
+    history = _insights(n_campaigns, np.arange(n_days - 1), rng, scale, weekday_effect)
+    rollup = KpiRollup()
+    rollup.ingest(history)
+    detector = AnomalyDetector()
+    start = time.perf_counter()
+    baseline_alerts = detector.update(rollup)
+    full_seconds = time.perf_counter() - start
+
+    # Nouveau jour : CPC multiplié par 2 sur une partie des campagnes
+    last = _insights(n_campaigns, np.array([n_days - 1]), rng, scale, weekday_effect)
+    injected = rng.choice(n_campaigns, n_anomalies, replace=False)
+    last.loc[injected, "spend"] *= 2.0
+    rollup.ingest(last)
+    start = time.perf_counter()
+    alerts = detector.update(rollup)
+    incremental_seconds = time.perf_counter() - start
+
+    last_day = pd.Timestamp(START + timedelta(days=n_days - 1))
+    detected = set(alerts.loc[(alerts["date"] == last_day) & (alerts["metric"] == "cpc"), "campaign_id"])
+    expected = {f"campaign_{i}" for i in injected}
+    return {
+        "series": n_campaigns * 3,
+        "days": n_days,
+        "full_seconds": full_seconds,
+        "incremental_seconds": incremental_seconds,
+        "recall": len(detected & expected) / len(expected),
+        "precision": len(detected & expected) / max(len(detected), 1),
+        "false_alerts_per_1000_series_days": 1000 * len(baseline_alerts) / (n_campaigns * 3 * LOOKBACK_DAYS),
+        "full_rebuilds": detector.full_rebuilds
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    d = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    result = run(n, d)
+    print(f"Séries           : {result['series']:,} ({result['days']} jours)")
+    print(f"Calcul complet   : {result['full_seconds'] * 1e3:.0f} ms · nouveau jour : "
+          f"{result['incremental_seconds'] * 1e3:.0f} ms (reconstructions : {result['full_rebuilds']})")
+    print(f"Pics de CPC injectés : rappel {result['recall']:.0%} · précision {result['precision']:.0%}")
+    print(f"Fausses alertes  : {result['false_alerts_per_1000_series_days']:.2f} pour 1 000 séries-jours")
@@ -0,0 +1,65 @@
+# Mesure l'estimation de portée et la matrice de chevauchement de nombreux ad sets
+# Usage : python -m benchmarks.bench_audience [nombre_d_ad_sets]
+
+import sys
+import time
+
+import numpy as np
+
+from ads_agent import BEHAVIORS, INDUSTRY_INTERESTS
+from audience_engine import COUNTRY_AUDIENCES, get_audience_index
+
+AGE_RANGES = ["18-25", "25-35", "35-45", "45-55", "55+"]
+
+
+def _random_specs(n_sets: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    countries, industries = list(COUNTRY_AUDIENCES), list(INDUSTRY_INTERESTS)
+    specs = []
+    for _ in range(n_sets):
+        interests = INDUSTRY_INTERESTS[industries[rng.integers(len(industries))]]
+        specs.append({
+            "countries": list(rng.choice(countries, size=rng.integers(1, 4), replace=False)),
+            "age_ranges": [AGE_RANGES[rng.integers(len(AGE_RANGES))]],
+            "interests": list(rng.choice(interests, size=rng.integers(1, len(interests) + 1), replace=False)),
+            "behaviors": list(rng.choice(BEHAVIORS, size=rng.integers(0, 2), replace=False))
+        })
+    return specs
+
+
+def run(n_sets: int = 300, seed: int = 0) -> dict:
+    start = time.perf_counter()
+    index = get_audience_index()
+    load_seconds = time.perf_counter() - start
+
+    specs = _random_specs(n_sets, seed)
+    start = time.perf_counter()
+    reach = index.reach(specs)
+    reach_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    overlap = index.overlap_matrix(specs)
+    overlap_seconds = time.perf_counter() - start
+
+    # La diagonale de la matrice doit redonner la portée de chaque segment
+    if not np.allclose(np.diag(overlap), reach):
+        raise AssertionError("Diagonale du chevauchement différente de la portée")
+
+    return {
+        "ad_sets": n_sets,
+        "samples": index.n_words * 64,
+        "load_seconds": load_seconds,
+        "reach_seconds": reach_seconds,
+        "overlap_seconds": overlap_seconds,
+        "pairs": n_sets * (n_sets - 1) // 2
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    result = run(n)
+    print(f"Ad sets          : {result['ad_sets']:,} ({result['pairs']:,} paires)")
+    print(f"Échantillon      : {result['samples']:,} personnes")
+    print(f"Chargement       : {result['load_seconds'] * 1e3:.0f} ms")
+    print(f"Portées          : {result['reach_seconds'] * 1e3:.1f} ms")
+    print(f"Chevauchements   : {result['overlap_seconds'] * 1e3:.0f} ms")
@@ -0,0 +1,48 @@
+# Compare estimate_performance appelé en boucle à l'estimateur vectorisé
+# Usage : python -m benchmarks.bench_estimator [nombre_de_scénarios]
+
+import sys
+import time
+
+import numpy as np
+
+from ads_agent import FacebookAdsAgent, INDUSTRY_MULTIPLIERS
+from campaign_estimator import estimate_batch
+
+
+def run(n_scenarios: int = 100_000, seed: int = 0) -> dict:
+    """Mesure les deux chemins sur les mêmes scénarios et vérifie qu'ils concordent"""
+    rng = np.random.default_rng(seed)
+    industries = np.array(list(INDUSTRY_MULTIPLIERS) + ["Autre"], dtype=object)
+    budgets = rng.integers(5, 501, size=n_scenarios) * 30
+    scenario_industries = industries[rng.integers(0, len(industries), size=n_scenarios)]
+
+    agent = FacebookAdsAgent()
+    start = time.perf_counter()
+    scalar = [agent.estimate_performance(int(b), i) for b, i in zip(budgets, scenario_industries)]
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = estimate_batch(budgets, scenario_industries)
+    batch_seconds = time.perf_counter() - start
+
+    for column, values in batch.items():
+        expected = np.array([row[column] for row in scalar])
+        if not np.array_equal(expected, values):
+            raise AssertionError(f"Divergence entre les deux chemins sur '{column}'")
+
+    return {
+        "scenarios": n_scenarios,
+        "scalar_seconds": scalar_seconds,
+        "batch_seconds": batch_seconds,
+        "speedup": scalar_seconds / batch_seconds
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    result = run(n)
+    print(f"Scénarios       : {result['scenarios']:,}")
+    print(f"Boucle scalaire : {result['scalar_seconds']:.3f}s")
+    print(f"Lot vectorisé   : {result['batch_seconds']:.3f}s")
+    print(f"Accélération    : x{result['speedup']:.1f}")
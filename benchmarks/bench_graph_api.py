@@ -0,0 +1,67 @@
+# Export de campagnes vers la Graph API simulée : appels HTTP, débit, et objets créés sous limitation de débit
+# Usage : python -m benchmarks.bench_graph_api [campagnes] [campagnes_limitées]
+
+import sys
+import time
+from collections import Counter
+
+from ads_agent import FacebookAdsAgent
+from campaign_pipeline import generate_campaign
+from graph_api import AdaptiveThrottle, GraphApiClient
+from graph_api_mock import MockGraphApiServer
+
+PARAMS = {'product': "FIV", 'industry': "Santé/Médical", 'target_region': "Europe", 'tone': "Émotionnel",
+          'age_range': "25-35", 'daily_budget': 50}
+
+# Quota simulé : 25 opérations par fenêtre d'une demi-seconde, soit environ la moitié d'un lot de 48
+THROTTLED = {"usage_per_call": 4.0, "window_seconds": 0.5}
+
+
+def _campaign(agent: FacebookAdsAgent) -> dict:
+    results = generate_campaign(agent, PARAMS)
+    return {'campaign_name': "Benchmark", **PARAMS, 'ad_copy': results['ad_copy'], 'audience': results['audience'],
+            'budget': 50, 'objective': "Conversions"}
+
+
+def _export(campaign: dict, n_campaigns: int, **mock_kwargs) -> dict:
+    """Exporte n campagnes et vérifie que chacune a exactement une campagne, un ad set, un créatif et une publicité"""
+    with MockGraphApiServer(**mock_kwargs) as server:
+        # Les quotas sont ceux du serveur simulé : le client ne ralentit pas de lui-même
+        client = GraphApiClient("mock", "act_mock", graph_url=server.url,
+                                throttle=AdaptiveThrottle(soft_limit=100.0, hard_limit=101.0))
+        campaigns = ({**campaign, 'campaign_name': f"Benchmark #{i}"} for i in range(n_campaigns))
+        start = time.perf_counter()
+        exported = list(client.export_campaigns(campaigns, page_id="mock", link_url="https://example.com"))
+        seconds = time.perf_counter() - start
+        client.close()
+        created = Counter(item["type"] for item in server.api.objects.values())
+    errors = sum(bool(item["errors"]) for item in exported)
+    expected = {"campaigns": n_campaigns, "adsets": n_campaigns, "adcreatives": n_campaigns, "ads": n_campaigns}
+    if errors or dict(created) != expected:
+        raise AssertionError(f"Objets créés {dict(created)} au lieu de {expected} ({errors} campagne(s) en erreur)")
+    return {
+        "campaigns": n_campaigns,
+        "http_requests": server.api.http_requests,
+        "operations": server.api.operations,
+        "seconds": seconds,
+        "campaigns_per_second": n_campaigns / seconds
+    }
+
+
+def run(n_campaigns: int = 1000, n_throttled: int = 60) -> dict:
+    campaign = _campaign(FacebookAdsAgent())
+    return {
+        "unlimited": _export(campaign, n_campaigns, usage_per_call=0.0),
+        "throttled": _export(campaign, n_throttled, **THROTTLED)
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_throttled = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    result = run(n, n_throttled)
+    for label, key in (("Sans limitation", "unlimited"), ("Avec limitation", "throttled")):
+        export = result[key]
+        print(f"{label:<16} : {export['campaigns']:,} campagnes · {export['http_requests']:,} appels HTTP · "
+              f"{export['operations']:,} opérations · {export['campaigns_per_second']:,.1f} campagnes/s · "
+              f"objets créés vérifiés")
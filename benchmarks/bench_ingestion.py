@@ -0,0 +1,91 @@
+# Rejoue des relevés horaires dans le pipeline d'ingestion : débit, fraîcheur et reprise depuis le journal
+# Usage : python -m benchmarks.bench_ingestion [nombre_de_publicités] [nombre_de_jours]
+
+import math
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import instrumentation
+from insights_stream import Backpressure, IngestionPipeline, InsightsLog, SyntheticFeed
+from kpi_rollups import KpiRollup
+from metrics_store import MetricsStore
+
+
+def _snapshots(n_ads: int, n_days: int):
+    """Relevés horaires successifs (totaux à date de la journée) pour toutes les publicités"""
+    feed = SyntheticFeed(pipeline=None, start=date(2025, 1, 1), n_ads=n_ads)
+    for _ in range(n_days * 24):
+        yield feed.snapshot()
+        feed.hour += 1
+        if feed.hour == 24:
+            feed.day += timedelta(days=1)
+            feed.hour = 0
+
+
+def run(n_ads: int = 5000, n_days: int = 3) -> dict:
+    snapshots = list(_snapshots(n_ads, n_days))
+    rows = sum(len(snapshot) for snapshot in snapshots)
+    instrumentation.reset()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = MetricsStore(os.path.join(directory, "metrics"))
+        log = InsightsLog(os.path.join(directory, "wal"))
+        rollup = KpiRollup()
+        pipeline = IngestionPipeline(log, rollup, store, max_pending=16, flush_interval=3600.0).start()
+
+        waits = 0
+        start = time.perf_counter()
+        for snapshot in snapshots:
+            while True:
+                try:
+                    pipeline.submit(snapshot, timeout=0.01)
+                    break
+                except Backpressure:
+                    waits += 1
+        pipeline.drain()
+        seconds = time.perf_counter() - start
+        p50, p95, p99 = instrumentation.histogram("ingest/freshness").percentiles(0.5, 0.95, 0.99)
+        live_totals = rollup.totals(date(2025, 1, 1), date(2025, 12, 31))
+
+        # Reprise après un arrêt brutal : rien n'a encore été écrit dans le store
+        pipeline._stop.set()
+        log.close()
+        recovered = KpiRollup()
+        start = time.perf_counter()
+        replayed = IngestionPipeline(InsightsLog(log.path), recovered, store).recover()
+        replay_seconds = time.perf_counter() - start
+        recovered_totals = recovered.totals(date(2025, 1, 1), date(2025, 12, 31))
+        # Lots regroupés différemment à la reprise : sommes flottantes égales à l'arrondi près
+        if any(not math.isclose(recovered_totals[key], value, rel_tol=1e-9) for key, value in live_totals.items()):
+            raise AssertionError("Agrégats différents après reprise depuis le journal")
+
+    return {
+        "rows": rows,
+        "batches_submitted": len(snapshots),
+        "batches_applied": pipeline.batches,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds,
+        "backpressure_waits": waits,
+        "freshness_p50_ms": p50 * 1e3,
+        "freshness_p95_ms": p95 * 1e3,
+        "freshness_p99_ms": p99 * 1e3,
+        "replayed_rows": replayed,
+        "replay_rows_per_second": replayed / replay_seconds
+    }
+
+
+if __name__ == "__main__":
+    n_ads = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_days = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    result = run(n_ads, n_days)
+    print(f"Relevés          : {result['batches_submitted']:,} lots, {result['rows']:,} lignes "
+          f"({result['batches_applied']:,} micro-lots appliqués)")
+    print(f"Débit            : {result['rows_per_second']:,.0f} lignes/s "
+          f"({result['backpressure_waits']:,} attentes de contre-pression)")
+    print(f"Fraîcheur        : p50 {result['freshness_p50_ms']:.0f} ms · p95 {result['freshness_p95_ms']:.0f} ms · "
+          f"p99 {result['freshness_p99_ms']:.0f} ms")
+    print(f"Reprise          : {result['replayed_rows']:,} lignes rejouées à "
+          f"{result['replay_rows_per_second']:,.0f} lignes/s")
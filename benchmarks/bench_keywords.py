@@ -0,0 +1,54 @@
+# Mesure l'expansion et la déduplication de mots-clés en flux (durée et mémoire de pointe)
+# Usage : python -m benchmarks.bench_keywords [nombre_de_candidats]
+
+import itertools
+import sys
+import time
+import tracemalloc
+
+from ads_agent import FacebookAdsAgent
+from keyword_expansion import MinHashDeduplicator, iter_candidates, iter_unique
+
+PRODUCT, INDUSTRY = "FIV", "Santé/Médical"
+
+
+def _candidates(agent: FacebookAdsAgent, n_candidates: int):
+    # Toutes les régions à la suite pour disposer d'assez de combinaisons
+    seeds = agent.generate_keywords(PRODUCT, INDUSTRY, "Europe")
+    countries = [country for region in agent.countries.values() for country in region]
+    return itertools.islice(iter_candidates([PRODUCT, *seeds], INDUSTRY, countries), n_candidates)
+
+
+def run(n_candidates: int = 100_000) -> dict:
+    agent = FacebookAdsAgent()
+
+    deduplicator = MinHashDeduplicator()
+    start = time.perf_counter()
+    unique = sum(1 for _ in iter_unique(_candidates(agent, n_candidates), deduplicator))
+    seconds = time.perf_counter() - start
+
+    # Deuxième passe sous tracemalloc (plus lente) pour la mémoire de pointe
+    tracemalloc.start()
+    for _ in iter_unique(_candidates(agent, n_candidates)):
+        pass
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "candidates": n_candidates,
+        "unique": unique,
+        **deduplicator.stats(),
+        "seconds": seconds,
+        "candidates_per_second": n_candidates / seconds,
+        "peak_mb": peak_bytes / 1e6
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    result = run(n)
+    print(f"Candidats       : {result['candidates']:,}")
+    print(f"Retenus         : {result['unique']:,} (doublons exacts {result['exact_duplicates']:,}, "
+          f"quasi-doublons {result['near_duplicates']:,})")
+    print(f"Durée           : {result['seconds']:.2f}s ({result['candidates_per_second']:,.0f} candidats/s)")
+    print(f"Mémoire de pointe : {result['peak_mb']:.0f} Mo")
@@ -0,0 +1,149 @@
+# Test de charge sans navigateur : plusieurs sessions AppTest simultanées parcourent l'application
+# Usage : python -m benchmarks.bench_load [utilisateurs,utilisateurs,...] [parcours_par_utilisateur]
+#
+# AppTest crée et détruit le Runtime Streamlit (singleton du processus) à chaque exécution : deux sessions
+# ne peuvent pas tourner dans le même processus. Chaque utilisateur simulé a donc son processus, comme
+# autant de workers partageant les mêmes stockages (store de métriques, bibliothèque, stockage partagé).
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.harness import ENTRY_POINT, ROOT, check, isolated_env, peak_rss_mb, select_page
+from instrumentation import LatencyHistogram
+from shared_store import SHARED_STORE_ENV
+
+USER_COUNTS = (1, 4, 8)
+ITERATIONS = 5
+ACTIONS = ("first_render", "builder", "generate_campaign", "analytics", "analytics_rerun", "template_library",
+           "template_search")
+
+
+def _journey(at, user: int, iteration: int, record) -> None:
+    """Parcours type : génération d'une campagne, tableau de bord, recherche dans la bibliothèque"""
+    record("builder", lambda: select_page(at, "Créer une campagne"))
+    at.text_input[0].input(f"Campagne {user}-{iteration}")
+    record("generate_campaign", lambda: at.button[0].click().run())
+    record("analytics", lambda: select_page(at, "Analyser les performances"))
+    record("analytics_rerun", at.run)
+    record("template_library", lambda: select_page(at, "Bibliothèque de templates"))
+    record("template_search", lambda: at.text_input[0].input("FIV" if iteration % 2 else "Istanbul").run())
+
+
+def user_session(user: int, iterations: int) -> dict:
+    """Exécuté dans le processus d'un utilisateur : chauffe, attente du départ commun, parcours mesurés"""
+    from streamlit.testing.v1 import AppTest
+
+    # Chauffe hors mesure (imports, caches du processus), dans une session jetable
+    warmup = AppTest.from_file(ENTRY_POINT, default_timeout=600)
+    warmup.run()
+    _journey(warmup, user, -1, lambda name, action: action())
+    check(warmup)
+    print("ready", flush=True)
+    sys.stdin.readline()
+
+    samples, errors = [], []
+
+    def record(name, action):
+        start = time.perf_counter()
+        action()
+        samples.append((name, time.perf_counter() - start))
+        if at.exception:
+            errors.append(f"{name} : {at.exception[0].value}")
+
+    at = AppTest.from_file(ENTRY_POINT, default_timeout=600)
+    try:
+        record("first_render", at.run)
+        for iteration in range(iterations):
+            _journey(at, user, iteration, record)
+    except Exception as exc:
+        errors.append(f"utilisateur {user} : {exc!r}")
+    return {"samples": samples, "errors": errors, "finished_at": time.time(), "peak_rss_mb": peak_rss_mb()}
+
+
+def _spawn(user: int, iterations: int, env: dict) -> subprocess.Popen:
+    code = ("import json, sys; from benchmarks.bench_load import user_session; "
+            "print(json.dumps(user_session(int(sys.argv[1]), int(sys.argv[2]))))")
+    return subprocess.Popen([sys.executable, "-c", code, str(user), str(iterations)], cwd=ROOT, env=env,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def _result(process: subprocess.Popen) -> dict:
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"Session de test de charge en échec :\n{stderr[-2000:]}")
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def load_test(n_users: int, iterations: int, env: dict) -> dict:
+    # Données de démonstration créées une seule fois, avant l'arrivée simultanée des utilisateurs
+    _result(_spawn(-1, 0, env))
+
+    processes = [_spawn(user, iterations, env) for user in range(n_users)]
+    try:
+        for process in processes:
+            if process.stdout.readline().strip() != "ready":
+                raise RuntimeError(f"Session de test de charge en échec :\n{process.communicate()[1][-2000:]}")
+        started_at = time.time()
+        for process in processes:
+            process.stdin.write("go\n")
+            process.stdin.flush()
+        sessions = [_result(process) for process in processes]
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+    wall = max(session["finished_at"] for session in sessions) - started_at
+
+    histograms = {name: LatencyHistogram() for name in ACTIONS}
+    overall = LatencyHistogram()
+    for session in sessions:
+        for name, seconds in session["samples"]:
+            histograms[name].observe(seconds)
+            overall.observe(seconds)
+    errors = [error for session in sessions for error in session["errors"]]
+    return {
+        "users": n_users,
+        "reruns": overall.count,
+        "wall_seconds": wall,
+        "reruns_per_second": overall.count / wall,
+        "latency": overall.summary(),
+        "actions": {name: histogram.summary() for name, histogram in histograms.items()},
+        "peak_rss_mb": max(session["peak_rss_mb"] for session in sessions),
+        "total_peak_rss_mb": sum(session["peak_rss_mb"] for session in sessions),
+        "errors": errors[:10],
+        "error_count": len(errors)
+    }
+
+
+def run(user_counts=USER_COUNTS, iterations: int = ITERATIONS) -> dict:
+    results = {}
+    for n_users in user_counts:
+        directory = tempfile.mkdtemp(prefix="bench_load_")
+        try:
+            env = isolated_env(directory)
+            # Campagnes et caches partagés entre les processus, comme entre workers
+            env[SHARED_STORE_ENV] = os.path.join(directory, "shared_store.db")
+            results[str(n_users)] = load_test(n_users, iterations, env)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return {"iterations": iterations, "cpus": os.cpu_count(), "users": results}
+
+
+if __name__ == "__main__":
+    users = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else USER_COUNTS
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else ITERATIONS
+    result = run(users, n)
+    print(f"{result['iterations']} parcours par utilisateur · {result['cpus']} CPU")
+    for n_users, load in result["users"].items():
+        latency = load["latency"]
+        print(f"{n_users:>3} utilisateur(s) · {load['reruns']} reruns en {load['wall_seconds']:.1f}s "
+              f"({load['reruns_per_second']:.1f}/s) · p50 {latency['p50_ms']:.0f} ms · p95 {latency['p95_ms']:.0f} ms · "
+              f"p99 {latency['p99_ms']:.0f} ms · pic mémoire {load['peak_rss_mb']:.0f} Mo/processus "
+              f"({load['total_peak_rss_mb']:.0f} Mo au total) · erreurs {load['error_count']}")
+        for error in load["errors"]:
+            print(f"      ⚠️ {error}")
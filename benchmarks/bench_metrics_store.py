@@ -0,0 +1,61 @@
+# Mesure les lectures du store de métriques sur un gros jeu synthétique
+# Usage : python -m benchmarks.bench_metrics_store [nombre_de_publicités]
+
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+from metrics_store import MetricsStore, generate_synthetic_insights
+
+START = date(2023, 1, 1)
+END = date(2025, 12, 31)
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(n_ads: int = 10_000, ads_per_write: int = 2_500) -> dict:
+    path = tempfile.mkdtemp(prefix="metrics_store_")
+    try:
+        store = MetricsStore(path)
+        rows = 0
+        start = time.perf_counter()
+        # Écriture par lots pour garder une mémoire bornée
+        for seed, offset in enumerate(range(0, n_ads, ads_per_write)):
+            insights = generate_synthetic_insights(START, END, n_ads=min(ads_per_write, n_ads - offset), seed=seed)
+            rows += store.append(insights)
+        write_seconds = time.perf_counter() - start
+
+        _, bounds_seconds = _timed(store.date_bounds)
+        _, quarter_seconds = _timed(
+            lambda: store.daily_totals(date(2025, 1, 1), date(2025, 3, 31), ["impressions", "conversions"]))
+        _, full_seconds = _timed(lambda: store.daily_totals(START, END))
+        frame, load_seconds = _timed(
+            lambda: store.load(date(2025, 1, 1), date(2025, 12, 31), ["date", "impressions"]))
+        return {
+            "rows": rows,
+            "write_seconds": write_seconds,
+            "bounds_seconds": bounds_seconds,
+            "quarter_totals_seconds": quarter_seconds,
+            "full_totals_seconds": full_seconds,
+            "year_load_rows": len(frame),
+            "year_load_seconds": load_seconds
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    result = run(n)
+    print(f"Lignes écrites              : {result['rows']:,} en {result['write_seconds']:.1f}s")
+    print(f"Bornes de dates             : {result['bounds_seconds'] * 1e3:.1f} ms")
+    print(f"Totaux quotidiens (1 trim.) : {result['quarter_totals_seconds'] * 1e3:.1f} ms")
+    print(f"Totaux quotidiens (3 ans)   : {result['full_totals_seconds'] * 1e3:.1f} ms")
+    print(f"Chargement 1 an, 2 colonnes : {result['year_load_rows']:,} lignes en "
+          f"{result['year_load_seconds'] * 1e3:.1f} ms")
@@ -0,0 +1,53 @@
+# Mesure l'ajustement des courbes de réponse et l'allocation d'un budget total sur de nombreuses campagnes
+# Usage : python -m benchmarks.bench_optimizer [nombre_de_campagnes]
+
+import sys
+import time
+
+import numpy as np
+
+from budget_optimizer import fit_response_curves, optimize
+
+
+def run(n_campaigns: int = 10_000, days: int = 90, seed: int = 0) -> dict:
+    """Historique synthétique à rendements décroissants, puis ajustement et allocation"""
+    rng = np.random.default_rng(seed)
+    elasticity = rng.uniform(0.3, 0.9, n_campaigns)
+    scale = rng.uniform(0.05, 0.5, n_campaigns)
+    spend = rng.uniform(10, 300, (n_campaigns, days))
+    conversions = rng.poisson(scale[:, None] * spend ** elasticity[:, None])
+    names = [f"campaign_{i}" for i in range(n_campaigns)]
+
+    start = time.perf_counter()
+    curves = fit_response_curves(names, spend, conversions)
+    fit_seconds = time.perf_counter() - start
+
+    current = spend.mean(axis=1)
+    start = time.perf_counter()
+    result = optimize(curves, current.sum(), current=current, min_budget=5, max_budget=500)
+    allocate_seconds = time.perf_counter() - start
+
+    # À l'optimum, le gain marginal est le même pour toutes les campagnes non bornées
+    interior = (result["budget"] > 5 + 1e-6) & (result["budget"] < 500 - 1e-6)
+    marginal = curves.marginal(result["budget"])[interior]
+    if marginal.size and marginal.max() - marginal.min() > 1e-6 * marginal.max():
+        raise AssertionError("Gains marginaux non égalisés : allocation non optimale")
+
+    return {
+        "campaigns": n_campaigns,
+        "fit_seconds": fit_seconds,
+        "allocate_seconds": allocate_seconds,
+        "elasticity_correlation": float(np.corrcoef(curves.elasticity, elasticity)[0, 1]),
+        "current_conversions": float(result["current_conversions"].sum()),
+        "optimized_conversions": float(result["conversions"].sum())
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    result = run(n)
+    print(f"Campagnes            : {result['campaigns']:,}")
+    print(f"Ajustement           : {result['fit_seconds'] * 1e3:.1f} ms "
+          f"(corrélation élasticité {result['elasticity_correlation']:.2f})")
+    print(f"Allocation           : {result['allocate_seconds'] * 1e3:.1f} ms")
+    print(f"Conversions/jour     : {result['current_conversions']:,.0f} → {result['optimized_conversions']:,.0f}")
@@ -0,0 +1,140 @@
+# Mesure les pages « Analyser les performances » et « Bibliothèque de templates » sur des jeux de taille croissante
+# Usage : python -m benchmarks.bench_pages [lignes,lignes,...] [templates,templates,...]
+
+import shutil
+import sys
+import tempfile
+from datetime import date
+
+import numpy as np
+
+from benchmarks.harness import (ENTRY_POINT, check, elapsed_ms, isolated_env, peak_rss_mb, run_in_subprocess,
+                                select_page)
+
+ROW_COUNTS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+TEMPLATE_COUNTS = (100, 1_000, 10_000)
+
+START = date(2025, 1, 1)
+END = date(2025, 12, 31)
+# Publicités écrites par lot (environ 900 000 lignes) : mémoire bornée même pour 10 millions de lignes
+ADS_PER_WRITE = 2_500
+
+
+def populate_metrics(path: str, n_rows: int) -> int:
+    from metrics_store import MetricsStore, generate_synthetic_insights
+
+    store = MetricsStore(path)
+    n_ads = max(round(n_rows / ((END - START).days + 1)), 1)
+    rows = 0
+    for seed, offset in enumerate(range(0, n_ads, ADS_PER_WRITE)):
+        rows += store.append(generate_synthetic_insights(START, END, n_ads=min(ADS_PER_WRITE, n_ads - offset),
+                                                         seed=seed))
+    return rows
+
+
+def populate_templates(path: str, n_templates: int, seed: int = 0) -> int:
+    from ads_agent import FacebookAdsAgent
+    from template_store import TemplateStore
+
+    agent = FacebookAdsAgent()
+    store = TemplateStore(path)
+    rng = np.random.default_rng(seed)
+    combos = [(industry, product, region, tone) for industry, products in agent.industries.items()
+              for product in products for region in agent.countries for tone in agent.templates.tones()]
+    for i in range(n_templates):
+        industry, product, region, tone = combos[i % len(combos)]
+        campaign_data = {
+            "campaign_name": f"{product} {region} #{i}",
+            "product": product,
+            "industry": industry,
+            "target_region": region,
+            "tone": tone,
+            "age_range": "25-35",
+            "keywords": agent.generate_keywords(product, industry, region),
+            "ad_copy": agent.generate_ad_copy(product, region, industry, tone),
+            "audience": agent.generate_audience_targeting(industry, region, "25-35"),
+            "performance": agent.estimate_performance(50 * 30, industry),
+            "budget": 50,
+            "objective": "Génération de leads"
+        }
+        impressions = int(rng.integers(0, 50_000))
+        store.save(campaign_data, impressions=impressions, clicks=int(impressions * rng.uniform(0.005, 0.04)))
+    return n_templates
+
+
+def probe_analytics() -> dict:
+    """Exécuté dans un processus neuf : premier affichage (agrégats construits), rerun, changement de granularité"""
+    from streamlit.testing.v1 import AppTest
+
+    from kpi_rollups import FREQUENCIES
+
+    at = AppTest.from_file(ENTRY_POINT, default_timeout=1800)
+    at.run()
+    first = elapsed_ms(lambda: select_page(at, "Analyser les performances"))
+    check(at)
+    rerun = elapsed_ms(at.run)
+    granularity = next(radio for radio in at.radio if radio.label == "Granularité")
+    regroup = elapsed_ms(lambda: granularity.set_value(list(FREQUENCIES)[-1]).run())
+    check(at)
+    return {"first_render_ms": first, "rerun_ms": rerun, "granularity_ms": regroup, "peak_rss_mb": peak_rss_mb()}
+
+
+def probe_template_library() -> dict:
+    """Exécuté dans un processus neuf : première page, rerun, recherche plein texte, filtre par secteur"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(ENTRY_POINT, default_timeout=600)
+    at.run()
+    first = elapsed_ms(lambda: select_page(at, "Bibliothèque de templates"))
+    check(at)
+    rerun = elapsed_ms(at.run)
+    search = elapsed_ms(lambda: at.text_input[0].input("FIV").run())
+    industry = next(box for box in at.selectbox if box.label == "Secteur")
+    filtered = elapsed_ms(lambda: industry.set_value(industry.options[1]).run())
+    check(at)
+    return {"first_render_ms": first, "rerun_ms": rerun, "search_ms": search, "filter_ms": filtered,
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def _measure(populate, count: int, probe: str) -> dict:
+    directory = tempfile.mkdtemp(prefix="bench_pages_")
+    try:
+        env = isolated_env(directory)
+        stored = populate(env, count)
+        return {"stored": stored, **run_in_subprocess(probe, env=env)}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run(row_counts=ROW_COUNTS, template_counts=TEMPLATE_COUNTS) -> dict:
+    from metrics_store import METRICS_PATH_ENV
+    from template_store import TEMPLATES_DB_ENV
+
+    return {
+        "analytics": {
+            str(n): _measure(lambda env, n: populate_metrics(env[METRICS_PATH_ENV], n), n,
+                             "benchmarks.bench_pages.probe_analytics")
+            for n in row_counts
+        },
+        "template_library": {
+            str(n): _measure(lambda env, n: populate_templates(env[TEMPLATES_DB_ENV], n), n,
+                             "benchmarks.bench_pages.probe_template_library")
+            for n in template_counts
+        }
+    }
+
+
+if __name__ == "__main__":
+    rows = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else ROW_COUNTS
+    templates = [int(n) for n in sys.argv[2].split(",")] if len(sys.argv) > 2 else TEMPLATE_COUNTS
+    result = run(rows, templates)
+    print("Analyser les performances")
+    for timings in result["analytics"].values():
+        print(f"  {timings['stored']:>12,} lignes · 1er affichage {timings['first_render_ms']:8.0f} ms · "
+              f"rerun {timings['rerun_ms']:6.0f} ms · granularité {timings['granularity_ms']:6.0f} ms · "
+              f"pic mémoire {timings['peak_rss_mb']:6.0f} Mo")
+    print("Bibliothèque de templates")
+    for timings in result["template_library"].values():
+        print(f"  {timings['stored']:>12,} templates · 1er affichage {timings['first_render_ms']:6.0f} ms · "
+              f"rerun {timings['rerun_ms']:5.0f} ms · recherche {timings['search_ms']:5.0f} ms · "
+              f"filtre {timings['filter_ms']:5.0f} ms · pic mémoire {timings['peak_rss_mb']:5.0f} Mo")
@@ -0,0 +1,63 @@
+# Mesure la sérialisation (msgpack contre json) et la relecture des campagnes dans le stockage partagé
+# Usage : python -m benchmarks.bench_shared_store [nombre_de_campagnes]
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from ads_agent import FacebookAdsAgent
+from campaign_pipeline import generate_campaign
+from shared_store import LocalRedis, SQLiteBackend, SharedStore, load_campaign, pack, save_campaign, unpack
+
+PARAMS = {'product': "FIV", 'industry': "Santé/Médical", 'target_region': "Europe", 'tone': "Émotionnel",
+          'age_range': "25-35", 'daily_budget': 50}
+
+
+def _campaign(agent: FacebookAdsAgent) -> dict:
+    results = generate_campaign(agent, PARAMS)
+    return {'campaign_name': "Benchmark", **PARAMS, 'keywords': results['keywords'], 'ad_copy': results['ad_copy'],
+            'audience': results['audience'], 'performance': results['performance'], 'budget': 50,
+            'objective': "Conversions"}
+
+
+def _per_call_us(func, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def run(n_campaigns: int = 2000) -> dict:
+    campaign = _campaign(FacebookAdsAgent())
+    encoded_json = json.dumps(campaign, ensure_ascii=False).encode("utf-8")
+    encoded = pack(campaign)
+    result = {
+        "json_bytes": len(encoded_json),
+        "msgpack_bytes": len(encoded),
+        "json_decode_us": _per_call_us(lambda: json.loads(encoded_json), 10_000),
+        "msgpack_decode_us": _per_call_us(lambda: unpack(encoded), 10_000)
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {"sqlite": SQLiteBackend(os.path.join(directory, "store.db")), "memory": LocalRedis()}
+        for name, backend in backends.items():
+            store = SharedStore(backend)
+            ids = [save_campaign(store, campaign) for _ in range(n_campaigns)]
+            full = iter(ids)
+            lazy = iter(ids)
+            result[f"{name}_full_us"] = _per_call_us(lambda: dict(load_campaign(store, next(full))), n_campaigns)
+            result[f"{name}_one_field_us"] = _per_call_us(
+                lambda: load_campaign(store, next(lazy))['performance'], n_campaigns)
+    return result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    result = run(n)
+    print(f"Taille           : json {result['json_bytes']:,} o · msgpack {result['msgpack_bytes']:,} o")
+    print(f"Désérialisation  : json {result['json_decode_us']:.1f} µs · msgpack {result['msgpack_decode_us']:.1f} µs")
+    for name in ("sqlite", "memory"):
+        print(f"Relecture {name:<7}: complète {result[f'{name}_full_us']:.0f} µs · "
+              f"un champ {result[f'{name}_one_field_us']:.0f} µs")
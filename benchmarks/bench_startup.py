@@ -0,0 +1,71 @@
+# Mesure le démarrage à froid (time-to-first-render) et la latence des reruns de chaque page
+# Usage : python -m benchmarks.bench_startup [nombre_d_essais]
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINT = os.path.join(ROOT, "facebook_ads_agent.py")
+
+# Exécuté dans un processus neuf pour que rien ne soit déjà importé
+_PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_ms = (time.perf_counter() - start) * 1e3
+
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+run_start = time.perf_counter()
+at.run()
+first_render_ms = (time.perf_counter() - run_start) * 1e3
+heavy = {name: name in sys.modules for name in ("pandas", "pyarrow", "plotly.express", "requests")}
+
+pages = {}
+nav = lambda: next(box for box in at.sidebar.selectbox if box.label == "Choisir une section")
+for page in nav().options:
+    t = time.perf_counter()
+    nav().select(page).run()
+    first = (time.perf_counter() - t) * 1e3
+    t = time.perf_counter()
+    at.run()
+    pages[page] = {"first_ms": first, "rerun_ms": (time.perf_counter() - t) * 1e3}
+
+print(json.dumps({"streamlit_import_ms": streamlit_ms, "first_render_ms": first_render_ms,
+                  "time_to_first_render_ms": streamlit_ms + first_render_ms,
+                  "heavy_modules_after_first_render": heavy, "pages": pages}))
+"""
+
+
+def probe() -> dict:
+    output = subprocess.run([sys.executable, "-c", _PROBE, ENTRY_POINT], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(trials: int = 3) -> dict:
+    results = [probe() for _ in range(trials)]
+    median = lambda values: statistics.median(values)
+    return {
+        "trials": trials,
+        "time_to_first_render_ms": median([r["time_to_first_render_ms"] for r in results]),
+        "first_render_ms": median([r["first_render_ms"] for r in results]),
+        "heavy_modules_after_first_render": results[-1]["heavy_modules_after_first_render"],
+        "pages": {
+            page: {key: median([r["pages"][page][key] for r in results]) for key in ("first_ms", "rerun_ms")}
+            for page in results[-1]["pages"]
+        }
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    result = run(n)
+    print(f"Time-to-first-render (médiane sur {n}) : {result['time_to_first_render_ms']:.0f} ms "
+          f"(dont rendu {result['first_render_ms']:.0f} ms)")
+    loaded = [name for name, present in result["heavy_modules_after_first_render"].items() if present]
+    print(f"Modules lourds chargés au premier rendu : {', '.join(loaded) or 'aucun'}")
+    for page, timings in result["pages"].items():
+        print(f"  {page:<28} 1er affichage {timings['first_ms']:7.0f} ms · rerun {timings['rerun_ms']:6.0f} ms")
@@ -0,0 +1,102 @@
+# Mesure le chargement du registre de templates et la latence de rendu
+# Usage : python -m benchmarks.bench_templates [nombre_de_secteurs]
+
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from ad_templates import DEFAULT_TEMPLATES_PATH, TemplateRegistry
+
+TONES = ["Professionnel", "Émotionnel", "Urgence", "Humour", "Luxe", "Éducatif", "Témoignage", "Promo"]
+LANGUAGES = ["fr", "en", "ar", "es", "de"]
+
+
+def _legacy_ad_copy(product: str, tone: str) -> dict:
+    """Ancienne implémentation : dictionnaire de f-strings reconstruit à chaque appel"""
+    templates = {
+        "Professionnel": {
+            "headline": f"🏆 {product} - Excellence et Expertise Reconnues",
+            "primary": f"Découvrez notre {product} de qualité supérieure. Équipe d'experts, résultats garantis.",
+            "description": f"Plus de 1000 clients satisfaits. Devis gratuit sous 24h."
+        },
+        "Émotionnel": {
+            "headline": f"💖 Réalisez Votre Rêve avec {product}",
+            "primary": f"Votre bonheur nous tient à cœur. {product} personnalisé selon vos besoins.",
+            "description": f"Accompagnement complet de A à Z. Équipe bienveillante à votre écoute."
+        },
+        "Urgence": {
+            "headline": f"⚡ Offre Limitée - {product} -50%",
+            "primary": f"Profitez de cette promotion exceptionnelle sur {product}. Places limitées!",
+            "description": f"Réservez maintenant. Offre valable jusqu'au {(datetime.now() + timedelta(days=7)).strftime('%d/%m/%Y')}"
+        }
+    }
+    return templates.get(tone, templates["Professionnel"])
+
+
+def _synthetic_templates(n_industries: int) -> dict:
+    """Registre synthétique : secteurs × tons × langues"""
+    with open(DEFAULT_TEMPLATES_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    base = data["ad_copy"][0]
+    for i in range(n_industries):
+        industry = f"Secteur {i}"
+        data["keywords"][industry] = [f"{{product}} {i}", f"meilleur {{product}} {i}", "offre spéciale"]
+        for tone in TONES:
+            for language in LANGUAGES:
+                data["ad_copy"].append({
+                    "industry": industry, "tone": tone, "language": language,
+                    "headline": f"{base['headline']} [{tone}/{language}]",
+                    "primary": base["primary"],
+                    "description": f"{base['description']} {{offer_end}}"
+                })
+    return data
+
+
+def _per_call_us(func, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def run(n_industries: int = 100, n_renders: int = 100_000) -> dict:
+    data = _synthetic_templates(n_industries)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        path = f.name
+    try:
+        start = time.perf_counter()
+        registry = TemplateRegistry.load(path)
+        load_ms = (time.perf_counter() - start) * 1e3
+    finally:
+        os.remove(path)
+
+    industry = f"Secteur {n_industries // 2}"
+    products = [f"Produit {i}" for i in range(n_renders)]
+    start = time.perf_counter()
+    registry.render_ad_copy_many(products, industry, "Urgence", "en", offer_end="01/01/2026")
+    bulk_us = (time.perf_counter() - start) / n_renders * 1e6
+
+    return {
+        "templates": len(registry),
+        "load_ms": load_ms,
+        "render_us": _per_call_us(
+            lambda: registry.render_ad_copy("FIV", industry, "Urgence", "en", offer_end="01/01/2026"), 20_000),
+        "legacy_render_us": _per_call_us(lambda: _legacy_ad_copy("FIV", "Urgence"), 20_000),
+        "bulk_render_us": bulk_us,
+        "keywords_us": _per_call_us(lambda: registry.render_keywords("FIV", industry), 20_000)
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    result = run(n)
+    print(f"Templates chargés          : {result['templates']:,}")
+    print(f"Chargement du registre     : {result['load_ms']:.1f} ms")
+    print(f"Rendu d'un texte           : {result['render_us']:.2f} µs")
+    print(f"Rendu (ancien dict inline) : {result['legacy_render_us']:.2f} µs")
+    print(f"Rendu en lot (par texte)   : {result['bulk_render_us']:.2f} µs")
+    print(f"Rendu des mots-clés        : {result['keywords_us']:.2f} µs")
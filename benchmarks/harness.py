@@ -0,0 +1,76 @@
+# Outils communs aux mesures de pages Streamlit : processus isolé, stockages temporaires, navigation AppTest
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict
+
+from agent_cache import CACHE_PATH_ENV, SHARED_STORE_ENV
+from insights_stream import INGEST_WAL_ENV
+from metrics_store import METRICS_PATH_ENV
+from template_store import TEMPLATES_DB_ENV
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINT = os.path.join(ROOT, "facebook_ads_agent.py")
+NAV_LABEL = "Choisir une section"
+
+
+def isolated_env(directory: str) -> Dict[str, str]:
+    """Environnement dont tous les stockages de l'application sont dans `directory` (données réelles intactes)"""
+    env = {name: value for name, value in os.environ.items() if name != CACHE_PATH_ENV}
+    env.update({
+        METRICS_PATH_ENV: os.path.join(directory, "metrics"),
+        TEMPLATES_DB_ENV: os.path.join(directory, "templates.db"),
+        INGEST_WAL_ENV: os.path.join(directory, "ingest_wal"),
+        SHARED_STORE_ENV: "memory://"
+    })
+    return env
+
+
+def run_in_subprocess(function: str, *args: Any, env: Dict[str, str] = None) -> Any:
+    """Appelle benchmarks.<module>.<fonction>(*args) dans un processus neuf et renvoie son résultat JSON
+
+    Chaque mesure part ainsi de caches Streamlit vides, et le pic mémoire n'est pas faussé par la précédente.
+    """
+    module, name = function.rsplit(".", 1)
+    code = f"import json, sys; from {module} import {name}; print(json.dumps({name}(*json.loads(sys.argv[1]))))"
+    completed = subprocess.run([sys.executable, "-c", code, json.dumps(args)], cwd=ROOT, env=env,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{function} a échoué :\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus (Mo)"""
+    # Sous Linux, ru_maxrss survit à execve (pic du processus parent) : VmHWM repart de zéro
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilo-octets sous Linux, octets sous macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def elapsed_ms(action: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    action()
+    return (time.perf_counter() - start) * 1e3
+
+
+def select_page(at, page: str):
+    """Navigue vers une page de l'application et relance le script"""
+    nav = next(box for box in at.sidebar.selectbox if box.label == NAV_LABEL)
+    return nav.select(page).run()
+
+
+def check(at) -> None:
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
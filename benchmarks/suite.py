@@ -0,0 +1,214 @@
+# Lance l'ensemble des benchmarks, enregistre les résultats en JSON et les compare à une référence
+# Usage : python -m benchmarks.suite [--quick] [--only agent,pages,...] [--repeat 3] [--baseline chemin]
+#                                    [--save-baseline] [--tolerance 0.25] [--output chemin]
+# Code de sortie 1 si une mesure se dégrade au-delà de la tolérance, 2 si un benchmark échoue.
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmarks.harness import ROOT
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+
+# Nom → (module, paramètres du profil complet, paramètres du profil rapide)
+BENCHMARKS = {
+    "agent": ("bench_agent", {}, {"n_calls": 50}),
+    "pages": ("bench_pages", {}, {"row_counts": (1_000, 100_000), "template_counts": (100, 1_000)}),
+    "load": ("bench_load", {}, {"user_counts": (1, 4), "iterations": 3}),
+    "startup": ("bench_startup", {}, {"trials": 1}),
+    "templates": ("bench_templates", {}, {"n_industries": 20, "n_renders": 20_000}),
+    "estimator": ("bench_estimator", {}, {"n_scenarios": 10_000}),
+    "keywords": ("bench_keywords", {}, {"n_candidates": 20_000}),
+    "metrics_store": ("bench_metrics_store", {}, {"n_ads": 1_000}),
+    "optimizer": ("bench_optimizer", {}, {"n_campaigns": 1_000}),
+    "audience": ("bench_audience", {}, {"n_sets": 100}),
+    "shared_store": ("bench_shared_store", {}, {"n_campaigns": 500}),
+    "ab_testing": ("bench_ab_testing", {}, {"n_variants": 2_000}),
+    "ingestion": ("bench_ingestion", {}, {"n_ads": 1_000}),
+    "anomalies": ("bench_anomalies", {}, {"n_campaigns": 2_000}),
+    "graph_api": ("bench_graph_api", {}, {"n_campaigns": 200, "n_throttled": 20})
+}
+
+# Sens de chaque mesure : les autres valeurs (volumes, paramètres) ne sont pas comparées
+LOWER_IS_BETTER_UNITS = {"ms", "us", "seconds", "mb", "bytes"}
+LOWER_IS_BETTER = {"error_count", "best_paused", "false_alerts_per_1000_series_days"}
+HIGHER_IS_BETTER = {"speedup", "recall", "precision", "impressions_saved"}
+# Maximum d'un seul échantillon : affiché mais trop instable pour être comparé
+NOT_COMPARED = {"max_ms"}
+# Durées en dessous de ce seuil (ms) trop bruitées pour être comparées
+NOISE_FLOOR_MS = 1.0
+_TO_MS = {"ms": 1.0, "us": 1e-3, "seconds": 1e3}
+
+
+def run_benchmarks(names: List[str], quick: bool = False, repeat: int = 1) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        module_name, full, fast = BENCHMARKS[name]
+        print(f"▶ {name}…", flush=True)
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(f"benchmarks.{module_name}")
+            results[name] = median_results([module.run(**(fast if quick else full)) for _ in range(repeat)])
+        except Exception:
+            results[name] = {"error": traceback.format_exc(limit=5)}
+            print(f"  ✗ échec :\n{results[name]['error']}", flush=True)
+            continue
+        print(f"  ✓ {time.perf_counter() - start:.1f}s", flush=True)
+    return results
+
+
+def median_results(runs: List[Any]) -> Any:
+    """Médiane, mesure par mesure, de plusieurs exécutions d'un même benchmark"""
+    first = runs[0]
+    if isinstance(first, dict):
+        return {key: median_results([run[key] for run in runs if isinstance(run, dict) and key in run])
+                for key in first}
+    if isinstance(first, (int, float)) and not isinstance(first, bool):
+        return statistics.median(runs)
+    return first
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    """Mesures numériques, indexées par leur chemin (ex. « load.users.4.latency.p95_ms »)"""
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def direction(metric: str) -> int:
+    """+1 si une valeur plus haute est meilleure, -1 si plus basse, 0 si la mesure n'est pas comparée"""
+    name = metric.rsplit(".", 1)[-1]
+    if name in NOT_COMPARED:
+        return 0
+    if name in LOWER_IS_BETTER:
+        return -1
+    if name in HIGHER_IS_BETTER or name.endswith("per_second"):
+        return 1
+    return -1 if LOWER_IS_BETTER_UNITS & set(name.split("_")) else 0
+
+
+def _below_noise_floor(metric: str, *values: float) -> bool:
+    unit = next((unit for unit in metric.rsplit(".", 1)[-1].split("_") if unit in _TO_MS), None)
+    return unit is not None and all(value * _TO_MS[unit] < NOISE_FLOOR_MS for value in values)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """Mesures communes aux deux exécutions, avec leur variation relative et leur statut"""
+    now, before = flatten(current), flatten(baseline)
+    rows = []
+    for metric in sorted(now.keys() & before.keys()):
+        sign = direction(metric)
+        value, reference = now[metric], before[metric]
+        if not sign or _below_noise_floor(metric, value, reference):
+            continue
+        if reference == 0:
+            change = 0.0 if value == 0 else float("inf") * (1 if value > 0 else -1)
+        else:
+            change = (value - reference) / abs(reference)
+        # Variation signée pour que « positif » veuille toujours dire « pire »
+        worse = -sign * change
+        status = "regression" if worse > tolerance else "improvement" if worse < -tolerance else "ok"
+        rows.append({"metric": metric, "baseline": reference, "current": value, "change": change,
+                     "status": status})
+    return rows
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(path: str, report: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de l'agent Facebook Ads")
+    parser.add_argument("--quick", action="store_true", help="profil rapide (petits volumes)")
+    parser.add_argument("--only", help="benchmarks à lancer, séparés par des virgules : " + ", ".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="exécutions par benchmark, médiane conservée (réduit le bruit)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="résultats de référence (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="enregistrer ces résultats comme référence")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="dégradation relative tolérée (0.25 = 25 %%)")
+    parser.add_argument("--output", help="fichier de résultats (par défaut benchmarks/results/<date>.json)")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"benchmark inconnu : {', '.join(unknown)}")
+
+    profile = "quick" if args.quick else "full"
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "profile": profile,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": run_benchmarks(names, quick=args.quick, repeat=max(args.repeat, 1))
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{profile}.json")
+    write_report(output, report)
+    print(f"\nRésultats enregistrés : {os.path.relpath(output, ROOT)}")
+
+    failed = [name for name, result in report["results"].items() if "error" in result]
+    status = 2 if failed else 0
+    if failed:
+        print(f"❌ Benchmarks en échec : {', '.join(failed)}")
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("profile") != profile:
+            print(f"⚠️ Référence mesurée avec le profil « {baseline.get('profile')} », comparaison indicative")
+        rows = compare(report["results"], baseline.get("results", {}), args.tolerance)
+        regressions = [row for row in rows if row["status"] == "regression"]
+        improvements = [row for row in rows if row["status"] == "improvement"]
+        print(f"Comparaison avec {os.path.relpath(args.baseline, ROOT)} (commit {baseline.get('commit')}) : "
+              f"{len(rows)} mesures, {len(regressions)} dégradation(s), {len(improvements)} amélioration(s) "
+              f"au-delà de ±{args.tolerance:.0%}")
+        for label, selected in (("🔴 Dégradation", regressions), ("🟢 Amélioration", improvements)):
+            for row in selected:
+                print(f"  {label} {row['metric']} : {row['baseline']:.4g} → {row['current']:.4g} "
+                      f"({row['change']:+.0%})")
+        if regressions and not status:
+            status = 1
+    elif args.save_baseline:
+        write_report(args.baseline, report)
+        print(f"Référence enregistrée : {os.path.relpath(args.baseline, ROOT)}")
+    else:
+        print("Aucune référence : relancer avec --save-baseline pour enregistrer celle-ci")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# budget_optimizer.py
+# Répartition d'un budget total entre campagnes selon des courbes de réponse concaves
+# conversions(budget) = scale · budget^elasticity, avec 0 < elasticity < 1 (rendements décroissants)
+
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from ads_agent import INDUSTRY_MULTIPLIERS, DEFAULT_MULTIPLIER
+
+# Élasticité utilisée quand l'historique ne permet pas d'ajustement fiable
+DEFAULT_ELASTICITY = 0.7
+MIN_ELASTICITY = 0.1
+MAX_ELASTICITY = 0.95
+
+# Nombre minimal de jours (dépense et conversions > 0) pour ajuster une campagne
+MIN_FIT_DAYS = 14
+
+# Budget quotidien auquel la courbe a priori d'un secteur rejoint l'estimation linéaire de l'agent
+REFERENCE_DAILY_BUDGET = 50.0
+
+_BISECTION_STEPS = 100
+
+
+class ResponseCurves:
+    """Courbes de réponse d'un ensemble de campagnes (conversions quotidiennes en fonction du budget)"""
+
+    def __init__(self, names: Iterable[str], scale: Iterable[float], elasticity: Iterable[float]):
+        self.names = list(names)
+        self.scale = np.asarray(scale, dtype=float)
+        self.elasticity = np.asarray(elasticity, dtype=float)
+        if not (len(self.names) == self.scale.size == self.elasticity.size):
+            raise ValueError("names, scale et elasticity doivent avoir la même longueur")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def conversions(self, budgets: np.ndarray) -> np.ndarray:
+        return self.scale * np.power(np.maximum(budgets, 0.0), self.elasticity)
+
+    def marginal(self, budgets: np.ndarray) -> np.ndarray:
+        """Conversions supplémentaires par euro au budget donné"""
+        with np.errstate(divide="ignore"):
+            return self.scale * self.elasticity * np.power(budgets, self.elasticity - 1)
+
+    def concat(self, other: "ResponseCurves") -> "ResponseCurves":
+        return ResponseCurves(self.names + other.names, np.r_[self.scale, other.scale],
+                              np.r_[self.elasticity, other.elasticity])
+
+
+def fit_response_curves(names: Iterable[str], spend: np.ndarray, conversions: np.ndarray,
+                        min_days: int = MIN_FIT_DAYS,
+                        prior_elasticity: float = DEFAULT_ELASTICITY) -> ResponseCurves:
+    """Ajuste log(conversions) = log(scale) + elasticity · log(dépense) pour chaque campagne
+
+    spend et conversions sont des matrices [campagne, jour] ; toutes les régressions sont
+    calculées ensemble à partir de sommes masquées. Les jours sans dépense ni conversion
+    sont ignorés ; les campagnes trop peu renseignées gardent l'élasticité a priori.
+    """
+    spend = np.asarray(spend, dtype=float)
+    conversions = np.asarray(conversions, dtype=float)
+    valid = (spend > 0) & (conversions > 0)
+    x = np.log(np.where(valid, spend, 1.0))
+    y = np.log(np.where(valid, conversions, 1.0))
+    n = valid.sum(axis=1)
+    sx, sy = (x * valid).sum(axis=1), (y * valid).sum(axis=1)
+    sxx, sxy = (x * x * valid).sum(axis=1), (x * y * valid).sum(axis=1)
+
+    denominator = n * sxx - sx * sx
+    reliable = (n >= min_days) & (denominator > 1e-9 * np.maximum(n, 1) ** 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(reliable, (n * sxy - sx * sy) / denominator, prior_elasticity)
+    elasticity = np.clip(slope, MIN_ELASTICITY, MAX_ELASTICITY)
+    # Ordonnée à l'origine recalculée pour l'élasticité retenue (moyennes des logs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_scale = np.where(n > 0, (sy - elasticity * sx) / np.maximum(n, 1), -np.inf)
+    return ResponseCurves(names, np.exp(log_scale), elasticity)
+
+
+def fit_rollup_curves(rollup, days: int = 90, min_days: int = MIN_FIT_DAYS) -> ResponseCurves:
+    """Courbes des campagnes d'un KpiRollup, ajustées sur les `days` derniers jours"""
+    if rollup.date_range is None:
+        return ResponseCurves([], [], [])
+    end = rollup.date_range[1]
+    daily = rollup.daily_matrix(end - timedelta(days=days - 1), end, ["spend", "conversions"])
+    return fit_response_curves(rollup.campaigns, daily[:, :, 0], daily[:, :, 1], min_days)
+
+
+def prior_curves(names: Iterable[str], industries: Iterable[str],
+                 reference_budget: float = REFERENCE_DAILY_BUDGET,
+                 elasticity: float = DEFAULT_ELASTICITY) -> ResponseCurves:
+    """Courbes a priori (sans historique) calées sur les coefficients sectoriels de l'agent"""
+    names = list(names)
+    multipliers = [INDUSTRY_MULTIPLIERS.get(industry, DEFAULT_MULTIPLIER) for industry in industries]
+    # Conversions quotidiennes de l'estimation linéaire au budget de référence
+    anchor = np.array([reference_budget / (0.50 * m["cpc"]) * m["conversion"] for m in multipliers])
+    return ResponseCurves(names, anchor / reference_budget ** elasticity, np.full(len(names), elasticity))
+
+
+def allocate(curves: ResponseCurves, total_budget: float,
+             min_budget: Union[float, np.ndarray] = 0.0,
+             max_budget: Optional[Union[float, np.ndarray]] = None) -> np.ndarray:
+    """Budgets maximisant la somme des conversions sous contrainte de budget total
+
+    Les courbes étant concaves, l'optimum égalise le gain marginal λ entre campagnes non
+    bornées : budget_i(λ) = (scale_i · elasticity_i / λ)^(1 / (1 - elasticity_i)), borné à
+    [min, max]. La somme décroît avec λ, qui est trouvé par dichotomie (vectorisée sur
+    toutes les campagnes).
+    """
+    n = len(curves)
+    lower = np.broadcast_to(np.asarray(min_budget, dtype=float), (n,))
+    upper = np.broadcast_to(np.asarray(np.inf if max_budget is None else max_budget, dtype=float), (n,))
+    if np.any(lower > upper):
+        raise ValueError("Budget minimal supérieur au budget maximal")
+    if total_budget < lower.sum() - 1e-9:
+        raise ValueError(f"Budget total insuffisant: {lower.sum():.2f}€ requis au minimum")
+    if total_budget >= upper.sum():
+        return upper.copy()
+    if n == 0:
+        return np.zeros(0)
+
+    # Campagnes sans réponse (aucune conversion observée) : budget minimal
+    active = curves.scale > 0
+    log_gain = np.log(np.where(active, curves.scale * curves.elasticity, 1.0))
+    exponent = 1.0 / (1.0 - curves.elasticity)
+
+    def budgets(log_lambda: float) -> np.ndarray:
+        unbounded = np.exp(np.minimum((log_gain - log_lambda) * exponent, 700.0))
+        return np.clip(np.where(active, unbounded, 0.0), lower, upper)
+
+    # λ est borné par les gains marginaux extrêmes atteignables dans [ε, total]
+    epsilon = total_budget * 1e-12 + 1e-12
+    low = float(np.min(np.where(active, log_gain + (curves.elasticity - 1) * np.log(total_budget), np.inf))) - 1
+    high = float(np.max(np.where(active, log_gain + (curves.elasticity - 1) * np.log(epsilon), -np.inf))) + 1
+    if not np.isfinite(low):
+        return lower.copy()
+    for _ in range(_BISECTION_STEPS):
+        middle = 0.5 * (low + high)
+        if budgets(middle).sum() > total_budget:
+            low = middle
+        else:
+            high = middle
+    return budgets(high)
+
+
+def optimize(curves: ResponseCurves, total_budget: float,
+             current: Optional[np.ndarray] = None, **bounds) -> Dict[str, np.ndarray]:
+    """Allocation optimale, conversions attendues et comparaison avec la répartition actuelle"""
+    budget = allocate(curves, total_budget, **bounds)
+    # Coût marginal indéfini (NaN) pour une courbe nulle ou saturée, plutôt qu'infini
+    with np.errstate(divide="ignore", invalid="ignore"):
+        marginal_cpa = 1.0 / curves.marginal(budget)
+    result = {
+        "budget": budget,
+        "conversions": curves.conversions(budget),
+        "marginal_cpa": np.where(np.isfinite(marginal_cpa), marginal_cpa, np.nan)
+    }
+    if current is not None:
+        result["current_budget"] = np.asarray(current, dtype=float)
+        result["current_conversions"] = curves.conversions(result["current_budget"])
+    return result
+
+
+def allocation_table(curves: ResponseCurves, result: Dict[str, np.ndarray]) -> List[Dict[str, float]]:
+    """Lignes lisibles (une par campagne), triées par budget décroissant"""
+    order = np.argsort(-result["budget"], kind="stable")
+    return [{"campaign": curves.names[i], **{key: float(values[i]) for key, values in result.items()}}
+            for i in order]
@@ -0,0 +1,153 @@
+# bulk_generation.py
+# Génération de campagnes en masse : fichier CSV/Parquet en entrée, campagnes en sortie
+
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from ads_agent import FacebookAdsAgent
+from campaign_estimator import estimate_batch
+from instrumentation import timed
+
+REQUIRED_COLUMNS = ["product", "industry", "target_region", "daily_budget"]
+
+# Valeurs par défaut des colonnes facultatives (identiques au formulaire)
+OPTIONAL_DEFAULTS = {
+    "campaign_name": "",
+    "tone": "Professionnel",
+    "age_range": "25-35"
+}
+
+DEFAULT_CHUNK_SIZE = 250
+
+# Colonne renseignée pour les lignes rejetées (vide sinon)
+ERROR_COLUMN = "error"
+INVALID_BUDGET_ERROR = "Budget quotidien invalide (nombre positif attendu)"
+MISSING_FIELDS_ERROR = "Champs obligatoires vides : {}"
+
+# Colonnes texte obligatoires : une cellule vide donnerait des mots-clés et titres « nan … »
+TEXT_COLUMNS = ["product", "industry", "target_region"]
+GENERATED_COLUMNS = ["keywords", "headline", "primary", "description", "countries", "languages", "interests"]
+
+Source = Union[str, BinaryIO]
+
+
+def _source_name(source: Source) -> str:
+    return source if isinstance(source, str) else getattr(source, "name", "")
+
+
+def read_chunks(source: Source, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Lit le fichier par blocs sans jamais le charger entièrement en mémoire"""
+    if _source_name(source).lower().endswith(".parquet"):
+        # pyarrow est installé avec Streamlit
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size)
+
+
+def _prepare_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Vérifie les colonnes obligatoires et complète les colonnes facultatives"""
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le fichier: {', '.join(missing)}")
+    chunk = chunk.copy()
+    for column, default in OPTIONAL_DEFAULTS.items():
+        if column not in chunk.columns:
+            chunk[column] = default
+        else:
+            chunk[column] = chunk[column].fillna(default)
+    return chunk
+
+
+@timed("bulk.generate_chunk")
+def generate_chunk(agent: FacebookAdsAgent, chunk: pd.DataFrame) -> pd.DataFrame:
+    """Génère les campagnes d'un bloc de lignes (exécuté dans un worker du pool)"""
+    chunk = _prepare_chunk(chunk)
+    empty = pd.DataFrame({column: chunk[column].isna() | (chunk[column].astype(str).str.strip() == "")
+                          for column in TEXT_COLUMNS}).to_numpy()
+    # Budget vide, non numérique ou infini : ligne signalée sans estimation (le formulaire refuse ces valeurs)
+    budgets = pd.to_numeric(chunk["daily_budget"], errors="coerce").to_numpy(dtype=float)
+    valid_budget = np.isfinite(budgets) & (budgets > 0)
+    valid = valid_budget & ~empty.any(axis=1)
+
+    rows = []
+    for row, ok in zip(chunk.itertuples(index=False), valid):
+        if not ok:
+            rows.append(dict.fromkeys(GENERATED_COLUMNS, ""))
+            continue
+        keywords = agent.generate_keywords(row.product, row.industry, row.target_region)
+        ad_copy = agent.generate_ad_copy(row.product, row.target_region, row.industry, row.tone)
+        audience = agent.generate_audience_targeting(row.industry, row.target_region, row.age_range)
+        rows.append({
+            "keywords": "; ".join(keywords),
+            "headline": ad_copy["headline"],
+            "primary": ad_copy["primary"],
+            "description": ad_copy["description"],
+            "countries": "; ".join(audience["demographics"]["countries"]),
+            "languages": "; ".join(audience["demographics"]["languages"]),
+            "interests": "; ".join(audience["interests"])
+        })
+
+    # Les estimations du bloc entier sont calculées en une seule passe vectorisée
+    estimates = estimate_batch(budgets[valid] * 30, chunk["industry"].to_numpy(dtype=object)[valid])
+    result = pd.concat([chunk.reset_index(drop=True), pd.DataFrame(rows, columns=GENERATED_COLUMNS)], axis=1)
+    for column, values in estimates.items():
+        full = pd.array([pd.NA] * len(result), dtype="Int64" if values.dtype.kind == "i" else "Float64")
+        full[valid] = values
+        result[column] = full
+    errors = []
+    for missing, budget_ok in zip(empty, valid_budget):
+        messages = []
+        if missing.any():
+            messages.append(MISSING_FIELDS_ERROR.format(", ".join(np.array(TEXT_COLUMNS)[missing])))
+        if not budget_ok:
+            messages.append(INVALID_BUDGET_ERROR)
+        errors.append(" ; ".join(messages))
+    result[ERROR_COLUMN] = errors
+    return result
+
+
+def iter_bulk_campaigns(source: Source, agent: Optional[FacebookAdsAgent] = None,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, max_workers: int = 4,
+                        use_processes: bool = False) -> Iterator[pd.DataFrame]:
+    """Fait passer les blocs dans le pool de workers en gardant l'ordre du fichier"""
+    agent = agent or FacebookAdsAgent()
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    # Nombre de blocs en vol borné : la mémoire reste constante quelle que soit la taille du fichier
+    max_in_flight = max_workers * 2
+
+    with executor_class(max_workers=max_workers) as executor:
+        pending = deque()
+        for chunk in read_chunks(source, chunk_size):
+            pending.append(executor.submit(generate_chunk, agent, chunk))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_bulk_csv(source: Source, output_path: str, **kwargs: Any) -> Iterator[Dict[str, float]]:
+    """Écrit les campagnes au fil de l'eau et publie le débit après chaque bloc"""
+    start = time.perf_counter()
+    rows_done = 0
+    invalid_rows = 0
+    with open(output_path, "w", encoding="utf-8", newline="") as output:
+        for i, result in enumerate(iter_bulk_campaigns(source, **kwargs)):
+            result.to_csv(output, header=(i == 0), index=False)
+            output.flush()
+            rows_done += len(result)
+            invalid_rows += int((result[ERROR_COLUMN] != "").sum())
+            elapsed = time.perf_counter() - start
+            yield {
+                "rows": rows_done,
+                "invalid_rows": invalid_rows,
+                "elapsed": elapsed,
+                "rows_per_second": rows_done / elapsed if elapsed > 0 else 0.0
+            }
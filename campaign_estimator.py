@@ -0,0 +1,107 @@
+# campaign_estimator.py
+# Estimation vectorisée des performances pour des lots de scénarios
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from ads_agent import INDUSTRY_MULTIPLIERS, DEFAULT_MULTIPLIER
+
+# Bornes du curseur "Budget quotidien" de la page de création
+SWEEP_MIN_DAILY_BUDGET = 5
+SWEEP_MAX_DAILY_BUDGET = 500
+
+ESTIMATE_COLUMNS = ["impressions", "clicks", "ctr", "cpc", "conversions", "cost_per_conversion"]
+
+
+def _round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Arrondit comme round() de Python (np.round diverge sur certains cas limites)"""
+    scale = 10.0 ** ndigits
+    rounded = np.round(values, ndigits)
+    # Seules les valeurs très proches d'une demi-unité peuvent différer
+    fraction = np.abs(values * scale - np.trunc(values * scale))
+    ambiguous = np.flatnonzero(np.abs(fraction - 0.5) < 1e-6)
+    for i in ambiguous:
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
+
+
+def _industry_tables(industries: np.ndarray):
+    """Traduit les secteurs en tableaux de coefficients (une recherche par secteur distinct)"""
+    codes, uniques = pd.factorize(industries)
+    multipliers = [INDUSTRY_MULTIPLIERS.get(industry, DEFAULT_MULTIPLIER) for industry in uniques]
+    # Mêmes arrondis que le calcul unitaire, faits une seule fois par secteur
+    cpc = np.array([round(0.50 * m["cpc"], 2) for m in multipliers])
+    ctr = np.array([round(m["ctr"], 2) for m in multipliers])
+    conversion = np.array([m["conversion"] for m in multipliers])
+    return cpc[codes], ctr[codes], conversion[codes]
+
+
+def estimate_batch(budgets: Iterable[float], industries: Iterable[str]) -> Dict[str, np.ndarray]:
+    """Estime les performances de chaque couple (budget, secteur) en une passe NumPy"""
+    budgets = np.asarray(budgets, dtype=float)
+    industries = np.asarray(industries, dtype=object)
+    if budgets.shape != industries.shape:
+        raise ValueError("budgets et industries doivent avoir la même longueur")
+    if budgets.size == 0:
+        return {column: np.array([]) for column in ESTIMATE_COLUMNS}
+
+    cpc, ctr, conversion = _industry_tables(industries)
+
+    clicks = np.trunc(budgets / cpc).astype(np.int64)
+    impressions = np.trunc(clicks / (ctr / 100)).astype(np.int64)
+    conversions = np.trunc(clicks * conversion).astype(np.int64)
+    cost_per_conversion = _round_like_python(budgets / np.maximum(conversions, 1), 2)
+
+    return {
+        "impressions": impressions,
+        "clicks": clicks,
+        "ctr": ctr,
+        "cpc": cpc,
+        "conversions": conversions,
+        "cost_per_conversion": cost_per_conversion
+    }
+
+
+def estimate_frame(scenarios: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute les estimations à un DataFrame de scénarios (budget, industry, objective, region)"""
+    missing = {"budget", "industry"} - set(scenarios.columns)
+    if missing:
+        raise ValueError(f"Colonnes manquantes: {', '.join(sorted(missing))}")
+
+    estimates = estimate_batch(scenarios["budget"].to_numpy(), scenarios["industry"].to_numpy())
+    result = scenarios.copy()
+    for column in ESTIMATE_COLUMNS:
+        result[column] = estimates[column]
+    return result
+
+
+def build_scenarios(budgets: Iterable[float], industries: Iterable[str],
+                    objectives: Optional[Iterable[str]] = None,
+                    regions: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Construit le produit cartésien budget × secteur × objectif × région"""
+    # L'objectif et la région n'influencent pas encore le modèle : ils sont conservés
+    # comme clés pour regrouper et comparer les scénarios
+    axes = {
+        "budget": list(budgets),
+        "industry": list(industries),
+        "objective": list(objectives) if objectives is not None else [None],
+        "region": list(regions) if regions is not None else [None]
+    }
+    index = pd.MultiIndex.from_product(list(axes.values()), names=list(axes.keys()))
+    return index.to_frame(index=False)
+
+
+def budget_sweep(industry: str, daily_budgets: Optional[Iterable[float]] = None,
+                 days: int = 30) -> pd.DataFrame:
+    """Courbes coût / conversions sur une plage de budgets quotidiens"""
+    if daily_budgets is None:
+        daily_budgets = np.arange(SWEEP_MIN_DAILY_BUDGET, SWEEP_MAX_DAILY_BUDGET + 1, 5)
+    daily_budgets = np.asarray(daily_budgets, dtype=float)
+
+    estimates = estimate_batch(daily_budgets * days, np.full(daily_budgets.shape, industry, dtype=object))
+    sweep = pd.DataFrame(estimates)
+    sweep.insert(0, "daily_budget", daily_budgets)
+    sweep.insert(1, "budget", daily_budgets * days)
+    return sweep
@@ -0,0 +1,68 @@
+# campaign_pipeline.py
+# Pipeline asynchrone de génération de campagne : les étapes indépendantes s'exécutent en parallèle
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from ads_agent import FacebookAdsAgent
+from instrumentation import timed
+
+# Pool partagé par toutes les sessions : le nombre de threads reste borné
+# quel que soit le nombre d'utilisateurs simultanés
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="campaign-pipeline")
+
+# Libellés affichés dans la barre de progression, par étape
+STAGE_LABELS = {
+    "keywords": "🔑 Mots-clés optimisés générés",
+    "ad_copy": "✍️ Contenu publicitaire créé",
+    "audience": "🎯 Ciblage audience optimisé",
+    "performance": "📊 Estimations de performance calculées"
+}
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def _stages(agent: FacebookAdsAgent, params: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    """Associe chaque étape du pipeline à l'appel de l'agent correspondant"""
+    return {
+        "keywords": lambda: agent.generate_keywords(
+            params["product"], params["industry"], params["target_region"]),
+        "ad_copy": lambda: agent.generate_ad_copy(
+            params["product"], params["target_region"], params["industry"], params["tone"]),
+        "audience": lambda: agent.generate_audience_targeting(
+            params["industry"], params["target_region"], params["age_range"]),
+        "performance": lambda: agent.estimate_performance(
+            params["daily_budget"] * 30, params["industry"])
+    }
+
+
+async def generate_campaign_async(agent: FacebookAdsAgent, params: Dict[str, Any],
+                                  on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Lance toutes les étapes en parallèle et signale chaque étape terminée"""
+    loop = asyncio.get_running_loop()
+    stages = _stages(agent, params)
+
+    async def run_stage(name: str, func: Callable[[], Any]):
+        return name, await loop.run_in_executor(_EXECUTOR, func)
+
+    tasks = [asyncio.create_task(run_stage(name, func)) for name, func in stages.items()]
+    results = {}
+    try:
+        for completed in asyncio.as_completed(tasks):
+            name, value = await completed
+            results[name] = value
+            # Le rappel s'exécute dans le thread appelant (celui du script Streamlit)
+            if on_progress is not None:
+                on_progress(name, len(results), len(tasks))
+    finally:
+        for task in tasks:
+            task.cancel()
+    return results
+
+
+@timed("pipeline.generate_campaign")
+def generate_campaign(agent: FacebookAdsAgent, params: Dict[str, Any],
+                      on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Version synchrone du pipeline, utilisable depuis le script Streamlit"""
+    return asyncio.run(generate_campaign_async(agent, params, on_progress))
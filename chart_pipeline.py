@@ -0,0 +1,124 @@
+# chart_pipeline.py
+# Construction des graphiques : sous-échantillonnage côté serveur, traces WebGL et cache des figures
+
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from agent_cache import TTLLRUCache
+from instrumentation import register_collector, timed
+
+# Nombre de points par série transmis au navigateur (≈ 2 points par pixel d'un graphique pleine largeur)
+DEFAULT_MAX_POINTS = 1500
+
+# Au-delà de ce nombre de points affichés, les traces passent en WebGL
+WEBGL_THRESHOLD = 5000
+
+_FIGURE_CACHE = TTLLRUCache(maxsize=128)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets : indices des points conservés (forme visuelle préservée)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(float)
+    y = y.astype(float)
+    # Bornes des seaux intermédiaires (le premier et le dernier point sont toujours gardés)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    # Moyenne de chaque seau, calculée en une passe pour servir de troisième sommet
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Aire du triangle (point retenu précédent, candidat, moyenne du seau suivant)
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_downsample(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Indices du minimum et du maximum de chaque seau (entièrement vectorisé, garde les pics)"""
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    size = int(np.max(np.diff(edges)))
+    # Matrice seaux × taille max, complétée par NaN pour les seaux plus courts
+    index = edges[:-1, None] + np.arange(size)[None, :]
+    valid = index < edges[1:, None]
+    values = np.where(valid, y[np.minimum(index, n - 1)], np.nan)
+    rows = np.arange(n_buckets)
+    lows = index[rows, np.nanargmin(values, axis=1)]
+    highs = index[rows, np.nanargmax(values, axis=1)]
+    return np.unique(np.concatenate([lows, highs]))
+
+
+def downsample(frame: pd.DataFrame, x: str, y: str, max_points: int = DEFAULT_MAX_POINTS,
+               method: str = "lttb") -> pd.DataFrame:
+    """Réduit une série triée par x à `max_points` points au plus"""
+    if len(frame) <= max_points:
+        return frame
+    y_values = frame[y].to_numpy(dtype=float)
+    if method == "minmax":
+        keep = minmax_downsample(y_values, max_points // 2)
+    else:
+        x_values = pd.to_numeric(frame[x]).to_numpy(dtype=float) if np.issubdtype(frame[x].dtype, np.datetime64) \
+            else frame[x].to_numpy(dtype=float)
+        keep = lttb(x_values, y_values, max_points)
+    return frame.iloc[keep]
+
+
+@timed("chart.build_line_figure")
+def build_line_figure(frame: pd.DataFrame, x: str, y: str, title: str, group: Optional[str] = None,
+                      max_points: int = DEFAULT_MAX_POINTS, height: int = 400,
+                      method: str = "lttb") -> Tuple[go.Figure, Dict[str, Any]]:
+    """Figure en courbes (une par groupe) et statistiques de construction"""
+    start = time.perf_counter()
+    groups = frame.groupby(group, sort=False) if group else [(None, frame)]
+    series = [(name, downsample(part.sort_values(x), x, y, max_points, method)) for name, part in groups]
+    points = sum(len(part) for _, part in series)
+    trace = go.Scattergl if points > WEBGL_THRESHOLD else go.Scatter
+    fig = go.Figure([trace(x=part[x], y=part[y], mode="lines", name=str(name) if name is not None else y)
+                     for name, part in series])
+    fig.update_layout(title=title, height=height, showlegend=group is not None,
+                      xaxis_title=x, yaxis_title=y)
+    stats = {
+        "input_points": len(frame),
+        "points": points,
+        "webgl": trace is go.Scattergl,
+        "payload_bytes": len(fig.to_json()),
+        "build_ms": (time.perf_counter() - start) * 1e3
+    }
+    return fig, stats
+
+
+def cached_line_figure(key: Hashable, frame_loader, **kwargs: Any) -> Tuple[go.Figure, Dict[str, Any]]:
+    """Figure mise en cache par clé (version des données, requête) ; frame_loader n'est appelé qu'en cas d'absence
+
+    La figure renvoyée est partagée : elle ne doit pas être modifiée.
+    """
+    cached = _FIGURE_CACHE.get(key)
+    if cached is None:
+        cached = build_line_figure(frame_loader(), **kwargs)
+        _FIGURE_CACHE.set(key, cached)
+    return cached
+
+
+def figure_cache_stats() -> Dict[str, Any]:
+    return _FIGURE_CACHE.stats()
+
+
+register_collector("figure_cache", figure_cache_stats)
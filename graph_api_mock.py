@@ -0,0 +1,223 @@
+# graph_api_mock.py
+# Serveur Graph API local pour développer et tester l'export et la synchronisation sans compte réel
+# Usage : python graph_api_mock.py [port]   puis FACEBOOK_GRAPH_URL=http://127.0.0.1:<port>
+
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+_REFERENCE = re.compile(r"\{result=([^:}]+):\$\.id\}")
+
+CREATABLE_EDGES = {"campaigns", "adsets", "adcreatives", "ads"}
+
+
+class MockGraphApi:
+    """État et logique du faux serveur (objets créés, rapports, quotas)"""
+
+    def __init__(self, usage_per_call: float = 0.5, window_seconds: float = 60.0,
+                 report_polls: int = 2, ads_per_report: int = 20):
+        self.usage_per_call = usage_per_call
+        self.window_seconds = window_seconds
+        self.report_polls = report_polls
+        self.ads_per_report = ads_per_report
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.reports: Dict[str, Dict[str, Any]] = {}
+        self.http_requests = 0
+        self.operations = 0
+        # Prochaines requêtes HTTP refusées par une page d'erreur HTML (proxy ou répartiteur de charge en panne)
+        self.fail_next = 0
+        self._ids = itertools.count(10 ** 15)
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        self._lock = threading.Lock()
+
+    def usage(self) -> float:
+        with self._lock:
+            if time.monotonic() - self._window_start > self.window_seconds:
+                self._window_start, self._window_calls = time.monotonic(), 0
+            return min(self._window_calls * self.usage_per_call, 100.0)
+
+    def usage_headers(self, account_id: str = "act_mock") -> Dict[str, str]:
+        usage = round(self.usage())
+        return {"x-business-use-case-usage": json.dumps({account_id.replace("act_", ""): [{
+            "type": "ads_management", "call_count": usage, "total_cputime": usage // 2,
+            "total_time": usage // 2, "estimated_time_to_regain_access": 0}]})}
+
+    def _count_call(self) -> Optional[Dict[str, Any]]:
+        """Compte un appel ; renvoie l'erreur de limitation si le quota est dépassé"""
+        if self.usage() >= 100:
+            return {"error": {"message": "User request limit reached", "code": 17}}
+        with self._lock:
+            self._window_calls += 1
+            self.operations += 1
+        return None
+
+    def _new_id(self) -> str:
+        with self._lock:
+            return str(next(self._ids))
+
+    def handle(self, method: str, path: str, params: Dict[str, Any], base_url: str) -> Tuple[int, Any]:
+        """Traite une requête (ou une opération d'un lot) et renvoie (statut, corps)"""
+        parts = [part for part in path.split("/") if part]
+        if parts and re.fullmatch(r"v\d+\.\d+", parts[0]):
+            parts = parts[1:]
+        if method == "POST" and not parts and "batch" in params:
+            return 200, self._batch(json.loads(params["batch"]), base_url)
+
+        error = self._count_call()
+        if error:
+            return 400, error
+        if method == "POST" and len(parts) == 2 and parts[1] in CREATABLE_EDGES:
+            object_id = self._new_id()
+            self.objects[object_id] = {"id": object_id, "type": parts[1], "account": parts[0], **params}
+            return 200, {"id": object_id}
+        if method == "POST" and len(parts) == 2 and parts[1] == "insights":
+            report_id = self._new_id()
+            self.reports[report_id] = {"params": params, "polls": 0}
+            return 200, {"report_run_id": report_id}
+        if method == "GET" and len(parts) == 1 and parts[0] in self.reports:
+            report = self.reports[parts[0]]
+            report["polls"] += 1
+            done = report["polls"] >= self.report_polls
+            return 200, {"id": parts[0], "async_status": "Job Completed" if done else "Job Running",
+                         "async_percent_completion": 100 if done else 50}
+        if method == "GET" and len(parts) == 2 and parts[1] == "insights" and parts[0] in self.reports:
+            return 200, self._report_page(parts[0], params, base_url)
+        if method == "GET" and len(parts) == 1 and parts[0] in self.objects:
+            return 200, self.objects[parts[0]]
+        return 404, {"error": {"message": f"Chemin inconnu: {method} /{'/'.join(parts)}", "code": 100}}
+
+    def _batch(self, operations: List[Dict[str, Any]], base_url: str) -> List[Optional[Dict[str, Any]]]:
+        results, ids = [], {}
+        for operation in operations[:50]:
+            body = {key: values[-1] for key, values in parse_qs(operation.get("body", "")).items()}
+            body = {key: _REFERENCE.sub(lambda match: ids.get(match.group(1), match.group(0)), value)
+                    for key, value in body.items()}
+            url = urlparse(operation["relative_url"])
+            body.update({key: values[-1] for key, values in parse_qs(url.query).items()})
+            if any(_REFERENCE.search(value) for value in body.values()):
+                status, response = 400, {"error": {"message": "Dépendance non résolue", "code": 100}}
+            else:
+                status, response = self.handle(operation.get("method", "GET"), url.path, body, base_url)
+            if status == 200 and operation.get("name") and "id" in response:
+                ids[operation["name"]] = response["id"]
+                # Comme l'API réelle : réponse d'une opération nommée omise, sauf demande explicite
+                if str(operation.get("omit_response_on_success", True)).lower() != "false":
+                    results.append(None)
+                    continue
+            results.append({"code": status, "body": json.dumps(response)})
+        return results
+
+    def _report_page(self, report_id: str, params: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        """Statistiques synthétiques d'un rapport, paginées par curseur numérique"""
+        time_range = json.loads(self.reports[report_id]["params"].get("time_range", "{}"))
+        since = date.fromisoformat(time_range.get("since", "2025-01-01"))
+        until = date.fromisoformat(time_range.get("until", "2025-01-07"))
+        n_days = (until - since).days + 1
+        total = n_days * self.ads_per_report
+        limit = int(params.get("limit", 500))
+        offset = int(params.get("after", 0))
+        rows = []
+        for i in range(offset, min(offset + limit, total)):
+            ad, day = divmod(i, n_days)
+            current = since + timedelta(days=day)
+            rows.append({
+                "account_id": "mock", "campaign_id": f"c{ad // 5}", "adset_id": f"s{ad // 2}",
+                "ad_id": f"a{ad}", "date_start": current.isoformat(), "date_stop": current.isoformat(),
+                "impressions": str(1000 + 10 * day + ad), "clicks": str(40 + day % 7),
+                "spend": f"{20 + (ad % 5) * 1.5:.2f}",
+                "actions": [{"action_type": "lead", "value": str(1 + day % 3)}]
+            })
+        page = {"data": rows, "paging": {"cursors": {"after": str(offset + limit)}}}
+        if offset + limit < total:
+            query = urlencode({"limit": limit, "after": offset + limit, "access_token": "mock"})
+            page["paging"]["next"] = f"{base_url}/{report_id}/insights?{query}"
+        return page
+
+
+class _Handler(BaseHTTPRequestHandler):
+    api: MockGraphApi
+
+    def _respond(self, method: str) -> None:
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if method == "POST":
+            length = int(self.headers.get("Content-Length", 0))
+            params.update({key: values[-1] for key, values in
+                           parse_qs(self.rfile.read(length).decode("utf-8")).items()})
+        params.pop("access_token", None)
+        self.api.http_requests += 1
+        if self.api.fail_next > 0:
+            self.api.fail_next -= 1
+            payload = b"<html><body><h1>502 Bad Gateway</h1></body></html>"
+            self.send_response(502)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        version = next((part for part in url.path.split("/") if part), "v19.0")
+        base_url = f"http://{self.headers.get('Host')}/{version}"
+        status, body = self.api.handle(method, url.path, params, base_url)
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in self.api.usage_headers().items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_POST(self):
+        self._respond("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockGraphApiServer:
+    """Serveur HTTP local exécuté dans un thread (utilisable comme gestionnaire de contexte)"""
+
+    def __init__(self, port: int = 0, **kwargs: Any):
+        self.api = MockGraphApi(**kwargs)
+        handler = type("MockGraphApiHandler", (_Handler,), {"api": self.api})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockGraphApiServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockGraphApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    server = MockGraphApiServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765).start()
+    print(f"Graph API simulée sur {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
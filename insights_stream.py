@@ -0,0 +1,561 @@
+# insights_stream.py
+# Ingestion continue des statistiques (relevés horaires, webhooks) : journal append-only,
+# micro-lots regroupés, contre-pression quand le consommateur prend du retard
+
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from kpi_rollups import KpiRollup
+from metrics_store import KEY_COLUMNS, METRIC_COLUMNS, MetricsStore, generate_synthetic_insights
+from shared_store import pack, unpack
+
+try:
+    import fcntl
+except ImportError:  # Windows : un seul processus écrivain par journal est supposé
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INGEST_WAL_ENV = "ADS_INGEST_WAL"
+DEFAULT_WAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ingest_wal")
+
+SEGMENT_BYTES = 64 * 1024 * 1024
+# En-tête d'un enregistrement : taille, CRC32, numéro de séquence
+_HEADER = struct.Struct("<IIQ")
+_CHECKPOINT = "checkpoint"
+_LOCK = "lock"
+# Lots mis de côté après MAX_APPLY_ATTEMPTS échecs (même format d'enregistrement que le journal)
+_DEAD_LETTER = "dead_letter"
+
+MAX_APPLY_ATTEMPTS = 3
+APPLY_RETRY_DELAY = 0.05
+
+# Les relevés ne modifient que les jours récents (fenêtre d'attribution de Facebook)
+UPDATE_WINDOW_DAYS = 28
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+class Backpressure(Exception):
+    """Le consommateur a trop de lots en attente : le producteur doit ralentir et réessayer"""
+
+
+class InsightsLog:
+    """Journal append-only de lots d'insights, en segments numérotés par leur première séquence
+
+    Les segments entièrement consommés sont supprimés au point de contrôle ; une fin d'écriture
+    interrompue (crash) est tronquée à l'ouverture. Chaque répertoire n'a qu'un écrivain, protégé
+    par un verrou exclusif : les autres processus (workers) prennent le premier sous-répertoire
+    worker-N libre, et rejouent ce qu'un processus arrêté y avait laissé.
+    """
+
+    def __init__(self, path: Optional[str] = None, segment_bytes: int = SEGMENT_BYTES, fsync: bool = False):
+        self.root = path or os.environ.get(INGEST_WAL_ENV, DEFAULT_WAL_PATH)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self.path, self._lock_file = self._acquire(self.root)
+        self.committed = self._read_checkpoint()
+        self.next_sequence = self.committed
+        segments = self._segments()
+        if segments:
+            # Reprise : dernière séquence valide du dernier segment
+            last = segments[-1]
+            valid_bytes = 0
+            for sequence, _, end in self._scan(last):
+                self.next_sequence = sequence + 1
+                valid_bytes = end
+            with open(self._segment_path(last), "r+b") as f:
+                f.truncate(valid_bytes)
+            self._file = open(self._segment_path(last), "ab")
+        else:
+            self._file = open(self._segment_path(self.next_sequence), "ab")
+
+    @staticmethod
+    def _acquire(root: str) -> Tuple[str, Any]:
+        """Premier répertoire du journal que ce processus peut verrouiller (la racine, puis worker-1…)"""
+        slot = 0
+        while True:
+            path = root if slot == 0 else os.path.join(root, f"worker-{slot}")
+            os.makedirs(path, exist_ok=True)
+            if fcntl is None:
+                return path, None
+            lock_file = open(os.path.join(path, _LOCK), "a")
+            try:
+                # Libéré par close() ou à la fin du processus, même en cas de crash
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                slot += 1
+                continue
+            return path, lock_file
+
+    def _segment_path(self, first_sequence: int) -> str:
+        return os.path.join(self.path, f"{first_sequence:020d}.log")
+
+    def _segments(self) -> List[int]:
+        return sorted(int(name[:-4]) for name in os.listdir(self.path) if name.endswith(".log"))
+
+    def _read_checkpoint(self) -> int:
+        try:
+            with open(os.path.join(self.path, _CHECKPOINT), encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _scan(self, first_sequence: int) -> Iterator[Tuple[int, bytes, int]]:
+        """(séquence, contenu, position de fin) des enregistrements intacts d'un segment"""
+        with open(self._segment_path(first_sequence), "rb") as f:
+            position = 0
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                length, crc, sequence = _HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    return
+                position += _HEADER.size + length
+                yield sequence, payload, position
+
+    def append(self, payload: bytes) -> int:
+        with self._lock:
+            sequence = self.next_sequence
+            if self._file.tell() >= self.segment_bytes:
+                self._file.close()
+                self._file = open(self._segment_path(sequence), "ab")
+            self._file.write(_HEADER.pack(len(payload), zlib.crc32(payload), sequence))
+            self._file.write(payload)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.next_sequence = sequence + 1
+            return sequence
+
+    def read_from(self, sequence: int) -> Iterator[Tuple[int, bytes]]:
+        """Enregistrements à partir de `sequence` (reprise après un arrêt)"""
+        segments = self._segments()
+        for i, first in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1] <= sequence:
+                continue
+            for record_sequence, payload, _ in self._scan(first):
+                if record_sequence >= sequence:
+                    yield record_sequence, payload
+
+    def commit(self, sequence: int) -> None:
+        """Tout ce qui précède `sequence` est persisté ailleurs : point de contrôle et purge"""
+        checkpoint = os.path.join(self.path, _CHECKPOINT)
+        with open(checkpoint + ".tmp", "w", encoding="utf-8") as f:
+            f.write(str(sequence))
+        os.replace(checkpoint + ".tmp", checkpoint)
+        with self._lock:
+            self.committed = sequence
+            segments = self._segments()
+            for first, following in zip(segments, segments[1:]):
+                if following <= sequence:
+                    os.remove(self._segment_path(first))
+
+    def dead_letter(self, sequence: int, payload: bytes) -> None:
+        """Met de côté un lot inapplicable (à examiner à la main) : le point de contrôle peut le dépasser"""
+        with self._lock, open(os.path.join(self.path, _DEAD_LETTER), "ab") as f:
+            f.write(_HEADER.pack(len(payload), zlib.crc32(payload), sequence))
+            f.write(payload)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+            if self._lock_file is not None:
+                self._lock_file.close()
+
+
+def encode_batch(frame: pd.DataFrame, received_at: float) -> bytes:
+    """Lot au format du store, en colonnes (dates en jours depuis 1970)"""
+    days = (pd.to_datetime(frame["date"]).to_numpy().astype("datetime64[D]") - _EPOCH).astype(np.int64)
+    columns = {column: frame[column].astype(str).tolist() for column in KEY_COLUMNS if column != "date"}
+    columns["date"] = days.tolist()
+    columns.update({column: frame[column].tolist() for column in METRIC_COLUMNS})
+    return pack({"received_at": received_at, "columns": columns})
+
+
+def decode_batch(payload: bytes) -> Tuple[pd.DataFrame, float]:
+    record = unpack(payload)
+    frame = pd.DataFrame(record["columns"])
+    frame["date"] = (_EPOCH + frame["date"].to_numpy().astype("timedelta64[D]")).astype("datetime64[ns]")
+    return frame[KEY_COLUMNS + METRIC_COLUMNS], record["received_at"]
+
+
+class LatestValues:
+    """Dernières valeurs connues par (publicité, jour) : les relevés successifs deviennent des deltas
+
+    Les relevés donnent le total à date d'une journée ; seul l'écart avec le relevé précédent est
+    ajouté aux agrégats, qui restent ainsi de simples sommes. Seuls les jours de la fenêtre
+    d'attribution sont gardés : les relevés plus anciens sont ignorés.
+    """
+
+    def __init__(self, window_days: int = UPDATE_WINDOW_DAYS):
+        self.window_days = window_days
+        self.newest_day: Optional[int] = None
+        self._values: Dict[Tuple[str, int], np.ndarray] = {}
+
+    def seed(self, store: MetricsStore) -> None:
+        bounds = store.date_bounds()
+        if bounds is None:
+            return
+        start = bounds[1] - timedelta(days=self.window_days - 1)
+        table = store.scan(start, bounds[1], ["ad_id", "date"] + METRIC_COLUMNS)
+        totals = table.group_by(["ad_id", "date"]).aggregate([(column, "sum") for column in METRIC_COLUMNS])
+        frame = totals.to_pandas()
+        days = (pd.to_datetime(frame["date"]).to_numpy().astype("datetime64[D]") - _EPOCH).astype(np.int64)
+        values = frame[[f"{column}_sum" for column in METRIC_COLUMNS]].to_numpy(dtype=float)
+        self.update(dict(zip(zip(frame["ad_id"].tolist(), days.tolist()), values)))
+
+    def deltas(self, frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[Tuple[str, int], np.ndarray]]:
+        """(relevés retenus, deltas, nouvelles valeurs) ; rien n'est modifié avant l'appel à update"""
+        # Dans un même lot, seul le dernier relevé de chaque (publicité, jour) compte
+        frame = frame.drop_duplicates(["ad_id", "date"], keep="last")
+        days = (pd.to_datetime(frame["date"]).to_numpy().astype("datetime64[D]") - _EPOCH).astype(np.int64)
+        newest = days.max(initial=self.newest_day if self.newest_day is not None else 0)
+        recent = days > newest - self.window_days
+        frame, days = frame[recent], days[recent]
+        values = frame[METRIC_COLUMNS].to_numpy(dtype=float)
+        previous = np.zeros_like(values)
+        keys = list(zip(frame["ad_id"].tolist(), days.tolist()))
+        for i, key in enumerate(keys):
+            old = self._values.get(key)
+            if old is not None:
+                previous[i] = old
+        delta = frame.copy()
+        delta[METRIC_COLUMNS] = values - previous
+        changed = (delta[METRIC_COLUMNS] != 0).any(axis=1).to_numpy()
+        delta = delta[changed].astype({"impressions": "int64", "clicks": "int64", "conversions": "int64"})
+        return frame[changed], delta, dict(zip(keys, values))
+
+    def update(self, values: Dict[Tuple[str, int], np.ndarray]) -> None:
+        """Enregistre les nouvelles valeurs et oublie les jours sortis de la fenêtre"""
+        self._values.update(values)
+        newest = max((day for _, day in values), default=None)
+        if newest is not None and (self.newest_day is None or newest > self.newest_day):
+            self.newest_day = newest
+            oldest = newest - self.window_days
+            for key in [key for key in self._values if key[1] <= oldest]:
+                del self._values[key]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class IngestionPipeline:
+    """Producteurs → journal → file bornée → consommateur (micro-lots) → agrégats puis store
+
+    `submit` écrit dans le journal puis met le lot en file ; au-delà de `max_pending` lots
+    non traités, il lève Backpressure. Le consommateur regroupe les lots arrivés pendant
+    `linger` secondes, met à jour les agrégats aussitôt et n'écrit le store (puis le point
+    de contrôle du journal) que par gros blocs. Le store reçoit les totaux par clé (upsert) :
+    un lot rejoué, ou reçu par deux workers, n'y est compté qu'une fois.
+    """
+
+    def __init__(self, log: InsightsLog, rollup: KpiRollup, store: Optional[MetricsStore] = None,
+                 max_pending: int = 64, max_batch_rows: int = 50_000, linger: float = 0.1,
+                 flush_rows: int = 200_000, flush_interval: float = 60.0):
+        self.log = log
+        self.rollup = rollup
+        self.store = store
+        self.max_batch_rows = max_batch_rows
+        self.linger = linger
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.latest = LatestValues()
+        if store is not None:
+            self.latest.seed(store)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.max_pending = max_pending
+        self._queue: "queue.Queue[Tuple[int, pd.DataFrame, float]]" = queue.Queue()
+        self._submit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._unflushed: List[pd.DataFrame] = []
+        self._unflushed_rows = 0
+        self._last_flush = time.monotonic()
+        self._applied_sequence = log.committed
+        # Lot en échec en cours de réessai : le point de contrôle ne dépasse pas sa séquence
+        self._failed_sequence: Optional[int] = None
+        self._attempts: Dict[int, int] = {}
+        self.submitted_rows = 0
+        self.applied_rows = 0
+        self.batches = 0
+        self.rejected = 0
+        self.failed = 0
+        self.dead_lettered = 0
+
+    # --- Production -------------------------------------------------------
+
+    def submit(self, frame: pd.DataFrame, timeout: float = 1.0) -> int:
+        """Ajoute un lot (format du store) ; renvoie sa séquence dans le journal"""
+        if not self._slots.acquire(timeout=timeout):
+            self.rejected += 1
+            raise Backpressure(f"{self.max_pending} lots en attente : réessayez plus tard")
+        try:
+            received_at = time.time()
+            payload = encode_batch(frame, received_at)
+            # Même ordre dans le journal et dans la file
+            with self._submit_lock:
+                sequence = self.log.append(payload)
+                self._queue.put((sequence, frame, received_at))
+        except BaseException:
+            # Lot refusé (format invalide, disque plein) : sa place dans la file est rendue
+            self._slots.release()
+            raise
+        self.submitted_rows += len(frame)
+        return sequence
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    # --- Consommation -----------------------------------------------------
+
+    def recover(self) -> int:
+        """Rejoue les lots du journal non encore persistés dans le store (avant start)"""
+        replayed = 0
+        for sequence, payload in self.log.read_from(self.log.committed):
+            frame, _ = decode_batch(payload)
+            if self._try_apply([(sequence, frame, None)]):
+                replayed += len(frame)
+        return replayed
+
+    def start(self) -> "IngestionPipeline":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="insights-ingestion", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """Attend que tous les lots soumis soient appliqués aux agrégats"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return not self._queue.unfinished_tasks
+
+    def _next_batch(self) -> List[Tuple[int, pd.DataFrame, float]]:
+        try:
+            items = [self._queue.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+        rows = len(items[0][1])
+        deadline = time.monotonic() + self.linger
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[1])
+        return items
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            items = self._next_batch()
+            if items:
+                try:
+                    self._try_apply(items)
+                finally:
+                    for _ in items:
+                        self._slots.release()
+                        self._queue.task_done()
+            if self._unflushed_rows >= self.flush_rows or \
+                    (self._unflushed_rows and time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+
+    def _try_apply(self, items: List[Tuple[int, pd.DataFrame, Optional[float]]]) -> bool:
+        """Applique un micro-lot ; un échec est journalisé sans arrêter le consommateur
+
+        Un micro-lot en échec est réappliqué lot par lot, dans l'ordre ; un lot qui échoue
+        MAX_APPLY_ATTEMPTS fois est mis de côté (dead letter) et le point de contrôle le dépasse.
+        """
+        try:
+            self._apply(items)
+            return True
+        except Exception as exc:
+            if len(items) > 1:
+                # Isole le ou les lots fautifs sans bloquer les autres
+                return all([self._try_apply([item]) for item in items])
+            error = exc
+        sequence, frame, received_at = items[0]
+        self._failed_sequence = sequence
+        while True:
+            attempt = self._attempts[sequence] = self._attempts.get(sequence, 0) + 1
+            self.failed += 1
+            if attempt >= MAX_APPLY_ATTEMPTS:
+                logger.error("Lot %d en échec après %d tentatives : mis de côté", sequence, attempt, exc_info=error)
+                self.log.dead_letter(sequence, encode_batch(frame, received_at or time.time()))
+                self.dead_lettered += 1
+                self._done(sequence)
+                return False
+            logger.warning("Échec de l'ingestion du lot %d (tentative %d) : nouvel essai", sequence, attempt,
+                           exc_info=error)
+            time.sleep(APPLY_RETRY_DELAY * attempt)
+            try:
+                self._apply(items)
+                return True
+            except Exception as exc:
+                error = exc
+
+    def _done(self, sequence: int) -> None:
+        self._attempts.pop(sequence, None)
+        if self._failed_sequence == sequence:
+            self._failed_sequence = None
+        self._applied_sequence = max(self._applied_sequence, sequence + 1)
+
+    def _apply(self, items: List[Tuple[int, pd.DataFrame, Optional[float]]]) -> None:
+        with instrumentation.section("ingest/batch"):
+            frame = pd.concat([item[1] for item in items], ignore_index=True) if len(items) > 1 else items[0][1]
+            # Valeurs connues modifiées seulement une fois les agrégats à jour : un échec peut être rejoué
+            changed, delta, values = self.latest.deltas(frame)
+            self.rollup.ingest(delta)
+            self.latest.update(values)
+        applied_at = time.time()
+        for _, _, received_at in items:
+            if received_at is not None:
+                # Fraîcheur de bout en bout : réception → visible dans les agrégats
+                instrumentation.observe("ingest/freshness", applied_at - received_at)
+        if not changed.empty:
+            self._unflushed.append(changed)
+            self._unflushed_rows += len(changed)
+        for sequence, _, _ in items:
+            self._done(sequence)
+        self.applied_rows += len(frame)
+        self.batches += 1
+
+    def flush(self) -> None:
+        """Écrit les totaux modifiés dans le store (upsert) puis avance le point de contrôle du journal"""
+        if self.store is not None and self._unflushed:
+            self.store.upsert(pd.concat(self._unflushed, ignore_index=True))
+        self._unflushed = []
+        self._unflushed_rows = 0
+        self._last_flush = time.monotonic()
+        committed = self._applied_sequence
+        if self._failed_sequence is not None:
+            committed = min(committed, self._failed_sequence)
+        if self.store is not None and committed > self.log.committed:
+            self.log.commit(committed)
+
+    def stats(self) -> Dict[str, Any]:
+        freshness = instrumentation.histogram("ingest/freshness")
+        p50, p95 = freshness.percentiles(0.5, 0.95)
+        return {
+            "submitted_rows": self.submitted_rows,
+            "applied_rows": self.applied_rows,
+            "batches": self.batches,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "dead_lettered": self.dead_lettered,
+            "unflushed_rows": self._unflushed_rows,
+            "freshness_p50_ms": p50 * 1e3,
+            "freshness_p95_ms": p95 * 1e3
+        }
+
+
+def submit_graph_rows(pipeline: IngestionPipeline, rows: List[Dict[str, Any]], timeout: float = 1.0) -> int:
+    """Entrée des webhooks : lignes au format Graph API"""
+    from graph_api import insights_to_frame
+
+    return pipeline.submit(insights_to_frame(rows), timeout=timeout)
+
+
+def pull_insights(client, pipeline: IngestionPipeline, since: str, until: str, chunk_rows: int = 5_000,
+                  retry_delay: float = 0.5) -> int:
+    """Relevé horaire : statistiques du rapport envoyées par blocs, en attendant si le consommateur sature"""
+    submitted = 0
+    chunk: List[Dict[str, Any]] = []
+
+    def send(rows):
+        while True:
+            try:
+                return submit_graph_rows(pipeline, rows)
+            except Backpressure:
+                time.sleep(retry_delay)
+
+    for row in client.fetch_insights(since, until):
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            send(chunk)
+            submitted += len(chunk)
+            chunk = []
+    if chunk:
+        send(chunk)
+        submitted += len(chunk)
+    return submitted
+
+
+class SyntheticFeed:
+    """Flux de démonstration : un relevé par « heure » simulée, totaux du jour croissants, puis jour suivant"""
+
+    def __init__(self, pipeline: IngestionPipeline, start: date, n_ads: int = 50, interval: float = 1.0,
+                 seed: int = 0):
+        self.pipeline = pipeline
+        self.day = start
+        self.hour = 0
+        self.n_ads = n_ads
+        self.interval = interval
+        self.seed = seed
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def snapshot(self) -> pd.DataFrame:
+        """Totaux à date de la journée en cours pour toutes les publicités"""
+        frame = generate_synthetic_insights(self.day, self.day, n_ads=self.n_ads, seed=self.seed)
+        fraction = (self.hour + 1) / 24
+        for column in METRIC_COLUMNS:
+            frame[column] = (frame[column] * fraction).astype(frame[column].dtype)
+        return frame
+
+    def step(self) -> None:
+        try:
+            self.pipeline.submit(self.snapshot(), timeout=self.interval)
+        except Backpressure:
+            # Relevé sauté : le suivant contient les totaux à jour
+            return
+        self.hour += 1
+        if self.hour == 24:
+            self.day += timedelta(days=1)
+            self.hour = 0
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.step()
+
+    def start(self) -> None:
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="insights-feed", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
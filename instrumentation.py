@@ -0,0 +1,270 @@
+# instrumentation.py
+# Mesure des durées (méthodes de l'agent, sections de page, graphiques), histogrammes de latence,
+# capture de profil d'une exécution et export au format texte Prometheus
+#
+# Désactivée par défaut : les décorateurs et sections ne coûtent alors qu'un test de booléen.
+# Activation : ADS_INSTRUMENTATION=1 ou set_enabled(True) (page Diagnostics).
+
+import bisect
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+INSTRUMENTATION_ENV = "ADS_INSTRUMENTATION"
+METRICS_PORT_ENV = "ADS_METRICS_PORT"
+
+# Bornes des seaux Prometheus (secondes)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Échantillons récents conservés pour les percentiles
+_RESERVOIR = 1024
+
+_NULL_CONTEXT = nullcontext()
+
+
+class _State:
+    enabled = os.environ.get(INSTRUMENTATION_ENV, "").lower() in ("1", "true", "yes")
+
+
+def is_enabled() -> bool:
+    return _State.enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    _State.enabled = bool(enabled)
+
+
+class LatencyHistogram:
+    """Durées d'une opération : seaux cumulés (export) et échantillons récents (percentiles)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self._recent: Deque[float] = deque(maxlen=_RESERVOIR)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            self._recent.append(seconds)
+
+    def percentiles(self, *quantiles: float) -> List[float]:
+        """Percentiles (en secondes) des échantillons récents"""
+        with self._lock:
+            recent = sorted(self._recent)
+        if not recent:
+            return [0.0] * len(quantiles)
+        return [recent[min(int(q * len(recent)), len(recent) - 1)] for q in quantiles]
+
+    def last(self) -> float:
+        with self._lock:
+            return self._recent[-1] if self._recent else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        p50, p95, p99 = self.percentiles(0.5, 0.95, 0.99)
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50_ms": p50 * 1e3,
+            "p95_ms": p95 * 1e3,
+            "p99_ms": p99 * 1e3,
+            "max_ms": self.max * 1e3
+        }
+
+
+_histograms: Dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+_collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+
+def histogram(name: str) -> LatencyHistogram:
+    found = _histograms.get(name)
+    if found is None:
+        with _histograms_lock:
+            found = _histograms.setdefault(name, LatencyHistogram())
+    return found
+
+
+def observe(name: str, seconds: float) -> None:
+    """Enregistre une durée, que l'instrumentation soit activée ou non"""
+    histogram(name).observe(seconds)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Décorateur : durée de chaque appel sous `name` (par défaut module.fonction)"""
+    def decorator(func: Callable) -> Callable:
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _State.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram(label).observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def _timed_section(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram(name).observe(time.perf_counter() - start)
+
+
+def section(name: str):
+    """Gestionnaire de contexte mesurant un bloc (contexte vide si désactivé)"""
+    return _timed_section(name) if _State.enabled else _NULL_CONTEXT
+
+
+def summaries() -> Dict[str, Dict[str, float]]:
+    with _histograms_lock:
+        items = sorted(_histograms.items())
+    return {name: hist.summary() for name, hist in items}
+
+
+def reset() -> None:
+    with _histograms_lock:
+        _histograms.clear()
+
+
+# --- Métriques complémentaires (tailles et taux de succès des caches, etc.) ---
+
+def register_collector(name: str, collect: Callable[[], Dict[str, float]]) -> None:
+    """`collect` renvoie des valeurs numériques exportées comme jauges ads_<name>_<clé>"""
+    _collectors[name] = collect
+
+
+def _prometheus_name(text: str) -> str:
+    return "".join(ch if ch.isalnum() else "_" for ch in text).lower()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """Export au format d'exposition texte Prometheus"""
+    lines = ["# HELP ads_operation_duration_seconds Durée des opérations instrumentées",
+             "# TYPE ads_operation_duration_seconds histogram"]
+    with _histograms_lock:
+        items = sorted(_histograms.items())
+    for name, hist in items:
+        label = f'operation="{_label(name)}"'
+        with hist._lock:
+            buckets, count, total = list(hist.buckets), hist.count, hist.total
+        cumulative = 0
+        for bound, n in zip(BUCKETS, buckets):
+            cumulative += n
+            lines.append(f'ads_operation_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'ads_operation_duration_seconds_bucket{{{label},le="+Inf"}} {count}')
+        lines.append(f"ads_operation_duration_seconds_sum{{{label}}} {total:.6f}")
+        lines.append(f"ads_operation_duration_seconds_count{{{label}}} {count}")
+    for collector, collect in sorted(_collectors.items()):
+        for key, value in sorted(_flatten(collect()).items()):
+            metric = f"ads_{_prometheus_name(collector)}_{_prometheus_name(key)}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _flatten(values: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in values.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}_"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        payload = prometheus_text().encode("utf-8")
+        self.send_response(200 if self.path.split("?")[0] == "/metrics" else 404)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """Sert /metrics dans un thread (une seule fois par processus) ; port lu dans ADS_METRICS_PORT"""
+    global _server
+    if port is None:
+        if not os.environ.get(METRICS_PORT_ENV):
+            return None
+        port = int(os.environ[METRICS_PORT_ENV])
+    with _histograms_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+# --- Profil d'une exécution ---------------------------------------------
+
+class ProfileCapture:
+    """Résultat d'une capture : rapport texte (vide si aucune capture n'a eu lieu)"""
+
+    def __init__(self):
+        self.report = ""
+        self.engine = None
+
+
+@contextmanager
+def capture_profile(active: bool, engine: str = "cprofile", limit: int = 40) -> Iterator[ProfileCapture]:
+    """Profile le bloc si `active` (cProfile, ou pyinstrument s'il est installé et demandé)"""
+    capture = ProfileCapture()
+    if not active:
+        yield capture
+        return
+    if engine == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            engine = "cprofile"
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield capture
+            finally:
+                profiler.stop()
+                capture.engine, capture.report = engine, profiler.output_text(unicode=True)
+            return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield capture
+    finally:
+        profiler.disable()
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+        capture.engine, capture.report = "cprofile", stream.getvalue()
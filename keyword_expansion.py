@@ -0,0 +1,266 @@
+# keyword_expansion.py
+# Expansion de mots-clés (produit × intentions × modificateurs × lieux), normalisation sans accents,
+# déduplication approximative par MinHash/LSH et score, le tout en flux par lots
+
+import functools
+import heapq
+import itertools
+import json
+import os
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "keyword_expansion.json")
+
+# Similarité de Jaccard (sur les trigrammes de caractères) au-delà de laquelle deux mots-clés sont des doublons
+DEFAULT_THRESHOLD = 0.8
+NUM_PERMUTATIONS = 32
+LSH_BANDS = 8
+SHINGLE_SIZE = 3
+BATCH_SIZE = 2048
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+# (mot-clé affiché, forme normalisée, score)
+Candidate = Tuple[str, str, float]
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize_keyword(text: str) -> str:
+    """Forme comparable : sans accents ni casse, ponctuation remplacée par des espaces"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", stripped.casefold()).strip()
+
+
+class ExpansionVocabulary:
+    """Intentions pondérées, modificateurs par secteur et villes par pays"""
+
+    def __init__(self, data: Dict[str, Any]):
+        # Intentions triées par poids décroissant : les meilleures combinaisons sont générées d'abord
+        self.intents = sorted(((term, spec["weight"]) for spec in data["intents"].values() for term in spec["terms"]),
+                              key=lambda item: -item[1])
+        self.modifiers = data["modifiers"]
+        self.cities = data["cities"]
+        self.weights = data["weights"]
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_VOCABULARY_PATH) -> "ExpansionVocabulary":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def industry_modifiers(self, industry: str) -> List[str]:
+        return list(dict.fromkeys(self.modifiers.get(industry, []) + self.modifiers.get("*", [])))
+
+    def locations(self, countries: Iterable[str]) -> List[Tuple[str, float]]:
+        weights = self.weights
+        locations = []
+        for country in countries:
+            locations.append((country, weights["country"]))
+            locations.extend((city, weights["city"]) for city in self.cities.get(country, []))
+        return locations
+
+
+@functools.lru_cache(maxsize=None)
+def get_vocabulary(path: Optional[str] = None) -> ExpansionVocabulary:
+    return ExpansionVocabulary.load(path or DEFAULT_VOCABULARY_PATH)
+
+
+def iter_candidates(seeds: Iterable[str], industry: str, countries: Iterable[str],
+                    vocabulary: Optional[ExpansionVocabulary] = None) -> Iterator[Candidate]:
+    """Combinaisons [intention] graine [modificateur] [lieu], sans rien matérialiser
+
+    Chaque partie est normalisée une seule fois : la forme normalisée d'une combinaison est
+    la jointure des formes normalisées de ses parties.
+    """
+    vocabulary = vocabulary or get_vocabulary()
+    weights = vocabulary.weights
+    part = lambda text, weight: (text, normalize_keyword(text), weight)
+    seeds = list({normalize_keyword(seed): part(seed, 0.0) for seed in seeds}.values())
+    # L'option vide vient en dernier : une combinaison est d'abord rencontrée sous sa forme la mieux notée
+    empty = [("", "", 0.0)]
+    intents = [part(term, weight) for term, weight in vocabulary.intents] + empty
+    modifiers = [part(term, weights["modifier"]) for term in vocabulary.industry_modifiers(industry)] + empty
+    locations = [part(name, weight) for name, weight in vocabulary.locations(countries)] + empty
+    max_words, penalty = weights["max_words"], weights["word_penalty"]
+
+    for intent, seed, modifier, location in itertools.product(intents, seeds, modifiers, locations):
+        # Intention ou modificateur déjà présent dans la graine (« prix » + « prix FIV »)
+        if (intent[1] and f" {intent[1]} " in f" {seed[1]} ") or (modifier[1] and f" {modifier[1]} " in f" {seed[1]} "):
+            continue
+        parts = [p for p in (intent, seed, modifier, location) if p[0]]
+        normalized = " ".join(p[1] for p in parts)
+        n_words = normalized.count(" ") + 1
+        if n_words > max_words:
+            continue
+        score = sum(p[2] for p in parts) - penalty * max(n_words - 3, 0)
+        yield " ".join(p[0] for p in parts), normalized, score
+
+
+class MinHashDeduplicator:
+    """Index LSH de signatures MinHash : écarte les mots-clés trop proches d'un mot-clé déjà retenu
+
+    Signatures et recherches dans l'index (valeurs de bande triées) sont vectorisées par lot ;
+    seuls les conflits internes au lot sont résolus séquentiellement. Deux mots-clés de
+    mêmes mots dans un ordre différent sont des doublons exacts.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERMUTATIONS,
+                 bands: int = LSH_BANDS, seed: int = 0):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # Hachage universel multiply-shift : ((a·x + b) mod 2^64) >> 32, a impair
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 2 ** 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        # Par bande : valeurs triées et mot-clé représentant chacune
+        self._bands = [(np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)) for _ in range(bands)]
+        self._signatures = np.zeros((1024, num_perm), dtype=np.uint32)
+        self._exact: set = set()
+        self.kept = 0
+        self.near_duplicates = 0
+        self.exact_duplicates = 0
+
+    def signatures(self, normalized: List[str]) -> np.ndarray:
+        """Signatures d'un lot, calculées sur une matrice d'octets (les formes normalisées sont ASCII)"""
+        width = max(len(text) for text in normalized) + 2
+        padded = np.array([f" {text} ".encode("ascii") for text in normalized], dtype=f"S{width}")
+        chars = padded.view(np.uint8).reshape(len(normalized), width).astype(np.uint64)
+        # Trigramme = 3 octets consécutifs ; les positions au-delà de la fin (octets nuls) sont masquées
+        codes = (chars[:, :-2] << np.uint64(16)) | (chars[:, 1:-1] << np.uint64(8)) | chars[:, 2:]
+        valid = chars[:, 2:] != 0
+        # Opérations en place : le tableau lot × positions × permutations est le plus gros du calcul
+        with np.errstate(over="ignore"):
+            values = codes[:, :, None] * self._a
+            values += self._b
+        values >>= np.uint64(32)
+        values[~valid] = np.iinfo(np.uint32).max
+        return values.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        with np.errstate(over="ignore"):
+            return (banded * self._band_mix).sum(axis=2)
+
+    def _similar(self, left: np.ndarray, right: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Masque des paires (rows[k], cols[k]) dont la similarité estimée atteint le seuil"""
+        return (left[rows] == right[cols]).mean(axis=1) >= self.threshold
+
+    def filter(self, normalized: List[str]) -> List[bool]:
+        """Pour chaque forme normalisée du lot : True si elle est retenue (et ajoutée à l'index)"""
+        keep = [False] * len(normalized)
+        fresh = []
+        for i, text in enumerate(normalized):
+            # Empreinte (64 bits) des mots triés : l'ensemble reste petit même avec des centaines de milliers d'entrées
+            key = hash(" ".join(sorted(text.split())))
+            if key in self._exact:
+                self.exact_duplicates += 1
+            else:
+                self._exact.add(key)
+                fresh.append(i)
+        if not fresh:
+            return keep
+        signatures = self.signatures([normalized[i] for i in fresh])
+        band_keys = self._band_keys(signatures)
+        positions = np.arange(len(fresh))
+        duplicate = np.zeros(len(fresh), dtype=bool)
+
+        # 1. Candidats parmi les mots-clés déjà indexés : recherche dichotomique par bande
+        for band, (keys, indices) in enumerate(self._bands):
+            if not len(keys):
+                continue
+            found = np.minimum(np.searchsorted(keys, band_keys[:, band]), len(keys) - 1)
+            match = keys[found] == band_keys[:, band]
+            rows, cols = positions[match], indices[found[match]]
+            duplicate[rows[self._similar(signatures, self._signatures, rows, cols)]] = True
+
+        # 2. Candidats à l'intérieur du lot : chaque mot-clé face au premier du lot partageant sa bande
+        firsts, seconds = [], []
+        for band in range(self.bands):
+            _, first_position, inverse = np.unique(band_keys[:, band], return_index=True, return_inverse=True)
+            first = first_position[inverse]
+            pair = first != positions
+            firsts.append(first[pair])
+            seconds.append(positions[pair])
+        firsts, seconds = np.concatenate(firsts), np.concatenate(seconds)
+        similar = self._similar(signatures, signatures, firsts, seconds)
+        # Seul un mot-clé retenu peut en écarter un autre : paires parcourues dans l'ordre du lot
+        order = np.argsort(seconds[similar], kind="stable")
+        for first, second in zip(firsts[similar][order].tolist(), seconds[similar][order].tolist()):
+            if not duplicate[first]:
+                duplicate[second] = True
+
+        # 3. Indexation des mots-clés retenus (une entrée par valeur de bande : la première retenue)
+        kept = np.flatnonzero(~duplicate)
+        self.near_duplicates += len(fresh) - len(kept)
+        indices = self._store(signatures[kept])
+        for band, (keys, stored) in enumerate(self._bands):
+            new_keys, first = np.unique(band_keys[kept, band], return_index=True)
+            present = np.isin(new_keys, keys, assume_unique=True)
+            merged_keys = np.concatenate([keys, new_keys[~present]])
+            merged = np.concatenate([stored, indices[first[~present]]])
+            order = np.argsort(merged_keys, kind="stable")
+            self._bands[band] = (merged_keys[order], merged[order])
+        for position in kept.tolist():
+            keep[fresh[position]] = True
+        return keep
+
+    def _store(self, signatures: np.ndarray) -> np.ndarray:
+        needed = self.kept + len(signatures)
+        if needed > len(self._signatures):
+            grown = np.zeros((max(needed, 2 * len(self._signatures)), self._signatures.shape[1]), dtype=np.uint32)
+            grown[:self.kept] = self._signatures[:self.kept]
+            self._signatures = grown
+        self._signatures[self.kept:needed] = signatures
+        indices = np.arange(self.kept, needed)
+        self.kept = needed
+        return indices
+
+    def stats(self) -> Dict[str, int]:
+        return {"kept": self.kept, "near_duplicates": self.near_duplicates,
+                "exact_duplicates": self.exact_duplicates}
+
+
+def iter_unique(candidates: Iterable[Candidate], deduplicator: Optional[MinHashDeduplicator] = None,
+                batch_size: int = BATCH_SIZE) -> Iterator[Tuple[str, float]]:
+    """Mots-clés dédupliqués (mot-clé, score), dans l'ordre de génération, lot par lot"""
+    deduplicator = deduplicator or MinHashDeduplicator()
+    iterator = iter(candidates)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        for (keyword, _, score), kept in zip(batch, deduplicator.filter([c[1] for c in batch])):
+            if kept:
+                yield keyword, score
+
+
+def expand_keywords(product: str, industry: str, countries: Iterable[str], seeds: Iterable[str] = (),
+                    limit: int = 1000, threshold: float = DEFAULT_THRESHOLD,
+                    max_candidates: Optional[int] = None) -> Tuple[List[Tuple[str, float]], Dict[str, int]]:
+    """Les `limit` meilleurs mots-clés distincts et les compteurs de l'expansion
+
+    Seuls les `limit` meilleurs sont conservés en cours de route (tas borné).
+    """
+    candidates = iter_candidates([product, *seeds], industry, countries)
+    if max_candidates is not None:
+        candidates = itertools.islice(candidates, max_candidates)
+    deduplicator = MinHashDeduplicator(threshold)
+    best: List[Tuple[float, int, str]] = []
+    for order, (keyword, score) in enumerate(iter_unique(candidates, deduplicator)):
+        # L'ordre de génération départage les égalités (le plus ancien gagne)
+        item = (score, -order, keyword)
+        if len(best) < limit:
+            heapq.heappush(best, item)
+        elif item > best[0]:
+            heapq.heapreplace(best, item)
+    stats = deduplicator.stats()
+    stats["candidates"] = stats["kept"] + stats["near_duplicates"] + stats["exact_duplicates"]
+    return [(keyword, score) for score, _, keyword in sorted(best, reverse=True)], stats
@@ -0,0 +1,236 @@
+# kpi_rollups.py
+# Agrégats KPI pré-calculés et mis à jour incrémentalement (sommes préfixes par jour et par campagne)
+
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+METRICS = ["impressions", "clicks", "conversions", "spend"]
+
+# Fréquences d'agrégation proposées par le tableau de bord
+FREQUENCIES = {"D": "Jour", "W": "Semaine", "M": "Mois"}
+
+_INITIAL_DAYS = 64
+
+
+def derived_ratios(totals: Dict[str, float]) -> Dict[str, float]:
+    """CTR (%), CPC et CPA à partir des totaux (0 si le dénominateur est nul)"""
+    impressions, clicks = totals["impressions"], totals["clicks"]
+    conversions, spend = totals["conversions"], totals["spend"]
+    return {
+        "ctr": clicks / impressions * 100 if impressions else 0.0,
+        "cpc": spend / clicks if clicks else 0.0,
+        "cpa": spend / conversions if conversions else 0.0
+    }
+
+
+def _ratio_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frame["ctr"] = np.where(frame["impressions"] > 0, frame["clicks"] / frame["impressions"] * 100, 0.0)
+        frame["cpc"] = np.where(frame["clicks"] > 0, frame["spend"] / frame["clicks"], 0.0)
+        frame["cpa"] = np.where(frame["conversions"] > 0, frame["spend"] / frame["conversions"], 0.0)
+    return frame
+
+
+class KpiRollup:
+    """Totaux quotidiens par campagne ; les requêtes par période lisent des sommes préfixes"""
+
+    def __init__(self):
+        self.origin: Optional[date] = None
+        self._campaigns: Dict[str, int] = {}
+        # Tableaux denses [campagne, jour, métrique], agrandis par doublement
+        self._daily = np.zeros((0, 0, len(METRICS)))
+        self._n_days = 0
+        # Sommes préfixes (ligne 0 = zéro) et premier jour à recalculer
+        self._prefix = np.zeros((1, len(METRICS)))
+        self._campaign_prefix = np.zeros((0, 1, len(METRICS)))
+        self._dirty_from: Optional[int] = None
+        self._campaign_prefix_stale = False
+        self._lock = threading.Lock()
+        self.version = 0
+        # Dernière version ayant modifié chaque jour (les graphiques d'une période non touchée restent en cache)
+        self._day_versions = np.zeros(0, dtype=np.int64)
+
+    # --- Alimentation -----------------------------------------------------
+
+    def _reserve(self, first: date, last: date, n_campaigns: int) -> None:
+        """Agrandit les tableaux pour couvrir [first, last] et n_campaigns campagnes"""
+        if self.origin is None:
+            self.origin = first
+        shift = max((self.origin - first).days, 0)
+        n_days = max(self._n_days + shift, (last - self.origin).days + shift + 1)
+        capacity_campaigns, capacity_days = self._daily.shape[:2]
+        if shift or n_days > capacity_days or n_campaigns > capacity_campaigns:
+            new_days = max(n_days, capacity_days * 2 if n_days > capacity_days else capacity_days, _INITIAL_DAYS)
+            new_campaigns = max(n_campaigns, capacity_campaigns * 2 if n_campaigns > capacity_campaigns
+                                else capacity_campaigns, 1)
+            grown = np.zeros((new_campaigns, new_days, len(METRICS)))
+            grown[:capacity_campaigns, shift:shift + self._n_days] = self._daily[:, :self._n_days]
+            self._daily = grown
+            day_versions = np.zeros(new_days, dtype=np.int64)
+            day_versions[shift:shift + self._n_days] = self._day_versions[:self._n_days]
+            self._day_versions = day_versions
+        if shift:
+            # Une date antérieure à l'origine décale tout : les préfixes sont à recalculer
+            self.origin -= timedelta(days=shift)
+            self._mark_dirty(0)
+        self._n_days = n_days
+
+    def _mark_dirty(self, day: int) -> None:
+        self._dirty_from = day if self._dirty_from is None else min(self._dirty_from, day)
+        self._campaign_prefix_stale = True
+
+    def ingest(self, insights: pd.DataFrame) -> None:
+        """Ajoute des lignes (date, campaign_id, métriques) ; seuls les jours touchés sont recalculés"""
+        if insights.empty:
+            return
+        dates = pd.to_datetime(insights["date"]).to_numpy().astype("datetime64[D]")
+        codes, uniques = pd.factorize(insights["campaign_id"].astype(str))
+        values = insights[METRICS].to_numpy(dtype=float)
+        with self._lock:
+            for campaign in uniques:
+                self._campaigns.setdefault(campaign, len(self._campaigns))
+            first, last = dates.min().item(), dates.max().item()
+            self._reserve(first, last, len(self._campaigns))
+            days = (dates - np.datetime64(self.origin, "D")).astype(np.int64)
+            rows = np.array([self._campaigns[campaign] for campaign in uniques])[codes]
+            # Regroupement des lignes par cellule (campagne, jour) puis une seule addition par cellule
+            cells, inverse = np.unique(rows * self._daily.shape[1] + days, return_inverse=True)
+            sums = np.column_stack([np.bincount(inverse, weights=values[:, k], minlength=len(cells))
+                                    for k in range(len(METRICS))])
+            self._daily.reshape(-1, len(METRICS))[cells] += sums
+            self._mark_dirty(int(days.min()))
+            self.version += 1
+            self._day_versions[days] = self.version
+
+    # --- Requêtes ---------------------------------------------------------
+
+    def _refresh_prefix(self) -> np.ndarray:
+        """Prolonge la somme préfixe globale à partir du premier jour modifié"""
+        n_days = self._n_days
+        if self._dirty_from is None and len(self._prefix) == n_days + 1:
+            return self._prefix
+        start = min(n_days if self._dirty_from is None else self._dirty_from, len(self._prefix) - 1)
+        prefix = np.empty((n_days + 1, len(METRICS)))
+        prefix[:start + 1] = self._prefix[:start + 1]
+        prefix[start + 1:] = prefix[start] + np.cumsum(self._daily[:, start:n_days].sum(axis=0), axis=0)
+        self._prefix = prefix
+        self._dirty_from = None
+        return prefix
+
+    def _refresh_campaign_prefix(self) -> np.ndarray:
+        """Sommes préfixes par campagne, recalculées seulement quand une requête en a besoin"""
+        n_campaigns = len(self._campaigns)
+        if self._campaign_prefix_stale or self._campaign_prefix.shape[:2] != (n_campaigns, self._n_days + 1):
+            prefix = np.zeros((n_campaigns, self._n_days + 1, len(METRICS)))
+            np.cumsum(self._daily[:n_campaigns, :self._n_days], axis=1, out=prefix[:, 1:])
+            self._campaign_prefix = prefix
+            self._campaign_prefix_stale = False
+        return self._campaign_prefix
+
+    def _bounds(self, start: date, end: date):
+        """Indices [a, b) des jours de la période, bornés aux données disponibles"""
+        if self.origin is None:
+            return 0, 0
+        a = min(max((start - self.origin).days, 0), self._n_days)
+        b = min(max((end - self.origin).days + 1, 0), self._n_days)
+        return a, max(a, b)
+
+    def period_version(self, start: date, end: date) -> int:
+        """Dernière version ayant modifié un jour de la période (clé de cache des graphiques)"""
+        with self._lock:
+            a, b = self._bounds(start, end)
+            return int(self._day_versions[a:b].max()) if b > a else 0
+
+    @property
+    def date_range(self) -> Optional[tuple]:
+        if self.origin is None:
+            return None
+        return self.origin, self.origin + timedelta(days=self._n_days - 1)
+
+    @property
+    def campaigns(self) -> list:
+        return list(self._campaigns)
+
+    def totals(self, start: date, end: date, campaign: Optional[str] = None) -> Dict[str, float]:
+        """Totaux et ratios d'une période en O(1)"""
+        with self._lock:
+            a, b = self._bounds(start, end)
+            if campaign is None:
+                prefix = self._refresh_prefix()
+                values = prefix[b] - prefix[a]
+            elif campaign in self._campaigns:
+                prefix = self._refresh_campaign_prefix()[self._campaigns[campaign]]
+                values = prefix[b] - prefix[a]
+            else:
+                values = np.zeros(len(METRICS))
+        totals = dict(zip(METRICS, values.tolist()))
+        totals.update(derived_ratios(totals))
+        return totals
+
+    def period_over_period(self, start: date, end: date,
+                           campaign: Optional[str] = None) -> Dict[str, Optional[float]]:
+        """Variation (%) de chaque KPI par rapport à la période précédente de même durée"""
+        length = (end - start).days + 1
+        current = self.totals(start, end, campaign)
+        previous_end = start - timedelta(days=1)
+        previous = self.totals(previous_end - timedelta(days=length - 1), previous_end, campaign)
+        return {
+            key: (current[key] - previous[key]) / previous[key] * 100 if previous[key] else None
+            for key in current
+        }
+
+    def series(self, start: date, end: date, freq: str = "D",
+               campaign: Optional[str] = None) -> pd.DataFrame:
+        """Série agrégée par jour, semaine ou mois, calculée aux bornes de chaque période"""
+        with self._lock:
+            a, b = self._bounds(start, end)
+            if campaign is None:
+                prefix = self._refresh_prefix()
+            elif campaign in self._campaigns:
+                prefix = self._refresh_campaign_prefix()[self._campaigns[campaign]]
+            else:
+                a = b = 0
+                prefix = np.zeros((1, len(METRICS)))
+            days = pd.date_range(self.origin + timedelta(days=a), periods=b - a, freq="D") \
+                if b > a else pd.DatetimeIndex([])
+            if freq == "D":
+                edges = np.arange(a, b + 1)
+                labels = days
+            else:
+                periods = days.to_period("W" if freq == "W" else "M")
+                change = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]]) if len(days) else np.array([], int)
+                edges = np.r_[a + change, b]
+                labels = periods[change].start_time
+            values = prefix[edges[1:]] - prefix[edges[:-1]] if len(edges) > 1 else np.zeros((0, len(METRICS)))
+        frame = pd.DataFrame(values, columns=METRICS)
+        frame.insert(0, "date", labels)
+        return _ratio_columns(frame)
+
+    def daily_matrix(self, start: date, end: date, metrics: Optional[list] = None) -> np.ndarray:
+        """Copie des valeurs quotidiennes [campagne, jour, métrique] (campagnes dans l'ordre de `campaigns`)"""
+        columns = [METRICS.index(metric) for metric in (metrics or METRICS)]
+        with self._lock:
+            a, b = self._bounds(start, end)
+            return self._daily[:len(self._campaigns), a:b][:, :, columns].copy()
+
+    def by_campaign(self, start: date, end: date) -> pd.DataFrame:
+        """Totaux et ratios de chaque campagne sur la période"""
+        with self._lock:
+            a, b = self._bounds(start, end)
+            prefix = self._refresh_campaign_prefix()
+            values = prefix[:, b] - prefix[:, a]
+        frame = pd.DataFrame(values, columns=METRICS)
+        frame.insert(0, "campaign_id", list(self._campaigns))
+        return _ratio_columns(frame)
+
+
+def build_rollup(batches: Iterable[pd.DataFrame]) -> KpiRollup:
+    """Construit les agrégats à partir de lots de lignes (sans tout charger en mémoire)"""
+    rollup = KpiRollup()
+    for batch in batches:
+        rollup.ingest(batch)
+    return rollup
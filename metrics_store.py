@@ -0,0 +1,246 @@
+# metrics_store.py
+# Stockage colonnaire (Parquet partitionné par mois) des statistiques quotidiennes des publicités
+
+import contextlib
+import os
+import shutil
+import threading
+import uuid
+from datetime import date
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+try:
+    import fcntl
+except ImportError:  # Windows : écritures sérialisées dans le processus seulement
+    fcntl = None
+
+# Répertoire du store (surchargeable pour pointer vers les vraies données)
+METRICS_PATH_ENV = "ADS_METRICS_PATH"
+DEFAULT_METRICS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "metrics")
+
+KEY_COLUMNS = ["account_id", "campaign_id", "adset_id", "ad_id", "date"]
+METRIC_COLUMNS = ["impressions", "clicks", "conversions", "spend"]
+
+SCHEMA = pa.schema([
+    ("account_id", pa.string()),
+    ("campaign_id", pa.string()),
+    ("adset_id", pa.string()),
+    ("ad_id", pa.string()),
+    ("date", pa.date32()),
+    ("impressions", pa.int64()),
+    ("clicks", pa.int64()),
+    ("conversions", pa.int64()),
+    ("spend", pa.float64())
+])
+
+PARTITIONING = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+# Taille des groupes de lignes : statistiques min/max assez fines pour sauter les blocs hors période
+ROW_GROUP_SIZE = 256 * 1024
+
+# Verrou des écritures partagé par les processus (préfixe « . » : ignoré par les lectures du dataset)
+_LOCK_FILE = ".lock"
+_process_lock = threading.Lock()
+
+
+def _months_between(start: date, end: date) -> List[str]:
+    return [period.strftime("%Y-%m") for period in pd.period_range(start, end, freq="M")]
+
+
+class MetricsStore:
+    """Statistiques par compte / campagne / ad set / publicité / jour, lues sans copie vers pandas"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get(METRICS_PATH_ENV, DEFAULT_METRICS_PATH)
+
+    def _dataset(self) -> ds.Dataset:
+        return ds.dataset(self.path, schema=SCHEMA.append(pa.field("month", pa.string())),
+                          format="parquet", partitioning=PARTITIONING)
+
+    def is_empty(self) -> bool:
+        if not os.path.isdir(self.path):
+            return True
+        return not any(name.endswith(".parquet") for _, _, files in os.walk(self.path) for name in files)
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        """Verrou exclusif des écritures, entre threads et entre processus (workers)"""
+        with _process_lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, _LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _to_table(insights: pd.DataFrame) -> pa.Table:
+        missing = set(KEY_COLUMNS + METRIC_COLUMNS) - set(insights.columns)
+        if missing:
+            raise ValueError(f"Colonnes manquantes: {', '.join(sorted(missing))}")
+        frame = insights[KEY_COLUMNS + METRIC_COLUMNS]
+        # Conversion des dates en date32 dans Arrow (aucun objet date Python par ligne)
+        dates = pc.cast(pa.array(pd.to_datetime(frame["date"]).to_numpy()), pa.date32())
+        table = pa.Table.from_pandas(frame.drop(columns="date"), preserve_index=False)
+        table = table.add_column(KEY_COLUMNS.index("date"), "date", dates).cast(SCHEMA)
+        return table.append_column("month", pc.strftime(table["date"], format="%Y-%m"))
+
+    def _write(self, table: pa.Table, existing_data_behavior: str) -> None:
+        ds.write_dataset(
+            table, self.path, format="parquet", partitioning=PARTITIONING,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior=existing_data_behavior,
+            max_rows_per_group=ROW_GROUP_SIZE, min_rows_per_group=min(ROW_GROUP_SIZE, max(len(table), 1))
+        )
+
+    def append(self, insights: pd.DataFrame) -> int:
+        """Ajoute des lignes (un nouveau fichier par partition mensuelle touchée)
+
+        Aucune déduplication : réservé aux lignes nouvelles (import initial, jeux de démonstration).
+        Les données susceptibles d'être reçues plusieurs fois passent par upsert.
+        """
+        table = self._to_table(insights)
+        self._write(table, "overwrite_or_ignore")
+        return len(table)
+
+    def upsert(self, insights: pd.DataFrame, replace_range: Optional[Tuple[date, date]] = None,
+               account_id: Optional[str] = None) -> int:
+        """Écrit des lignes qui remplacent celles de même clé (compte, campagne, ad set, publicité, jour)
+
+        Avec `replace_range`, toutes les lignes existantes de la période (du compte `account_id` s'il est
+        donné) sont aussi supprimées (resynchronisation).
+        Les partitions mensuelles concernées sont réécrites : une ligne reçue deux fois n'est comptée qu'une fois.
+        """
+        # Dans les lignes reçues, la dernière valeur d'une clé l'emporte
+        table = self._to_table(insights.drop_duplicates(KEY_COLUMNS, keep="last"))
+        months = set(pc.unique(table["month"]).to_pylist())
+        if replace_range is not None:
+            months.update(_months_between(*replace_range))
+        if not months:
+            return 0
+        with self.lock():
+            if self.is_empty():
+                existing = table.schema.empty_table()
+            else:
+                existing = self._dataset().to_table(filter=ds.field("month").isin(sorted(months)))
+            if replace_range is not None:
+                start, end = (pa.scalar(bound, pa.date32()) for bound in replace_range)
+                replaced = pc.and_(pc.greater_equal(existing["date"], start), pc.less_equal(existing["date"], end))
+                if account_id is not None:
+                    replaced = pc.and_(replaced, pc.equal(existing["account_id"], account_id))
+                existing = existing.filter(pc.invert(replaced))
+            kept = existing.join(table.select(KEY_COLUMNS), keys=KEY_COLUMNS, join_type="left anti")
+            merged = pa.concat_tables([kept.select(table.column_names), table])
+            # Mois vidés par la resynchronisation : aucun fichier écrit, le répertoire est supprimé
+            for month in months - set(pc.unique(merged["month"]).to_pylist()):
+                shutil.rmtree(os.path.join(self.path, f"month={month}"), ignore_errors=True)
+            if len(merged):
+                self._write(merged, "delete_matching")
+        return len(table)
+
+    def date_bounds(self) -> Optional[Tuple[date, date]]:
+        """Première et dernière date, lues dans les statistiques Parquet (aucune donnée chargée)"""
+        if self.is_empty():
+            return None
+        low, high = None, None
+        for fragment in self._dataset().get_fragments():
+            fragment.ensure_complete_metadata()
+            for row_group in fragment.row_groups:
+                stats = row_group.statistics.get("date")
+                if stats:
+                    low = stats["min"] if low is None else min(low, stats["min"])
+                    high = stats["max"] if high is None else max(high, stats["max"])
+        return (low, high) if low is not None else None
+
+    def _filter(self, start: date, end: date, campaign_ids: Optional[Iterable[str]] = None):
+        # Le filtre sur la partition évite d'ouvrir les fichiers des autres mois
+        expression = (ds.field("month").isin(_months_between(start, end))
+                      & (ds.field("date") >= pa.scalar(start, pa.date32()))
+                      & (ds.field("date") <= pa.scalar(end, pa.date32())))
+        if campaign_ids is not None:
+            expression &= ds.field("campaign_id").isin(list(campaign_ids))
+        return expression
+
+    def scan(self, start: date, end: date, columns: Optional[List[str]] = None,
+             campaign_ids: Optional[Iterable[str]] = None) -> pa.Table:
+        """Table Arrow limitée à la période et aux colonnes demandées"""
+        columns = columns or KEY_COLUMNS + METRIC_COLUMNS
+        if self.is_empty():
+            return SCHEMA.empty_table().select(columns)
+        return self._dataset().to_table(columns=columns, filter=self._filter(start, end, campaign_ids))
+
+    def iter_batches(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Parcourt tout le store par lots (mémoire bornée)"""
+        if self.is_empty():
+            return
+        for batch in self._dataset().to_batches(columns=columns or KEY_COLUMNS + METRIC_COLUMNS):
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def load(self, start: date, end: date, columns: Optional[List[str]] = None,
+             campaign_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        # split_blocks/self_destruct : les colonnes numériques sans nulls sont partagées sans copie
+        return self.scan(start, end, columns, campaign_ids).to_pandas(split_blocks=True, self_destruct=True)
+
+    def daily_totals(self, start: date, end: date, columns: Optional[List[str]] = None,
+                     campaign_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Totaux par jour, agrégés dans Arrow avant la conversion en pandas"""
+        columns = columns or METRIC_COLUMNS
+        table = self.scan(start, end, ["date"] + columns, campaign_ids)
+        totals = table.group_by("date").aggregate([(column, "sum") for column in columns])
+        totals = totals.rename_columns([name.removesuffix("_sum") for name in totals.column_names])
+        frame = totals.to_pandas().sort_values("date", ignore_index=True)
+        frame["date"] = pd.to_datetime(frame["date"])
+        return frame[["date"] + columns]
+
+    def ad_totals(self, start: date, end: date, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Totaux par ad set et par publicité (variantes d'un même ad set), agrégés dans Arrow"""
+        columns = columns or METRIC_COLUMNS
+        table = self.scan(start, end, ["adset_id", "ad_id"] + columns)
+        totals = table.group_by(["adset_id", "ad_id"]).aggregate([(column, "sum") for column in columns])
+        totals = totals.rename_columns([name.removesuffix("_sum") for name in totals.column_names])
+        return totals.to_pandas()[["adset_id", "ad_id"] + columns]
+
+
+def generate_synthetic_insights(start: date, end: date, n_ads: int = 1,
+                                seed: int = 0) -> pd.DataFrame:
+    """Jeu de démonstration vectorisé ; avec une seule publicité il reproduit l'ancienne courbe simulée"""
+    dates = pd.date_range(start, end, freq="D")
+    n_days = len(dates)
+    day = np.tile(np.arange(n_days), n_ads)
+    ad = np.repeat(np.arange(n_ads), n_days)
+    # Échelle aléatoire par publicité (1 pour la première, comme l'ancienne démo)
+    scale = np.random.default_rng(seed).uniform(0.2, 2.0, size=n_ads)
+    scale[0] = 1.0
+    ad_scale = scale[ad]
+
+    return pd.DataFrame({
+        "account_id": "act_demo",
+        "campaign_id": pd.Categorical([f"campaign_{i // 10}" for i in range(n_ads)])[ad],
+        "adset_id": pd.Categorical([f"adset_{i // 3}" for i in range(n_ads)])[ad],
+        "ad_id": pd.Categorical([f"ad_{i}" for i in range(n_ads)])[ad],
+        "date": np.tile(dates.values, n_ads),
+        "impressions": ((1000 + day * 50 + (day % 7) * 200) * ad_scale).astype(np.int64),
+        "clicks": ((50 + day * 2 + (day % 7) * 10) * ad_scale).astype(np.int64),
+        "conversions": ((2 + (day % 5)) * ad_scale).astype(np.int64),
+        "spend": (25 + day * 1.5 + (day % 3) * 5) * ad_scale
+    })
+
+
+def ensure_demo_data(store: MetricsStore, start: date = date(2025, 1, 1),
+                     end: date = date(2025, 6, 8)) -> None:
+    """Alimente un store vide avec les données de démonstration"""
+    # Sous verrou : deux workers qui démarrent ensemble ne l'alimentent qu'une fois
+    with store.lock():
+        if store.is_empty():
+            store.append(generate_synthetic_insights(start, end))
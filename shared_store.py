@@ -0,0 +1,375 @@
+# shared_store.py
+# Stockage partagé entre les workers Streamlit : campagnes générées et caches de l'agent.
+# Deux backends à l'interface Redis (sous-ensemble de redis-py) : fichier SQLite local ou serveur Redis.
+
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import msgpack
+
+# URL du stockage : redis://…, memory:// (substitut local de Redis) ou chemin d'un fichier SQLite
+SHARED_STORE_ENV = "ADS_SHARED_STORE"
+DEFAULT_SHARED_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "shared_store.db")
+
+KEY_PREFIX = "ads:"
+
+CAMPAIGN_NAMESPACE = "campaign"
+CAMPAIGN_TTL = 7 * 24 * 3600
+
+# Les entrées expirées du backend SQLite sont supprimées toutes les N écritures
+PURGE_EVERY = 500
+
+
+def _default(value: Any) -> Any:
+    # Scalaires et tableaux numpy (métriques estimées) : convertis en types Python
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Type non sérialisable : {type(value).__name__}")
+
+
+def pack(value: Any) -> bytes:
+    """Sérialisation compacte (msgpack) ; les tuples deviennent des listes, comme en JSON"""
+    return msgpack.packb(value, use_bin_type=True, default=_default)
+
+
+def unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _seconds(ttl: Optional[float]) -> Optional[int]:
+    # Redis n'accepte que des durées entières strictement positives
+    return None if ttl is None else max(int(ttl), 1)
+
+
+def _text(value: Any) -> str:
+    # redis-py renvoie les noms de champs en bytes
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class SQLiteBackend:
+    """Backend fichier : clés simples et hashes Redis émulés dans une seule table"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (key, field)
+                ) WITHOUT ROWID
+            """)
+            self._purge(conn)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _purge(conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+
+    def _count_write(self, conn: sqlite3.Connection) -> None:
+        """Purge les entrées expirées toutes les PURGE_EVERY écritures, dans la transaction en cours"""
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % PURGE_EVERY == 0
+        if due:
+            self._purge(conn)
+
+    def get(self, name: str) -> Optional[bytes]:
+        return self.hmget(name, [""])[0]
+
+    def set(self, name: str, value: bytes, ex: Optional[float] = None) -> bool:
+        expires_at = time.time() + ex if ex is not None else None
+        with self._connection() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (name,))
+            conn.execute("INSERT INTO entries (key, field, value, expires_at) VALUES (?, '', ?, ?)",
+                         (name, value, expires_at))
+            self._count_write(conn)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._connection() as conn:
+            return conn.executemany("DELETE FROM entries WHERE key = ?", [(name,) for name in names]).rowcount
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Supprime toutes les clés commençant par `prefix` (parcours de la clé primaire, pas de LIKE)"""
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM entries WHERE key >= ? AND key < ?", (prefix, upper)).rowcount
+
+    def hset(self, name: str, mapping: Dict[str, bytes]) -> int:
+        # L'expiration éventuelle de la clé s'applique aussi aux nouveaux champs
+        with self._connection() as conn:
+            row = conn.execute("SELECT expires_at FROM entries WHERE key = ? LIMIT 1", (name,)).fetchone()
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, field, value, expires_at) VALUES (?, ?, ?, ?)",
+                [(name, field, value, row[0] if row else None) for field, value in mapping.items()]
+            )
+            self._count_write(conn)
+        return len(mapping)
+
+    def replace_hash(self, name: str, mapping: Dict[str, bytes], ttl: Optional[float] = None) -> None:
+        """Remplace tout le hash et son expiration en une seule transaction"""
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._connection() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (name,))
+            conn.executemany("INSERT INTO entries (key, field, value, expires_at) VALUES (?, ?, ?, ?)",
+                             [(name, field, value, expires_at) for field, value in mapping.items()])
+            self._count_write(conn)
+
+    def hmget(self, name: str, keys: Sequence[str]) -> List[Optional[bytes]]:
+        keys = list(keys)
+        placeholders = ", ".join("?" * len(keys))
+        rows = self._connection().execute(
+            f"SELECT field, value FROM entries WHERE key = ? AND field IN ({placeholders}) "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (name, *keys, time.time())
+        ).fetchall()
+        values = dict(rows)
+        return [values.get(key) for key in keys]
+
+    def hkeys(self, name: str) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT field FROM entries WHERE key = ? AND field != '' AND (expires_at IS NULL OR expires_at > ?)",
+            (name, time.time())
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def expire(self, name: str, time_seconds: float) -> bool:
+        with self._connection() as conn:
+            return conn.execute("UPDATE entries SET expires_at = ? WHERE key = ?",
+                                (time.time() + time_seconds, name)).rowcount > 0
+
+
+class LocalRedis:
+    """Substitut en mémoire d'un serveur Redis (mêmes commandes et mêmes types que redis-py)"""
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, name: str) -> Any:
+        expires_at = self._expires.get(name)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+        return self._data.get(name)
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._live(name)
+            if isinstance(value, dict):
+                raise TypeError("WRONGTYPE Operation against a key holding the wrong kind of value")
+            return value
+
+    def set(self, name: str, value: bytes, ex: Optional[float] = None) -> bool:
+        with self._lock:
+            self._data[name] = bytes(value)
+            if ex is not None:
+                self._expires[name] = time.time() + ex
+            else:
+                self._expires.pop(name, None)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            deleted = sum(self._data.pop(name, None) is not None for name in names)
+            for name in names:
+                self._expires.pop(name, None)
+        return deleted
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            names = [name for name in self._data if name.startswith(prefix)]
+            for name in names:
+                del self._data[name]
+                self._expires.pop(name, None)
+        return len(names)
+
+    def hset(self, name: str, mapping: Dict[str, bytes]) -> int:
+        with self._lock:
+            fields = self._live(name)
+            if fields is None:
+                fields = self._data[name] = {}
+            added = sum(field.encode("utf-8") not in fields for field in mapping)
+            fields.update({field.encode("utf-8"): bytes(value) for field, value in mapping.items()})
+        return added
+
+    def hmget(self, name: str, keys: Sequence[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            fields = self._live(name) or {}
+            return [fields.get(key.encode("utf-8")) for key in keys]
+
+    def hkeys(self, name: str) -> List[bytes]:
+        with self._lock:
+            return list(self._live(name) or {})
+
+    def expire(self, name: str, time_seconds: float) -> bool:
+        with self._lock:
+            if self._live(name) is None:
+                return False
+            self._expires[name] = time.time() + time_seconds
+            return True
+
+    def replace_hash(self, name: str, mapping: Dict[str, bytes], ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[name] = {field.encode("utf-8"): bytes(value) for field, value in mapping.items()}
+            if ttl is not None:
+                self._expires[name] = time.time() + ttl
+            else:
+                self._expires.pop(name, None)
+
+
+class SharedStore:
+    """Valeurs et enregistrements sérialisés en msgpack, rangés par espace de noms"""
+
+    def __init__(self, backend: Any, prefix: str = KEY_PREFIX):
+        self.backend = backend
+        self.prefix = prefix
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        data = self.backend.get(self._key(namespace, key))
+        return default if data is None else unpack(data)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.backend.set(self._key(namespace, key), pack(value), ex=_seconds(ttl))
+
+    def delete(self, namespace: str, key: str) -> None:
+        self.backend.delete(self._key(namespace, key))
+
+    def clear(self, namespace: str) -> int:
+        """Supprime toutes les clés d'un espace de noms"""
+        prefix = self._key(namespace, "")
+        if hasattr(self.backend, "delete_prefix"):
+            return self.backend.delete_prefix(prefix)
+        # redis-py : parcours incrémental (SCAN) plutôt que KEYS, qui bloquerait le serveur
+        deleted, batch = 0, []
+        for name in self.backend.scan_iter(match=re.sub(r"([*?\[\]\\])", r"\\\1", prefix) + "*", count=1000):
+            batch.append(name)
+            if len(batch) >= 1000:
+                deleted += self.backend.delete(*batch)
+                batch = []
+        if batch:
+            deleted += self.backend.delete(*batch)
+        return deleted
+
+    def save_record(self, namespace: str, record_id: str, record: Dict[str, Any],
+                    ttl: Optional[float] = None) -> None:
+        """Un champ sérialisé par clé de premier niveau, pour pouvoir les relire séparément"""
+        key = self._key(namespace, record_id)
+        mapping = {field: pack(value) for field, value in record.items()}
+        if hasattr(self.backend, "replace_hash"):
+            self.backend.replace_hash(key, mapping, _seconds(ttl))
+            return
+        # redis-py : suppression, écriture et expiration dans une même transaction MULTI/EXEC
+        pipe = self.backend.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=mapping)
+        if ttl is not None:
+            pipe.expire(key, _seconds(ttl))
+        pipe.execute()
+
+    def record_fields(self, namespace: str, record_id: str) -> List[str]:
+        return [_text(field) for field in self.backend.hkeys(self._key(namespace, record_id))]
+
+    def load_fields(self, namespace: str, record_id: str, fields: Iterable[str]) -> Dict[str, Any]:
+        fields = list(fields)
+        if not fields:
+            return {}
+        values = self.backend.hmget(self._key(namespace, record_id), fields)
+        return {field: unpack(value) for field, value in zip(fields, values) if value is not None}
+
+    def lazy_record(self, namespace: str, record_id: str) -> Optional["LazyRecord"]:
+        fields = self.record_fields(namespace, record_id)
+        return LazyRecord(self, namespace, record_id, fields) if fields else None
+
+
+class LazyRecord(Mapping):
+    """Enregistrement dont chaque champ n'est lu et désérialisé qu'au premier accès"""
+
+    def __init__(self, store: SharedStore, namespace: str, record_id: str, fields: Sequence[str]):
+        self.store = store
+        self.namespace = namespace
+        self.record_id = record_id
+        self._fields = list(fields)
+        self._loaded: Dict[str, Any] = {}
+
+    def prefetch(self, *fields: str) -> "LazyRecord":
+        """Charge en un seul aller-retour les champs qu'une page va afficher"""
+        missing = [field for field in fields if field in self._fields and field not in self._loaded]
+        self._loaded.update(self.store.load_fields(self.namespace, self.record_id, missing))
+        return self
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in self._loaded:
+            if field not in self._fields:
+                raise KeyError(field)
+            self.prefetch(field)
+            if field not in self._loaded:
+                # Enregistrement expiré entre-temps
+                raise KeyError(field)
+        return self._loaded[field]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    @property
+    def loaded_fields(self) -> List[str]:
+        return list(self._loaded)
+
+
+def open_backend(url: str) -> Any:
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+
+        return redis.Redis.from_url(url)
+    if url.startswith("memory://"):
+        return LocalRedis()
+    return SQLiteBackend(url[len("sqlite://"):] if url.startswith("sqlite://") else url)
+
+
+@functools.lru_cache(maxsize=None)
+def get_shared_store(url: Optional[str] = None) -> SharedStore:
+    """Stockage du processus, selon ADS_SHARED_STORE (fichier SQLite local par défaut)"""
+    return SharedStore(open_backend(url or os.environ.get(SHARED_STORE_ENV) or DEFAULT_SHARED_STORE))
+
+
+def save_campaign(store: SharedStore, campaign_data: Dict[str, Any], campaign_id: Optional[str] = None) -> str:
+    """Enregistre une campagne générée et renvoie son identifiant (à conserver dans l'URL)"""
+    campaign_id = campaign_id or uuid.uuid4().hex
+    store.save_record(CAMPAIGN_NAMESPACE, campaign_id, dict(campaign_data), ttl=CAMPAIGN_TTL)
+    return campaign_id
+
+
+def load_campaign(store: SharedStore, campaign_id: str) -> Optional[LazyRecord]:
+    """Campagne enregistrée, hydratée champ par champ ; None si inconnue ou expirée"""
+    return store.lazy_record(CAMPAIGN_NAMESPACE, campaign_id)
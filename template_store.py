@@ -0,0 +1,217 @@
+# template_store.py
+# Bibliothèque de templates persistante (SQLite) : index par secteur / région / ton,
+# recherche plein texte (FTS5) et classement par CTR historique
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+TEMPLATES_DB_ENV = "ADS_TEMPLATES_DB"
+DEFAULT_TEMPLATES_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "templates.db")
+
+DEFAULT_PAGE_SIZE = 10
+
+# En dessous, le CTR observé est trop bruité pour classer le template (il reste NULL)
+MIN_IMPRESSIONS = 1000
+
+# Colonnes renvoyées par les listes (la configuration complète n'est chargée qu'à la demande)
+SUMMARY_COLUMNS = ["id", "name", "industry", "region", "tone", "description", "headline", "ctr"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    industry TEXT NOT NULL,
+    region TEXT,
+    tone TEXT,
+    product TEXT,
+    description TEXT NOT NULL DEFAULT '',
+    headline TEXT NOT NULL DEFAULT '',
+    keywords TEXT NOT NULL DEFAULT '',
+    config TEXT NOT NULL,
+    impressions INTEGER NOT NULL DEFAULT 0,
+    clicks INTEGER NOT NULL DEFAULT 0,
+    ctr REAL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_templates_industry_ctr ON templates (industry, ctr DESC);
+CREATE INDEX IF NOT EXISTS idx_templates_region_ctr ON templates (region, ctr DESC);
+CREATE INDEX IF NOT EXISTS idx_templates_tone_ctr ON templates (tone, ctr DESC);
+CREATE INDEX IF NOT EXISTS idx_templates_ctr ON templates (ctr DESC);
+"""
+
+# Index plein texte externe, synchronisé par triggers
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS templates_fts USING fts5(
+    name, headline, keywords, content='templates', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS templates_ai AFTER INSERT ON templates BEGIN
+    INSERT INTO templates_fts (rowid, name, headline, keywords)
+    VALUES (new.id, new.name, new.headline, new.keywords);
+END;
+CREATE TRIGGER IF NOT EXISTS templates_ad AFTER DELETE ON templates BEGIN
+    INSERT INTO templates_fts (templates_fts, rowid, name, headline, keywords)
+    VALUES ('delete', old.id, old.name, old.headline, old.keywords);
+END;
+CREATE TRIGGER IF NOT EXISTS templates_au AFTER UPDATE OF name, headline, keywords ON templates BEGIN
+    INSERT INTO templates_fts (templates_fts, rowid, name, headline, keywords)
+    VALUES ('delete', old.id, old.name, old.headline, old.keywords);
+    INSERT INTO templates_fts (rowid, name, headline, keywords)
+    VALUES (new.id, new.name, new.headline, new.keywords);
+END;
+"""
+
+# Templates de démonstration (ancienne liste statique) : (nom, secteur, produit, région, ton, CTR, description)
+DEMO_TEMPLATES = [
+    ("FIV Turquie - Approche émotionnelle", "Santé/Médical", "FIV", "Europe", "Émotionnel", 3.2,
+     "Template optimisé pour les services de FIV en Turquie"),
+    ("E-commerce Mode - Promotion Flash", "E-commerce", "Mode", "Europe", "Urgence", 2.8,
+     "Template pour les promotions limitées dans le temps"),
+    ("Formation Professionnelle - B2B", "Services", "Formation", "Afrique francophone", "Professionnel", 1.9,
+     "Template pour les services de formation professionnelle")
+]
+
+
+def _fts_query(text: str) -> str:
+    """Transforme une saisie libre en requête FTS5 (préfixes, tous les termes requis)"""
+    terms = ["".join(ch for ch in term if ch.isalnum()) for term in text.split()]
+    return " ".join(f'"{term}"*' for term in terms if term)
+
+
+class TemplateStore:
+    """Templates de campagne persistés dans SQLite"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get(TEMPLATES_DB_ENV, DEFAULT_TEMPLATES_DB)
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.executescript(_SCHEMA)
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                # SQLite compilé sans FTS5 : repli sur LIKE
+                self.has_fts = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Écriture ---------------------------------------------------------
+
+    def save(self, campaign_data: Dict[str, Any], name: Optional[str] = None, description: str = "",
+             impressions: int = 0, clicks: int = 0) -> int:
+        """Enregistre une configuration de campagne (format st.session_state.campaign_data)"""
+        ctr = clicks / impressions * 100 if impressions >= MIN_IMPRESSIONS else None
+        with self._connection() as conn:
+            cursor = conn.execute(
+                """INSERT INTO templates (name, industry, region, tone, product, description, headline,
+                                          keywords, config, impressions, clicks, ctr, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (name or campaign_data["campaign_name"], campaign_data["industry"],
+                 campaign_data.get("target_region"), campaign_data.get("tone"), campaign_data.get("product"),
+                 description, campaign_data["ad_copy"]["headline"], ", ".join(campaign_data["keywords"]),
+                 json.dumps(dict(campaign_data), ensure_ascii=False), impressions, clicks, ctr,
+                 datetime.now().isoformat(timespec="seconds"))
+            )
+        return cursor.lastrowid
+
+    def record_performance(self, template_id: int, impressions: int, clicks: int) -> None:
+        """Cumule les statistiques réelles d'une campagne issue du template et met à jour son CTR"""
+        with self._connection() as conn:
+            conn.execute(
+                """UPDATE templates SET impressions = impressions + ?, clicks = clicks + ?,
+                       ctr = CASE WHEN impressions + ? >= ?
+                                  THEN (clicks + ?) * 100.0 / (impressions + ?) END
+                   WHERE id = ?""",
+                (impressions, clicks, impressions, MIN_IMPRESSIONS, clicks, impressions, template_id)
+            )
+
+    def delete(self, template_id: int) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM templates WHERE id = ?", (template_id,))
+
+    # --- Lecture ----------------------------------------------------------
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM templates").fetchone()[0]
+
+    def get(self, template_id: int) -> Optional[Dict[str, Any]]:
+        """Configuration complète d'un template"""
+        row = self._connection().execute("SELECT config FROM templates WHERE id = ?", (template_id,)).fetchone()
+        return json.loads(row["config"]) if row else None
+
+    def distinct_values(self, column: str) -> List[str]:
+        if column not in ("industry", "region", "tone"):
+            raise ValueError(f"Colonne non indexée: {column}")
+        rows = self._connection().execute(
+            f"SELECT DISTINCT {column} FROM templates WHERE {column} IS NOT NULL ORDER BY {column}")
+        return [row[0] for row in rows]
+
+    def search(self, query: str = "", industry: Optional[str] = None, region: Optional[str] = None,
+               tone: Optional[str] = None, page: int = 1,
+               page_size: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], int]:
+        """Une page de résultats (résumés) classés par CTR historique, et le nombre total de résultats"""
+        conditions, params = [], []
+        fts = _fts_query(query) if query else ""
+        if fts and self.has_fts:
+            # Sous-requête : l'index plein texte est évalué une seule fois, puis croisé avec les filtres
+            conditions.append("t.id IN (SELECT rowid FROM templates_fts WHERE templates_fts MATCH ?)")
+            params.append(fts)
+        elif query:
+            conditions.append("(t.name LIKE ? OR t.headline LIKE ? OR t.keywords LIKE ?)")
+            params.extend([f"%{query}%"] * 3)
+        for column, value in (("industry", industry), ("region", region), ("tone", tone)):
+            if value:
+                conditions.append(f"t.{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        conn = self._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM templates t {where}", params).fetchone()[0]
+        # Tri couvert par les index (…, ctr DESC) ; SQLite place les CTR inconnus (NULL) en dernier
+        rows = conn.execute(
+            f"""SELECT {', '.join('t.' + column for column in SUMMARY_COLUMNS)}
+                FROM templates t {where}
+                ORDER BY t.ctr DESC, t.id DESC
+                LIMIT ? OFFSET ?""",
+            params + [page_size, max(page - 1, 0) * page_size]
+        ).fetchall()
+        return [dict(row) for row in rows], total
+
+
+def ensure_demo_templates(store: TemplateStore, agent) -> None:
+    """Alimente une bibliothèque vide avec les templates de démonstration"""
+    if store.count():
+        return
+    for name, industry, product, region, tone, ctr, description in DEMO_TEMPLATES:
+        campaign_data = {
+            "campaign_name": name,
+            "product": product,
+            "industry": industry,
+            "target_region": region,
+            "tone": tone,
+            "age_range": "25-35",
+            "keywords": agent.generate_keywords(product, industry, region),
+            "ad_copy": agent.generate_ad_copy(product, region, industry, tone),
+            "audience": agent.generate_audience_targeting(industry, region, "25-35"),
+            "performance": agent.estimate_performance(50 * 30, industry),
+            "budget": 50,
+            "objective": "Génération de leads"
+        }
+        # Historique fictif reproduisant le CTR affiché par l'ancienne liste
+        store.save(campaign_data, description=description, impressions=10_000, clicks=int(ctr * 100))
@@ -0,0 +1,31 @@
+import sqlite3
+
+from agent_cache import SharedStoreCache, SQLiteCache
+from shared_store import SharedStore, SQLiteBackend
+
+
+def test_sqlite_cache_purges_expired_and_excess_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr("agent_cache.PURGE_EVERY", 10)
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path, "test", max_entries=15)
+    for i in range(5):
+        cache.set(f"expired{i}", i, ttl=-1)
+    for i in range(95):
+        cache.set(f"key{i}", i)
+
+    with sqlite3.connect(path) as conn:
+        keys = [row[0] for row in conn.execute("SELECT key FROM cache")]
+    assert len(keys) == 15
+    assert not any("expired" in key for key in keys)
+    assert cache.get("key94") == 94
+
+
+def test_shared_store_cache_clear_only_empties_its_namespace(tmp_path):
+    store = SharedStore(SQLiteBackend(str(tmp_path / "store.db")))
+    cache, other = SharedStoreCache(store, "kw"), SharedStoreCache(store, "kwx")
+    cache.set("a", 1)
+    other.set("a", 2)
+    cache.clear()
+
+    assert cache.get("a") is None
+    assert other.get("a") == 2
@@ -0,0 +1,16 @@
+import warnings
+
+import numpy as np
+
+from budget_optimizer import ResponseCurves, optimize
+
+
+def test_marginal_cpa_is_nan_for_a_flat_curve():
+    curves = ResponseCurves(["a", "b", "c"], [0.0, 2.0, 1.0], [0.5, 0.6, 0.7])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        result = optimize(curves, 1000.0)
+
+    assert np.isnan(result["marginal_cpa"][0])
+    assert np.isfinite(result["marginal_cpa"][1:]).all()
+    assert np.isclose(result["budget"].sum(), 1000.0)
@@ -0,0 +1,41 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from ads_agent import FacebookAdsAgent
+from bulk_generation import ERROR_COLUMN, INVALID_BUDGET_ERROR, generate_chunk
+
+
+@pytest.fixture(scope="module")
+def agent():
+    return FacebookAdsAgent()
+
+
+def _chunk(**overrides):
+    row = {"product": "FIV", "industry": "Santé/Médical", "target_region": "Europe", "daily_budget": 50}
+    return pd.DataFrame([row, {**row, **overrides}])
+
+
+@pytest.mark.parametrize("budget", [float("inf"), float("-inf"), float("nan"), None, "", "x", 0, -10])
+def test_invalid_budget_row_is_flagged_without_estimates(agent, budget):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        result = generate_chunk(agent, _chunk(daily_budget=budget))
+
+    assert result.loc[0, ERROR_COLUMN] == ""
+    assert result.loc[0, "headline"] != ""
+    assert result.loc[1, ERROR_COLUMN] == INVALID_BUDGET_ERROR
+    assert result.loc[1, "headline"] == ""
+    estimates = [column for column in result.columns if result[column].dtype in ("Int64", "Float64")]
+    assert estimates and result.loc[1, estimates].isna().all()
+    assert result.loc[0, estimates].notna().all()
+
+
+@pytest.mark.parametrize("value", [None, "", "   "])
+def test_empty_text_field_is_flagged(agent, value):
+    result = generate_chunk(agent, _chunk(product=value))
+
+    assert "product" in result.loc[1, ERROR_COLUMN]
+    assert result.loc[1, "keywords"] == ""
+    assert result.loc[0, ERROR_COLUMN] == ""
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+
+from graph_api import AdaptiveThrottle, GraphApiClient, GraphApiError, sync_insights
+from graph_api_mock import MockGraphApiServer
+from metrics_store import MetricsStore
+
+
+@pytest.fixture
+def server():
+    with MockGraphApiServer(usage_per_call=0.0, report_polls=1) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    client = GraphApiClient("mock", "act_mock", graph_url=server.url, page_id="mock",
+                            throttle=AdaptiveThrottle(sleep=lambda seconds: None))
+    yield client
+    client.close()
+
+
+def test_resync_same_range_replaces_rows(client, tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics"))
+    first = sync_insights(client, store, "2025-01-01", "2025-01-07", chunk_rows=50)
+    totals = store.daily_totals(date(2025, 1, 1), date(2025, 1, 31))
+    second = sync_insights(client, store, "2025-01-01", "2025-01-07", chunk_rows=50)
+
+    assert first == second == 7 * 20
+    assert len(store.load(date(2025, 1, 1), date(2025, 1, 31))) == 7 * 20
+    assert store.daily_totals(date(2025, 1, 1), date(2025, 1, 31)).equals(totals)
+
+
+def test_overlapping_resync_keeps_one_row_per_ad_and_day(client, tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics"))
+    sync_insights(client, store, "2025-01-01", "2025-01-07")
+    sync_insights(client, store, "2025-01-05", "2025-01-10")
+
+    stored = store.load(date(2025, 1, 1), date(2025, 1, 31))
+    assert len(stored) == 10 * 20
+    assert not stored.duplicated(["ad_id", "date"]).any()
+
+
+def test_transient_html_errors_are_retried(server, client):
+    server.api.fail_next = 2
+    assert client.request("POST", "act_mock/campaigns", {"name": "Test"})["id"]
+
+    server.api.fail_next = 10
+    with pytest.raises(GraphApiError) as error:
+        client.request("GET", "act_mock/campaigns")
+    assert error.value.status == 502 and error.value.is_transient
+
+
+def test_from_env_requires_page_id(monkeypatch):
+    monkeypatch.setenv("FACEBOOK_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("FACEBOOK_AD_ACCOUNT_ID", "123")
+    monkeypatch.delenv("FACEBOOK_PAGE_ID", raising=False)
+    assert GraphApiClient.from_env() is None
+
+    monkeypatch.setenv("FACEBOOK_PAGE_ID", "456")
+    client = GraphApiClient.from_env()
+    assert client.ad_account_id == "act_123" and client.page_id == "456"
+    client.close()
@@ -0,0 +1,111 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+
+import insights_stream
+from insights_stream import IngestionPipeline, InsightsLog, LatestValues, SyntheticFeed
+from kpi_rollups import KpiRollup
+from metrics_store import MetricsStore
+
+PERIOD = (date(2025, 1, 1), date(2025, 12, 31))
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(insights_stream, "APPLY_RETRY_DELAY", 0.0)
+
+
+def _snapshots(n, n_ads=5):
+    feed = SyntheticFeed(pipeline=None, start=date(2025, 1, 1), n_ads=n_ads)
+    for _ in range(n):
+        yield feed.snapshot()
+        feed.hour += 1
+
+
+def _failing(pipeline, sequence, failures):
+    """Fait échouer `failures` fois l'application du lot `sequence`"""
+    apply = pipeline._apply
+    remaining = [failures]
+
+    def _apply(items):
+        if remaining[0] and any(item[0] == sequence for item in items):
+            remaining[0] -= 1
+            raise RuntimeError("échec simulé")
+        apply(items)
+
+    pipeline._apply = _apply
+
+
+def _ingest(pipeline, snapshots):
+    pipeline.start()
+    for snapshot in snapshots:
+        pipeline.submit(snapshot)
+    assert pipeline.drain(timeout=10)
+
+
+def test_replay_after_failed_batch_matches_live_totals(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics"))
+    log = InsightsLog(str(tmp_path / "wal"))
+    live = KpiRollup()
+    pipeline = IngestionPipeline(log, live, store, linger=0.0, flush_interval=3600.0)
+    _failing(pipeline, sequence=1, failures=1)
+    _ingest(pipeline, _snapshots(4))
+    assert pipeline.failed == 1 and pipeline.dead_lettered == 0
+
+    # Arrêt brutal avant toute écriture du store : tout est rejoué depuis le journal
+    pipeline._stop.set()
+    pipeline._thread.join()
+    log.close()
+    recovered = KpiRollup()
+    replayed = IngestionPipeline(InsightsLog(log.root), recovered, store).recover()
+
+    assert replayed == 4 * 5
+    assert recovered.totals(*PERIOD) == pytest.approx(live.totals(*PERIOD))
+
+
+def test_batch_failing_every_attempt_is_dead_lettered(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics"))
+    log = InsightsLog(str(tmp_path / "wal"))
+    pipeline = IngestionPipeline(log, KpiRollup(), store, linger=0.0, flush_interval=3600.0)
+    _failing(pipeline, sequence=1, failures=insights_stream.MAX_APPLY_ATTEMPTS)
+    _ingest(pipeline, _snapshots(3))
+    pipeline.stop()
+    log.close()
+
+    assert pipeline.dead_lettered == 1
+    assert pipeline.failed == insights_stream.MAX_APPLY_ATTEMPTS
+    # Le point de contrôle dépasse le lot mis de côté : rien n'est rejoué au redémarrage
+    assert log.committed == 3
+    assert os.path.getsize(os.path.join(log.path, insights_stream._DEAD_LETTER)) > 0
+    assert IngestionPipeline(InsightsLog(log.root), KpiRollup(), store).recover() == 0
+
+
+def test_store_keeps_latest_totals_once(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics"))
+    snapshots = list(_snapshots(3))
+    for _ in range(2):
+        log = InsightsLog(str(tmp_path / "wal"))
+        pipeline = IngestionPipeline(log, KpiRollup(), store, linger=0.0)
+        _ingest(pipeline, snapshots)
+        pipeline.stop()
+        log.close()
+
+    stored = store.load(*PERIOD)
+    assert len(stored) == 5
+    assert stored["impressions"].sum() == snapshots[-1]["impressions"].sum()
+
+
+def test_latest_values_forget_days_outside_the_window():
+    latest = LatestValues(window_days=3)
+    feed = SyntheticFeed(pipeline=None, start=date(2025, 1, 1), n_ads=4)
+    for day in range(10):
+        feed.day = date(2025, 1, 1) + timedelta(days=day)
+        _, _, values = latest.deltas(feed.snapshot())
+        latest.update(values)
+
+    assert len(latest) == 3 * 4
+    # Un relevé plus ancien que la fenêtre est ignoré
+    feed.day = date(2025, 1, 1)
+    changed, delta, _ = latest.deltas(feed.snapshot())
+    assert changed.empty and delta.empty
@@ -0,0 +1,38 @@
+from datetime import date
+
+from metrics_store import MetricsStore, ensure_demo_data, generate_synthetic_insights
+
+START, END = date(2025, 1, 25), date(2025, 2, 5)
+
+
+def test_upsert_replaces_rows_with_the_same_key(tmp_path):
+    store = MetricsStore(str(tmp_path))
+    insights = generate_synthetic_insights(START, END, n_ads=3)
+    store.upsert(insights)
+    store.upsert(insights)
+    assert len(store.load(START, END)) == len(insights)
+
+    updated = insights.copy()
+    updated["impressions"] += 1
+    store.upsert(updated)
+    assert store.load(START, END)["impressions"].sum() == updated["impressions"].sum()
+
+
+def test_upsert_replace_range_only_touches_the_account(tmp_path):
+    store = MetricsStore(str(tmp_path))
+    store.upsert(generate_synthetic_insights(START, END, n_ads=2))
+    other = generate_synthetic_insights(START, END, n_ads=2).assign(account_id="other")
+    store.upsert(other)
+
+    # Période vidée pour act_demo (mois de février compris), les lignes de l'autre compte restent
+    store.upsert(other.iloc[:0], replace_range=(START, END), account_id="act_demo")
+    stored = store.load(START, END)
+    assert set(stored["account_id"]) == {"other"}
+    assert len(stored) == len(other)
+
+
+def test_demo_data_is_seeded_once(tmp_path):
+    store = MetricsStore(str(tmp_path))
+    ensure_demo_data(store, START, END)
+    ensure_demo_data(store, START, END)
+    assert len(store.load(START, END)) == (END - START).days + 1